@@ -1,16 +1,142 @@
-from datetime import datetime
+"""
+A personal budget tracker: income and expenses by category and date, kept in
+a JSON file (budget_data.json by default), a binary snapshot (.snap) or an
+SQLite database (.db or .sqlite).
+
+Run it without a command for the interactive menu, or give one command for
+scripts and cron jobs (--help lists them, COMMAND --help shows the options):
+
+    python personal_tracker.py -f budget.db expense 12.50 food --date 2025-03-14
+    python personal_tracker.py -f budget.db summary
+    python personal_tracker.py -f budget.db import statement.csv
+
+`batch` runs commands from a file (or stdin), one per line in the same syntax
+without the program name, with a single load and a single write:
+
+    python personal_tracker.py -f budget.db batch commands.txt
+
+Startup: numpy, concurrent.futures and sqlite3 are only imported by the
+commands that use them. The cold-start targets for 100k transactions, and
+how to check them, are in README.md.
+"""
+from datetime import date, datetime
+import argparse
+import bisect
+import collections
+import contextlib
+import csv
+import functools
+import io
+import itertools
+import math
 import os
 import json
+import re
+import struct
+import sys
+import time
+
+# The helpers the three apps share (storage formats, metrics, rendering, the batch runner)
+# live in appcommon.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from appcommon import (BackgroundWriter, LOCK_SUFFIX, METRICS_FILE_ENV, Metrics, RenderCache, SnapshotError,
+                       atomic_open, command_batch, count, file_lock, file_stamp, is_database, is_snapshot,
+                       iter_json_array, iter_snapshot, metrics_enabled, run_command, write_buffered,
+                       write_snapshot)
+
+# numpy is only needed for the optional columnar store, and is slow to import; see load_numpy()
+np = None
 
 # Budget data will be stored in this file
 BUDGET_FILE = 'budget_data.json'
+# First bytes of a budget snapshot (.snap) file
+SNAPSHOT_MAGIC = b'BUDGETS1'
+# Characters of a bank statement handed to an import worker at a time
+IMPORT_CHUNK_SIZE = 1 << 20
+# Statements with these extensions are OFX/QFX; anything else is read as CSV
+OFX_EXTENSIONS = ('.ofx', '.qfx')
+# CSV header names (lower-cased) recognised for each field, most specific first
+IMPORT_COLUMNS = {
+        "date": ("date", "transaction date", "posted date", "posting date", "booking date", "value date"),
+        "amount": ("amount", "transaction amount", "value"),
+        "debit": ("debit", "withdrawal", "withdrawals", "money out", "paid out"),
+        "credit": ("credit", "deposit", "deposits", "money in", "paid in"),
+        "category": ("category", "payee", "description", "name", "memo", "details", "narrative"),
+        }
+# Category given to imported rows that have none
+IMPORT_CATEGORY = 'uncategorized'
+
+# Dates are kept as whole seconds since 0001-01-01, which compare and sort as plain ints
+SECONDS_PER_DAY = 86400
+# The same instant as NumPy's datetime64 zero, for the columnar store
+UNIX_EPOCH = date(1970, 1, 1).toordinal() * SECONDS_PER_DAY
+
+@functools.lru_cache(maxsize=None)
+def day_ordinal(text):
+    """Day number of a 'YYYY-MM-DD' string; cached because many transactions share a day."""
+    return date.fromisoformat(text).toordinal()
+
+@functools.lru_cache(maxsize=None)
+def day_text(ordinal):
+    """'YYYY-MM-DD' for a day number; the cached counterpart of day_ordinal."""
+    return date.fromordinal(ordinal).isoformat()
+
+def parse_timestamp(text):
+    """
+    Parses 'YYYY-MM-DD HH:MM:SS' (or just 'YYYY-MM-DD') into seconds since
+    0001-01-01. Slices the fixed-width fields instead of calling strptime and
+    falls back to datetime.fromisoformat for other ISO forms.
+    Raises ValueError for anything that isn't a valid date.
+    """
+    if len(text) == 10:
+        return day_ordinal(text) * SECONDS_PER_DAY
+    if len(text) == 19 and text[10] in " T" and text[13] == ":" and text[16] == ":" and text[:10].count("-") == 2:
+        seconds = int(text[11:13]) * 3600 + int(text[14:16]) * 60 + int(text[17:19])
+        if seconds < SECONDS_PER_DAY:
+            return day_ordinal(text[:10]) * SECONDS_PER_DAY + seconds
+    moment = datetime.fromisoformat(text)
+    return moment.toordinal() * SECONDS_PER_DAY + moment.hour * 3600 + moment.minute * 60 + moment.second
+
+@functools.lru_cache(maxsize=None)
+def clock_text(seconds):
+    """'HH:MM:SS' for seconds into a day; cached like day_text, as formatting it is most of a listing's time."""
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def format_timestamp(seconds):
+    """Formats seconds from parse_timestamp as 'YYYY-MM-DD HH:MM:SS'."""
+    day, rest = divmod(seconds, SECONDS_PER_DAY)
+    return f"{day_text(day)} {clock_text(rest)}"
+
+def month_key(seconds):
+    """'YYYY-MM' of a timestamp, as used by the monthly totals."""
+    return day_text(seconds // SECONDS_PER_DAY)[:7]
+
 class Transaction:
     """This base class is for all financial transactions. It shows encapsulation by bundling data (amount, date, category) with the methods that work on it"""
+    __slots__ = ("amount", "when", "category")
+    type = "base" # A default type to be overriden by subclasses
+    sign = 0 # How the amount affects the balance: +1 for income, -1 for expenses
+    RECORD = struct.Struct("<bIId") # sign, category and date as string pool indexes, amount
+
     def __init__(self, amount, category, date=None):
         self.amount = float(amount)
-        self.date = date if date else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.category = category
-        self.type = "base" # A default type to be overriden by subclasses
+        # The date is parsed once into an int and only formatted back to text when shown or saved
+        self.when = parse_timestamp(date if date else datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        # Categories repeat a lot, so every transaction shares one string object per category
+        self.category = sys.intern(category)
+
+    @classmethod
+    def from_timestamp(cls, amount, category, when):
+        """Creates a transaction from a timestamp that is already parsed (see parse_timestamp)."""
+        transaction = cls.__new__(cls)
+        transaction.amount = float(amount)
+        transaction.when = when
+        transaction.category = sys.intern(category)
+        return transaction
+
+    @property
+    def date(self):
+        return format_timestamp(self.when)
 
     def to_dict(self):
         """Converts the Transaction object to a dictionary for JSON serialization"""
@@ -20,15 +146,27 @@ class Transaction:
                 "date": self.date,
                 "amount": self.amount
                 }
+
+    def to_record(self, pool):
+        """Packs the transaction into a fixed-width binary record, storing its strings in the pool."""
+        return self.RECORD.pack(self.sign, pool.add(self.category), pool.add(self.date), self.amount)
+
+    @staticmethod
+    def from_record(snapshot, offset):
+        """Creates an Income or Expense object from the binary record at offset in a snapshot"""
+        sign, category, date, amount = Transaction.RECORD.unpack_from(snapshot.buffer, offset)
+        cls = Income if sign > 0 else Expense
+        return cls(amount, snapshot.string(category), snapshot.string(date))
+
     def __str__(self):
         """Returns the string representation of the objects"""
         return f"Date: {self.date} | Category: {self.category} | Amount: ${self.amount:.2f}"
 
 class Income(Transaction):
     """A class for tracking income transactions. This demonstrates inheritance"""
-    def __init__(self, amount, category, date=None):
-        super().__init__(amount, category, date)
-        self.type = "income"
+    __slots__ = ()
+    type = "income"
+    sign = 1
 
     def __str__(self):
         return f"[INCOME] " + super().__str__()
@@ -36,83 +174,1132 @@ class Income(Transaction):
 
 class Expense(Transaction):
     """This class tracks expense transactions. It also inherits from the Transaction base class"""
-    def __init__(self, amount, category, date=None):
-        super().__init__(amount, category, date)
-        self.type = "expense"
+    __slots__ = ()
+    type = "expense"
+    sign = -1
 
     def __str__(self):
         return f"[EXPENSE] " + super().__str__()
 
-class Budget:
-    """Manages all transactions and handles data persistence. Thic class encapsulates all the logic for adding, retrieving and saving transactions"""
+def stream_transactions(file_path, start=0, limit=None):
+    """
+    Yields Income/Expense objects straight from a budget file, reading only as far as needed.
+    'start' and 'limit' select a page. Records of an unknown type are skipped.
+    Binary snapshots and SQLite databases jump straight to the first transaction of the page.
+    """
+    stop = None if limit is None else start + limit
+    if is_database(file_path):
+        return iter_database(file_path, start, stop)
+    if is_snapshot(file_path):
+        return iter_snapshot(file_path, Transaction.from_record, SNAPSHOT_MAGIC, start, stop)
+    classes = {"income": Income, "expense": Expense}
+    transactions = (classes[d['type']](d['amount'], d['category'], d['date'])
+                    for d in iter_json_array(file_path) if d['type'] in classes)
+    return itertools.islice(transactions, start, stop)
+
+def write_transactions(file_path, transactions):
+    """Writes transactions as JSON, an SQLite database or a binary snapshot, depending on the extension."""
+    if is_database(file_path):
+        store = SqliteTransactions(file_path)
+        try:
+            store.clear()
+            store.extend(transactions)
+            store.commit()
+        finally:
+            store.close()
+        return
+    if is_snapshot(file_path):
+        write_snapshot(file_path, transactions, SNAPSHOT_MAGIC)
+        return
+    data_to_save = [t.to_dict() for t in transactions]
+    with atomic_open(file_path) as f:
+        json.dump(data_to_save, f, indent=4)
+
+def convert_transactions(source, target):
+    """Copies a budget file into another format, e.g. budget_data.json -> budget_data.snap or back."""
+    write_transactions(target, stream_transactions(source))
+
+def parse_amount(text):
+    """
+    Parses an amount as banks export it: '-12.50', '$1,234.00', '(12.50)' or
+    '12.50-' (the last two are negative), and decimal commas as in '1.234,50'
+    or '12,50'. Raises ValueError otherwise.
+    """
+    currency = "$\u20ac\u00a3\u00a5"
+    text = text.strip().replace(" ", "").strip(currency)
+    negative = text.startswith("-") or text.endswith("-") or text.startswith("(") and text.endswith(")")
+    digits = text.strip("()-+").strip(currency)
+    comma, dot = digits.rfind(","), digits.rfind(".")
+    # A comma is the decimal separator if it comes after any dot and only one or two digits follow it
+    if comma > dot and len(digits) - comma - 1 in (1, 2):
+        digits = digits.replace(".", "").replace(",", ".")
+    amount = float(digits.replace(",", ""))
+    if not math.isfinite(amount):
+        raise ValueError(f"invalid amount '{text}'")
+    return -amount if negative else amount
+
+def parse_statement_date(text, date_format=None):
+    """Parses a statement date: ISO by default, OFX's 'YYYYMMDD[HHMMSS]...', or date_format for strptime."""
+    text = text.strip()
+    if date_format:
+        moment = datetime.strptime(text, date_format)
+        return moment.toordinal() * SECONDS_PER_DAY + moment.hour * 3600 + moment.minute * 60 + moment.second
+    if len(text) >= 8 and text[:8].isdigit():
+        day = day_ordinal(f"{text[:4]}-{text[4:6]}-{text[6:8]}") * SECONDS_PER_DAY
+        clock = text[8:14]
+        if len(clock) == 6 and clock.isdigit():
+            day += int(clock[:2]) * 3600 + int(clock[2:4]) * 60 + int(clock[4:])
+        return day
+    return parse_timestamp(text)
+
+def statement_columns(header):
+    """Maps each field in IMPORT_COLUMNS to its position in a CSV header row."""
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in IMPORT_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if "date" not in columns or not ("amount" in columns or "debit" in columns or "credit" in columns):
+        raise ValueError(f"the statement needs a date column and an amount (or debit/credit) column, got {header}")
+    return columns
+
+def iter_statement_chunks(file_path, date_format=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Splits a bank statement into import jobs for parse_statement_chunk, reading
+    it chunk_size characters at a time. CSV chunks end at a line break outside
+    quotes and carry the header mapping; OFX chunks end after a </STMTTRN>.
+    """
+    if file_path.lower().endswith(OFX_EXTENSIONS):
+        closing = "</STMTTRN>"
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            carry, first = "", 0
+            for chunk in iter(lambda: f.read(chunk_size), ""):
+                text = carry + chunk
+                upper = text.upper()
+                end = upper.rfind(closing)
+                if end < 0:
+                    carry = text
+                    continue
+                end += len(closing)
+                yield ("ofx", first, text[:end], None, None)
+                first += upper.count(closing, 0, end)
+                carry = text[end:]
+        return
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = f.readline()
+        try:
+            dialect = csv.Sniffer().sniff(header, delimiters=",;\t|")
+            delimiter = dialect.delimiter
+        except csv.Error:
+            delimiter = ","
+        columns = statement_columns(next(csv.reader([header], delimiter=delimiter)))
+        line = 2
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            chunk += f.readline()
+            # A quoted field can contain line breaks: keep reading until the quotes are balanced
+            while chunk.count('"') % 2:
+                rest = f.readline()
+                if not rest:
+                    break
+                chunk += rest
+            yield ("csv", line, chunk, (columns, delimiter), date_format)
+            line += chunk.count("\n")
+
+def parse_statement_chunk(job):
+    """
+    Parses and validates one job from iter_statement_chunks (in a worker process).
+    Returns (records, errors): records are (sign, timestamp, amount, category)
+    tuples and errors are messages naming the line (CSV) or transaction (OFX).
+    """
+    kind, first, text, layout, date_format = job
+    records = []
+    errors = []
+    if kind == "ofx":
+        blocks = re.finditer(r"<STMTTRN>(.*?)</STMTTRN>", text, re.S | re.I)
+        rows = ((first + i + 1, block.group(1)) for i, block in enumerate(blocks))
+    else:
+        columns, delimiter = layout
+        reader = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+        rows = ((first + reader.line_num - 1, row) for row in reader)
+    for number, row in rows:
+        try:
+            if kind == "ofx":
+                fields = {name.upper(): value.strip() for name, value in re.findall(r"<(\w+)>([^<\r\n]*)", row)}
+                when = parse_statement_date(fields["DTPOSTED"], date_format)
+                amount = parse_amount(fields["TRNAMT"])
+                category = fields.get("NAME") or fields.get("MEMO") or fields.get("TRNTYPE", "").lower()
+            else:
+                if not any(field.strip() for field in row):
+                    continue
+                when = parse_statement_date(row[columns["date"]], date_format)
+                if "amount" in columns and row[columns["amount"]].strip():
+                    amount = parse_amount(row[columns["amount"]])
+                else:
+                    credit = row[columns["credit"]].strip() if "credit" in columns else ""
+                    debit = row[columns["debit"]].strip() if "debit" in columns else ""
+                    amount = (abs(parse_amount(credit)) if credit else 0.0) - (abs(parse_amount(debit)) if debit else 0.0)
+                category = row[columns["category"]].strip() if "category" in columns else ""
+            if amount == 0:
+                raise ValueError("the amount is zero")
+            records.append((1 if amount > 0 else -1, when, abs(amount), category or IMPORT_CATEGORY))
+        except (ValueError, KeyError, IndexError) as e:
+            label = "transaction" if kind == "ofx" else "line"
+            errors.append(f"{label} {number}: {e}")
+    return records, errors
+
+def parallel_map(function, jobs, workers):
+    """
+    Yields function(job) for every job, in order. With more than one worker the
+    jobs run on a process pool, with at most two per worker queued at a time so
+    a large input is never read into memory all at once.
+    """
+    if workers <= 1:
+        yield from map(function, jobs)
+        return
+    import concurrent.futures # imported on first use to keep startup fast
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for job in jobs:
+            pending.append(pool.submit(function, job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class RunningTotals:
+    """
+    Totals that are updated as transactions are added or removed, so balance and
+    summary queries never have to walk the transaction list.
+    Everything is kept in integer cents so repeated updates can't drift.
+    """
+    def __init__(self):
+        self.income = 0
+        self.expenses = 0
+        self.by_category = {}
+        self.by_month = {}
+
+    def add(self, transaction, direction=1):
+        """Counts a transaction in (direction=1) or out (direction=-1) of the totals."""
+        cents = round(transaction.amount * 100) * direction
+        if transaction.sign > 0:
+            self.income += cents
+        elif transaction.sign < 0:
+            self.expenses += cents
+        signed = transaction.sign * cents
+        self._bump(self.by_category, transaction.category, signed)
+        self._bump(self.by_month, month_key(transaction.when), signed)
+
+    def remove(self, transaction):
+        """Takes a transaction back out of the totals."""
+        self.add(transaction, -1)
+
+    @staticmethod
+    def _bump(buckets, key, cents):
+        total = buckets.get(key, 0) + cents
+        if total:
+            buckets[key] = total
+        else:
+            buckets.pop(key, None)
+
+    @property
+    def balance(self):
+        return self.income - self.expenses
+
+    def __eq__(self, other):
+        return (self.income, self.expenses, self.by_category, self.by_month) == \
+               (other.income, other.expenses, other.by_category, other.by_month)
+
+class DayTotals:
+    """
+    Income and expense cents per day, each in a Fenwick (binary indexed) tree,
+    so the total of any range of days is two O(log D) prefix sums, D being
+    the number of days covered. Days are day ordinals (see day_ordinal).
+    Transactions can be added and removed in any date order; a day outside
+    the covered span grows it, doubling so that rebuilding the trees from the
+    per-day totals (O(D)) happens rarely.
+    """
+    def __init__(self):
+        self.first = 0
+        self.size = 0
+        # Per-day cents, kept to rebuild the trees when the span grows
+        self._daily = {1: [], -1: []}
+        # Fenwick trees indexed 1..size; entry i covers the (i & -i) days ending with day first+i-1
+        self._trees = {1: [0], -1: [0]}
+
+    def add(self, transaction, direction=1):
+        """Counts a transaction in (direction=1) or out (direction=-1) of its day."""
+        if not transaction.sign:
+            return
+        day = transaction.when // SECONDS_PER_DAY
+        if not self.first <= day < self.first + self.size:
+            self._grow(day)
+        cents = round(transaction.amount * 100) * direction
+        i = day - self.first
+        self._daily[transaction.sign][i] += cents
+        tree = self._trees[transaction.sign]
+        i += 1
+        while i <= self.size:
+            tree[i] += cents
+            i += i & -i
+
+    def remove(self, transaction):
+        self.add(transaction, -1)
+
+    def _grow(self, day):
+        """Widens the span to include day, with as much room again on that side, and rebuilds the trees."""
+        if not self.size:
+            first, last = day, day + 1
+        else:
+            first, last = min(self.first, day), max(self.first + self.size, day + 1)
+        size = max(2 * (last - first), 64)
+        # Leave the spare room on the side the span grew towards
+        first = last - size if day < self.first else first
+        offset = self.first - first
+        for sign in (1, -1):
+            daily = [0] * size
+            if self.size:
+                daily[offset:offset + self.size] = self._daily[sign]
+            self._daily[sign] = daily
+        self.first, self.size = first, size
+        self._build_trees()
+
+    def _build_trees(self):
+        """Builds both Fenwick trees from the per-day totals in O(D)."""
+        for sign, daily in self._daily.items():
+            tree = [0] + daily
+            for i in range(1, self.size + 1):
+                parent = i + (i & -i)
+                if parent <= self.size:
+                    tree[parent] += tree[i]
+            self._trees[sign] = tree
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """Builds the day totals of many transactions at once: summed per day first, then O(D) trees."""
+        sums = {1: {}, -1: {}}
+        for transaction in transactions:
+            if transaction.sign:
+                by_day = sums[transaction.sign]
+                day = transaction.when // SECONDS_PER_DAY
+                by_day[day] = by_day.get(day, 0) + round(transaction.amount * 100)
+        days = cls()
+        used = sums[1].keys() | sums[-1].keys()
+        if not used:
+            return days
+        first, last = min(used), max(used) + 1
+        # Room for as many days again after the last one, where new transactions usually go
+        days.first, days.size = first, max(2 * (last - first), 64)
+        for sign, by_day in sums.items():
+            daily = days._daily[sign] = [0] * days.size
+            for day, cents in by_day.items():
+                daily[day - first] = cents
+        days._build_trees()
+        return days
+
+    def _prefix(self, sign, day):
+        """Cents of the given sign on the days before day."""
+        i = min(max(day - self.first, 0), self.size)
+        tree = self._trees[sign]
+        total = 0
+        while i:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def between(self, start_day, end_day):
+        """Returns (income, expense) cents of the days from start_day (inclusive) to end_day (exclusive)."""
+        if end_day <= start_day:
+            return 0, 0
+        return (self._prefix(1, end_day) - self._prefix(1, start_day),
+                self._prefix(-1, end_day) - self._prefix(-1, start_day))
+
+def load_numpy():
+    """Imports numpy the first time the columnar store needs it."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("The columnar budget store requires numpy (pip install numpy).")
+        np = numpy
+    return np
+
+class ColumnarTransactions:
+    """
+    A list-like store that keeps transactions as NumPy columns instead of objects.
+    Amounts are int64 cents, the type is a +1/-1 sign, categories are int codes
+    and dates are datetime64, so aggregates are single vectorized expressions.
+    Iterating or indexing rebuilds Income/Expense objects on demand, so code
+    written against a plain list of transactions keeps working.
+    """
+    def __init__(self, capacity=1024):
+        load_numpy()
+        self._size = 0
+        self._cents = np.zeros(capacity, dtype=np.int64)
+        self._signs = np.zeros(capacity, dtype=np.int8)
+        self._codes = np.zeros(capacity, dtype=np.int32)
+        self._dates = np.zeros(capacity, dtype="datetime64[s]")
+        self.categories = [] # code -> category name
+        self._category_codes = {} # category name -> code
+
+    def _grow(self):
+        """Doubles the capacity of every column."""
+        capacity = len(self._cents) * 2
+        for name in ("_cents", "_signs", "_codes", "_dates"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, transaction):
+        """Stores a transaction in the columns."""
+        if self._size == len(self._cents):
+            self._grow()
+        code = self._category_codes.get(transaction.category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(transaction.category)
+            self._category_codes[transaction.category] = code
+        i = self._size
+        self._cents[i] = round(transaction.amount * 100)
+        self._signs[i] = transaction.sign
+        self._codes[i] = code
+        self._dates[i] = np.datetime64(transaction.when - UNIX_EPOCH, "s")
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("transaction index out of range")
+        cls = Income if self._signs[i] > 0 else Expense
+        date = str(self._dates[i]).replace("T", " ")
+        return cls(self._cents[i] / 100, self.categories[self._codes[i]], date)
+
+    def page(self, start=0, stop=None):
+        """Yields the transactions at positions start..stop."""
+        for i in range(*slice(start, stop).indices(self._size)):
+            yield self[i]
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def pop(self, i=-1):
+        """Removes and returns the transaction at index i."""
+        transaction = self[i]
+        if i < 0:
+            i += self._size
+        for column in (self._cents, self._signs, self._codes, self._dates):
+            column[i:self._size - 1] = column[i + 1:self._size]
+        self._size -= 1
+        return transaction
+
+    def _signed_cents(self):
+        return self._cents[:self._size] * self._signs[:self._size]
+
+    def balance(self):
+        """Returns income minus expenses."""
+        return int(self._signed_cents().sum()) / 100
+
+    def totals(self):
+        """Recomputes RunningTotals from the columns."""
+        totals = RunningTotals()
+        cents = self._cents[:self._size]
+        signs = self._signs[:self._size]
+        totals.income = int(cents[signs > 0].sum())
+        totals.expenses = int(cents[signs < 0].sum())
+        for buckets, source in ((totals.by_category, self.category_totals()),
+                                (totals.by_month, self.monthly_totals())):
+            for key, amount in source.items():
+                if amount:
+                    buckets[key] = round(amount * 100)
+        return totals
+
+    def category_totals(self):
+        """Returns the net amount (income positive, expenses negative) per category."""
+        totals = np.bincount(self._codes[:self._size], weights=self._signed_cents(),
+                             minlength=len(self.categories))
+        return {name: round(float(total)) / 100 for name, total in zip(self.categories, totals)}
+
+    def monthly_totals(self):
+        """Returns the net amount per month, keyed by 'YYYY-MM'."""
+        months = self._dates[:self._size].astype("datetime64[M]")
+        unique, inverse = np.unique(months, return_inverse=True)
+        totals = np.bincount(inverse, weights=self._signed_cents(), minlength=len(unique))
+        return {str(month): round(float(total)) / 100 for month, total in zip(unique, totals)}
+
+    def range_total(self, start, end):
+        """Returns the net amount of transactions dated in [start, end)."""
+        dates = self._dates[:self._size]
+        mask = (dates >= np.datetime64(start.replace(" ", "T"))) & (dates < np.datetime64(end.replace(" ", "T")))
+        return int(self._signed_cents()[mask].sum()) / 100
+
+    def between(self, start, end):
+        """Returns the transactions dated in [start, end), in date order."""
+        dates = self._dates[:self._size]
+        positions = np.flatnonzero((dates >= np.datetime64(start.replace(" ", "T")))
+                                   & (dates < np.datetime64(end.replace(" ", "T"))))
+        positions = positions[np.argsort(dates[positions], kind="stable")]
+        return [self[int(i)] for i in positions]
+
+class SqliteTransactions:
+    """
+    A list-like store that keeps transactions in an SQLite database instead of memory.
+    It is used for budget files ending in .db or .sqlite. Rows are only read
+    when they are asked for, and totals are SQL aggregates over indexed
+    columns, so a budget can be larger than RAM. The database runs in WAL
+    mode; changes become durable when commit() is called.
+    """
+    SCHEMA = (
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            "id INTEGER PRIMARY KEY, type TEXT NOT NULL, category TEXT NOT NULL, "
+            "date TEXT NOT NULL, amount REAL NOT NULL, cents INTEGER NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date)",
+            "CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category)",
+            "CREATE INDEX IF NOT EXISTS transactions_type ON transactions (type)",
+            )
+    COLUMNS = "type, category, date, amount"
+    # Net amount in cents: income counts positive, expenses negative
+    SIGNED_CENTS = "SUM(CASE type WHEN 'income' THEN cents ELSE -cents END)"
+
     def __init__(self, file_path):
+        import sqlite3 # only databases need it, so it is imported on first use to keep startup fast
+        self.connection = sqlite3.connect(file_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self._size, = self.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()
+
+    @staticmethod
+    def _row(transaction):
+        return (transaction.type, transaction.category, transaction.date,
+                transaction.amount, round(transaction.amount * 100))
+
+    @staticmethod
+    def _transaction(row):
+        cls = Income if row[0] == 'income' else Expense
+        return cls(row[3], row[1], row[2])
+
+    def append(self, transaction):
+        """Inserts a transaction (visible to other connections after commit())."""
+        self.connection.execute(
+                "INSERT INTO transactions (type, category, date, amount, cents) VALUES (?, ?, ?, ?, ?)",
+                self._row(transaction))
+        self._size += 1
+
+    def extend(self, transactions):
+        """Inserts many transactions with a single prepared statement."""
+        cursor = self.connection.executemany(
+                "INSERT INTO transactions (type, category, date, amount, cents) VALUES (?, ?, ?, ?, ?)",
+                map(self._row, transactions))
+        self._size += cursor.rowcount
+
+    def clear(self):
+        self.connection.execute("DELETE FROM transactions")
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _id_at(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("transaction index out of range")
+        row_id, = self.connection.execute(
+                "SELECT id FROM transactions ORDER BY id LIMIT 1 OFFSET ?", (i,)).fetchone()
+        return row_id
+
+    def __getitem__(self, i):
+        row = self.connection.execute(
+                f"SELECT {self.COLUMNS} FROM transactions WHERE id = ?", (self._id_at(i),)).fetchone()
+        return self._transaction(row)
+
+    def __iter__(self):
+        return self.page(0, None)
+
+    def page(self, start=0, stop=None):
+        """Yields the transactions at positions start..stop, reading rows lazily."""
+        limit = -1 if stop is None else max(stop - start, 0)
+        cursor = self.connection.execute(
+                f"SELECT {self.COLUMNS} FROM transactions ORDER BY id LIMIT ? OFFSET ?", (limit, start))
+        for row in cursor:
+            yield self._transaction(row)
+
+    def pop(self, i=-1):
+        """Deletes and returns the transaction at index i."""
+        row_id = self._id_at(i)
+        row = self.connection.execute(
+                f"SELECT {self.COLUMNS} FROM transactions WHERE id = ?", (row_id,)).fetchone()
+        self.connection.execute("DELETE FROM transactions WHERE id = ?", (row_id,))
+        self._size -= 1
+        return self._transaction(row)
+
+    def totals(self):
+        """Computes RunningTotals with SQL aggregates."""
+        totals = RunningTotals()
+        for kind, cents in self.connection.execute("SELECT type, SUM(cents) FROM transactions GROUP BY type"):
+            if kind == 'income':
+                totals.income = cents
+            elif kind == 'expense':
+                totals.expenses = cents
+        for buckets, key in ((totals.by_category, "category"), (totals.by_month, "substr(date, 1, 7)")):
+            query = f"SELECT {key}, {self.SIGNED_CENTS} FROM transactions GROUP BY {key}"
+            for name, cents in self.connection.execute(query):
+                if cents:
+                    buckets[name] = cents
+        return totals
+
+    def range_total(self, start, end):
+        """Returns the net amount of transactions dated in [start, end), using the date index."""
+        cents, = self.connection.execute(
+                f"SELECT COALESCE({self.SIGNED_CENTS}, 0) FROM transactions WHERE date >= ? AND date < ?",
+                (start, end)).fetchone()
+        return cents / 100
+
+    def between(self, start, end):
+        """Returns the transactions dated in [start, end), in date order, using the date index."""
+        cursor = self.connection.execute(
+                f"SELECT {self.COLUMNS} FROM transactions WHERE date >= ? AND date < ? ORDER BY date, id",
+                (start, end))
+        return [self._transaction(row) for row in cursor]
+
+    def refresh(self):
+        """Re-counts the rows, after other connections may have added or removed some."""
+        self._size, = self.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        """Closes the connection; anything not committed is rolled back."""
+        self.connection.close()
+
+def iter_database(file_path, start=0, stop=None):
+    """Yields transactions start..stop of an SQLite budget file, closing it afterwards."""
+    store = SqliteTransactions(file_path)
+    try:
+        yield from store.page(start, stop)
+    finally:
+        store.close()
+
+class Budget:
+    """
+    Manages all transactions and handles data persistence. Thic class encapsulates all the logic for adding, retrieving and saving transactions
+
+    Saving follows an autosave policy: the file is rewritten once
+    `autosave_every` mutations are pending (1 by default, i.e. after every
+    call) or once `autosave_interval` seconds have passed since the last save.
+    With both set to None nothing is saved until flush() is called. Mutations
+    made inside `with budget.batch():` (or through add_many) are always saved
+    once, when the outermost batch ends.
+
+    Every save writes a temporary file, fsyncs it and renames it over the
+    data file, so a crash never leaves a truncated file behind. With
+    background=True saves run on a BackgroundWriter thread instead of
+    blocking the caller; call flush() to wait for them and close() when done.
+
+    Files ending in .db or .sqlite are SQLite databases: transactions stay on
+    disk in a SqliteTransactions store, totals are computed in SQL and a save
+    is a commit (so `background` and `columnar` are ignored for them).
+
+    With shared=True several processes can use the same budget file. Every
+    mutation (or whole batch) runs under an fcntl lock on a '.lock' file: the
+    budget first merges in what other processes saved, if the file's stamp
+    changed, by keeping the unchanged leading transactions and only adjusting
+    the ones after them, and it saves before releasing the lock. Saves are
+    therefore synchronous and `background` is ignored.
+
+    With metrics=True (or the APP_METRICS environment variable set) the
+    methods in INSTRUMENTED are timed into a Metrics object; see stats() and
+    export_stats().
+
+    import_statement() bulk-loads a bank's CSV or OFX export: it is parsed on
+    a process pool, rows already in the budget are skipped and the rest are
+    saved once.
+    """
+    # Methods timed when metrics are on, and the kind of operation each one is
+    INSTRUMENTED = {
+            "_load_transactions": "load", "_write_file": "write", "save_transactions": "save", "flush": "save",
+            "add_transaction": "add", "add_many": "add", "import_statement": "add", "remove_transaction": "update",
+            "get_balance": "query", "get_summary": "query", "get_category_totals": "query",
+            "get_monthly_totals": "query", "get_range_total": "query", "get_transactions_between": "query",
+            "get_balance_as_of": "query", "get_day_range_totals": "query", "get_rolling_totals": "query",
+            "view_all_transactions": "render",
+            }
+
+    def __init__(self, file_path, columnar=False, autosave_every=1, autosave_interval=None,
+                 background=False, shared=False, metrics=None):
         self.file_path = file_path
-        self.transactions = []
-        self._load_transactions()
+        self.shared = shared
+        self.lock_path = file_path + LOCK_SUFFIX
+        self._lock_depth = 0
+        # Stamp of the file as last read or written by this process
+        self._file_stamp = None
+        self.autosave_every = autosave_every
+        self.autosave_interval = autosave_interval
+        self._unsaved = 0
+        self._batch_depth = 0
+        self._last_save = time.monotonic()
+        self.database = is_database(file_path)
+        self._writer = None
+        if background and not self.database and not shared:
+            self._writer = BackgroundWriter("budget-writer")
+        # The columnar and SQLite stores keep the same list-like interface, so the rest of the class doesn't change
+        self.columnar = columnar
+        self.transactions = self._new_store()
+        # Kept in step with self.transactions so balance and summaries are O(1)
+        self._totals = RunningTotals()
+        # Date-sorted timestamps and the transactions they belong to, for range queries on
+        # the list store; built on first use and kept in step after that
+        self._index_dates = None
+        self._index_items = None
+        # Per-day totals for balance-as-of, day-range and rolling-window queries; built on first use
+        self._days = None
+        # Transactions never change once created, so their text can be cached for as long as they
+        # exist; the other stores create new objects on every read, which would never hit the cache
+        self._rendered = RenderCache() if isinstance(self.transactions, list) else None
+        self.metrics = Metrics("budget") if metrics_enabled(metrics) else None
+        if self.metrics is not None:
+            self.metrics.instrument(self, self.INSTRUMENTED)
+        with file_lock(self.lock_path) if shared else contextlib.nullcontext():
+            self._load_transactions()
+
+    def _new_store(self):
+        """Creates the transaction store: SQLite for database files, NumPy columns if columnar, else a list."""
+        if self.database:
+            return SqliteTransactions(self.file_path)
+        return ColumnarTransactions() if self.columnar else []
 
     def _load_transactions(self):
-        """Loads transactions from the JSON file."""
+        """Loads transactions from the JSON file (or binary snapshot); databases only load their totals."""
+        if self.database:
+            self._totals = self.transactions.totals()
+            return
+        self._file_stamp = file_stamp(self.file_path)
         if not os.path.exists(self.file_path):
             print("Budget file not found. Starting with an empty budget.")
             return 
         try:
-            with open(self.file_path, 'r') as f:
-                data = json.load(f)
-                for d in data:
-                    if d['type'] == 'income':
-                        self.transaction.append(Income(d['amount'], d['category'], d['date']))
-                    elif d['type'] == 'expense':
-                        self.transaction.append(Expense(d['amount'], d['category'], d['date']))
-        except (IOError, JSONDecodeError) as e:
+            for transaction in stream_transactions(self.file_path):
+                self._append(transaction)
+        except (IOError, ValueError, KeyError, SnapshotError) as e:
             print(f"Error loading budget file: {e}. Starting with an empty budget.")
-            self.transactions = []
+            self.transactions = self._new_store()
+            self._totals = RunningTotals()
+            self._index_dates = self._index_items = None
+            self._days = None
+            if self._rendered is not None:
+                self._rendered.clear()
+
+    def refresh(self):
+        """Merges in changes other processes saved to the budget file (shared mode only)."""
+        with self._exclusive():
+            pass
+
+    def _catch_up(self):
+        """Brings the transactions and totals up to date with the file, if another process changed it."""
+        if self.database:
+            self.transactions.refresh()
+            self._totals = self.transactions.totals()
+            self._days = None
+            return
+        stamp = file_stamp(self.file_path)
+        if stamp == self._file_stamp:
+            return
+        kept = 0
+        newer = []
+        try:
+            for transaction in stream_transactions(self.file_path) if stamp else ():
+                # Keep the leading transactions that are unchanged; collect everything after them
+                if not newer and kept < len(self.transactions) and \
+                        self.transactions[kept].to_dict() == transaction.to_dict():
+                    kept += 1
+                else:
+                    newer.append(transaction)
+        except (IOError, ValueError, KeyError, SnapshotError) as e:
+            print(f"Error reloading budget file: {e}. Keeping the transactions already loaded.")
+            return
+        while len(self.transactions) > kept:
+            self._unindex(self.transactions.pop())
+        for transaction in newer:
+            self._append(transaction)
+        self._file_stamp = stamp
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        """
+        In shared mode, holds the inter-process lock around a mutation: catches up
+        with other processes first, then saves before releasing it.
+        """
+        if not self.shared or self._lock_depth:
+            yield
+            return
+        with file_lock(self.lock_path):
+            self._lock_depth += 1
+            try:
+                self._catch_up()
+                yield
+            finally:
+                self._lock_depth -= 1
+                self._save_pending()
+
+    def _append(self, transaction):
+        """Stores a transaction and counts it in the running totals, the day totals and the date index."""
+        self.transactions.append(transaction)
+        self._totals.add(transaction)
+        if self._days is not None:
+            self._days.add(transaction)
+        if self._index_dates is not None:
+            # Transactions usually arrive in date order, so this is almost always an append
+            i = bisect.bisect_right(self._index_dates, transaction.when)
+            self._index_dates.insert(i, transaction.when)
+            self._index_items.insert(i, transaction)
+
+    def _unindex(self, transaction):
+        """Takes a removed transaction out of the running totals, the day totals, the date index and the render cache."""
+        self._totals.remove(transaction)
+        if self._days is not None:
+            self._days.remove(transaction)
+        if self._rendered is not None:
+            self._rendered.forget(transaction)
+        if self._index_dates is not None:
+            i = bisect.bisect_left(self._index_dates, transaction.when)
+            while self._index_items[i] is not transaction:
+                i += 1
+            del self._index_dates[i]
+            del self._index_items[i]
 
     def save_transactions(self):
-        """Saves all transactions to the JSON file."""
-        data_to_save = [t.to_dict() for t in self.transactions]
-        with open(self.file_path, 'w') as f:
-            json.dump(data_to_save, f, indent=4)
-        print("Budget data saved successfully.")
+        """Saves all transactions to the JSON file (or binary snapshot), on the background writer if there is one."""
+        if self.database:
+            self.transactions.commit()
+        elif self._writer is None:
+            self._write_file(self.transactions)
+            self._file_stamp = file_stamp(self.file_path)
+            print("Budget data saved successfully.")
+        else:
+            # Transactions are never changed in place, so a shallow copy is a consistent snapshot
+            transactions = list(self.transactions)
+            self._writer.submit(lambda: self._write_file(transactions))
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def _write_file(self, transactions):
+        """Writes the transactions to the budget file (on the writer thread, if there is one)."""
+        write_transactions(self.file_path, transactions)
+        if self.metrics is not None:
+            self.metrics.add_bytes(os.path.getsize(self.file_path))
+
+    def _save_pending(self):
+        """Saves the budget if there are unsaved changes."""
+        if self._unsaved:
+            self.save_transactions()
+
+    def flush(self):
+        """Saves unsaved changes and waits until they are on disk."""
+        self._save_pending()
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """Saves unsaved changes and stops the background writer (or closes the database)."""
+        self._save_pending()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.database:
+            self.transactions.close()
+        export_path = os.environ.get(METRICS_FILE_ENV)
+        if self.metrics is not None and export_path:
+            self.metrics.export(export_path)
+
+    def stats(self):
+        """Returns the recorded metrics (empty unless metrics are on) plus the background writer's counters."""
+        stats = self.metrics.stats() if self.metrics is not None else {}
+        if self._writer is not None:
+            stats["writer"] = self._writer.stats()
+        return stats
+
+    def export_stats(self, file_path):
+        """Writes the metrics to file_path: JSON for .json files, Prometheus text otherwise."""
+        if self.metrics is None:
+            raise RuntimeError("metrics are not enabled for this budget")
+        self.metrics.export(file_path)
+
+    def _changed(self, count=1):
+        """Records unsaved mutations and saves if the autosave policy is due."""
+        self._unsaved += count
+        if self._batch_depth:
+            return
+        if self.autosave_every is not None and self._unsaved >= self.autosave_every:
+            self._save_pending()
+        elif self.autosave_interval is not None and time.monotonic() - self._last_save >= self.autosave_interval:
+            self._save_pending()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Groups mutations into one unit of work: nothing is saved while the
+        batch is open, and everything is saved once when the outermost batch ends.
+        """
+        with self._exclusive():
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._save_pending()
 
     def add_transaction(self, transaction):
-        """Adds a new transaction object and saves the budget."""
-        self.transactions.append(transaction)
-        self.save_transactions()
+        """Adds a new transaction object and saves the budget according to the autosave policy."""
+        with self._exclusive():
+            self._append(transaction)
+            self._changed()
         print("\nTransaction added.")
 
+    def add_many(self, transactions):
+        """Adds several transactions and saves the budget once."""
+        with self.batch():
+            count = 0
+            for transaction in transactions:
+                self._append(transaction)
+                count += 1
+            self._changed(count)
+        print(f"\n{count} transactions added.")
+
+    def import_statement(self, file_path, workers=None, date_format=None, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Imports the transactions of a bank statement (CSV, or OFX/QFX by extension).
+        CSV files need a header row with a date column and an amount column (or
+        debit and credit columns); an optional category, payee or description
+        column becomes the category. Positive amounts are income, negative ones
+        expenses. Dates are ISO unless date_format (for strptime) says otherwise.
+
+        The file is streamed in chunks that `workers` processes (default: one
+        per CPU) parse and validate. A row matching an existing transaction on
+        (date, amount, category) is skipped as a duplicate, once per existing
+        match, so importing the same statement twice adds nothing. Everything
+        else is added and saved once. Returns a summary dict, or None if the
+        file can't be read.
+        """
+        workers = (os.cpu_count() or 1) if workers is None else workers
+        start = last_report = time.perf_counter()
+        incoming = []
+        errors = []
+        rows = 0
+        classes = {1: Income, -1: Expense}
+        try:
+            jobs = iter_statement_chunks(file_path, date_format, chunk_size)
+            for records, chunk_errors in parallel_map(parse_statement_chunk, jobs, workers):
+                incoming.extend(classes[sign].from_timestamp(amount, category, when)
+                                for sign, when, amount, category in records)
+                errors.extend(chunk_errors)
+                rows += len(records) + len(chunk_errors)
+                now = time.perf_counter()
+                if now - last_report >= 1.0:
+                    print(f"  {rows:,} rows read ({rows / (now - start):,.0f} rows/s)")
+                    last_report = now
+        except (IOError, ValueError, UnicodeDecodeError) as e:
+            print(f"Error importing {file_path}: {e}")
+            return None
+
+        duplicates = 0
+        with self.batch():
+            # How many times each (date, amount, category) is already in the budget
+            existing = collections.Counter((t.when, t.sign * round(t.amount * 100), t.category)
+                                           for t in self.transactions)
+            added = 0
+            for transaction in incoming:
+                key = (transaction.when, transaction.sign * round(transaction.amount * 100), transaction.category)
+                if existing[key]:
+                    existing[key] -= 1
+                    duplicates += 1
+                else:
+                    self._append(transaction)
+                    added += 1
+            self._changed(added)
+        elapsed = time.perf_counter() - start
+        print(f"\nImported {added} transactions from {file_path}: {duplicates} duplicates skipped, "
+              f"{len(errors)} invalid rows ({rows:,} rows in {elapsed:.2f} s, {rows / elapsed:,.0f} rows/s).")
+        for message in errors[:10]:
+            print(f"  {message}")
+        if len(errors) > 10:
+            print(f"  ... and {len(errors) - 10} more")
+        return {"rows": rows, "added": added, "duplicates": duplicates, "errors": errors, "seconds": elapsed}
+
+    def remove_transaction(self, index):
+        """Removes the transaction at the given position and returns it."""
+        with self._exclusive():
+            transaction = self.transactions.pop(index)
+            self._unindex(transaction)
+            self._changed()
+        print("\nTransaction removed.")
+        return transaction
+
     def get_balance(self):
-        """Calculates and returns the current balance"""
-        balance = 0.0
-        # This loop is another example of polymorphism. We check the object's type to determine whether to add or subtract its amount
+        """Returns the current balance from the running totals"""
+        return self._totals.balance / 100
+
+    def get_summary(self):
+        """Returns total income, total expenses and the balance"""
+        return {
+                "income": self._totals.income / 100,
+                "expenses": self._totals.expenses / 100,
+                "balance": self._totals.balance / 100
+                }
+
+    def get_category_totals(self):
+        """Returns the net amount (income positive, expenses negative) per category"""
+        return {category: cents / 100 for category, cents in self._totals.by_category.items()}
+
+    def get_monthly_totals(self):
+        """Returns the net amount per month, keyed by 'YYYY-MM'"""
+        return {month: cents / 100 for month, cents in self._totals.by_month.items()}
+
+    def _recompute_totals(self):
+        """Rebuilds the totals from scratch by walking every transaction (or aggregating the store)"""
+        if not isinstance(self.transactions, list):
+            return self.transactions.totals()
+        totals = RunningTotals()
         for t in self.transactions:
-            if isinstance(t, Income):
-                balance += t.amount
-            elif isinstance(t, Expense):
-                balance -= t.amount
-        return balance
-
-    def view_all_transactions(self):
-        """Prints a list of all transactions"""
+            totals.add(t)
+        return totals
+
+    def verify(self):
+        """
+        Recomputes the totals from scratch and compares them with the running ones.
+        Returns True if they agree; otherwise reports the drift and repairs it.
+        """
+        expected = self._recompute_totals()
+        if expected == self._totals:
+            return True
+        print(f"Running totals drifted: balance ${self._totals.balance / 100:.2f}, "
+              f"expected ${expected.balance / 100:.2f}. Rebuilding totals.")
+        self._totals = expected
+        return False
+
+    def get_transactions_between(self, start, end):
+        """
+        Returns the transactions dated from start (inclusive) to end (exclusive) in date order,
+        e.g. [t for t in budget.get_transactions_between("2025-03-01", "2025-04-01") if t.sign < 0]
+        for one month's expenses. Dates may be 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'.
+        The list store bisects a date index instead of scanning every transaction.
+        """
+        start, end = parse_timestamp(start), parse_timestamp(end)
+        if not isinstance(self.transactions, list):
+            return self.transactions.between(format_timestamp(start), format_timestamp(end))
+        if self._index_dates is None:
+            self._index_items = sorted(self.transactions, key=lambda t: t.when)
+            self._index_dates = [t.when for t in self._index_items]
+        lo = bisect.bisect_left(self._index_dates, start)
+        return self._index_items[lo:bisect.bisect_left(self._index_dates, end, lo)]
+
+    def _day_totals(self):
+        """Returns the DayTotals, building them from every transaction on first use."""
+        if self._days is None:
+            self._days = DayTotals.from_transactions(self.transactions)
+        return self._days
+
+    def get_balance_as_of(self, date):
+        """Returns the balance at the end of the given day ('YYYY-MM-DD'), in O(log D) from the day totals."""
+        day = parse_timestamp(date) // SECONDS_PER_DAY
+        days = self._day_totals()
+        income, expenses = days.between(days.first, day + 1)
+        return (income - expenses) / 100
+
+    def get_day_range_totals(self, start, end):
+        """
+        Returns income, expenses and net of the days from start (inclusive) to end
+        (exclusive), e.g. get_day_range_totals("2025-03-01", "2025-04-01") for March.
+        Times of day are ignored. O(log D) from the day totals.
+        """
+        income, expenses = self._day_totals().between(parse_timestamp(start) // SECONDS_PER_DAY,
+                                                      parse_timestamp(end) // SECONDS_PER_DAY)
+        return {"income": income / 100, "expenses": expenses / 100, "net": (income - expenses) / 100}
+
+    def get_rolling_totals(self, window, start, end, kind="expenses"):
+        """
+        Returns [(day, total)] for every day from start (inclusive) to end (exclusive),
+        where total is the income, expenses or net (kind) of the `window` days ending
+        with that day, e.g. get_rolling_totals(30, "2025-01-01", "2026-01-01") for
+        30-day spending through a year. Each day is one O(log D) range query.
+        """
+        if kind not in ("income", "expenses", "net"):
+            raise ValueError(f"kind must be 'income', 'expenses' or 'net', not '{kind}'")
+        days = self._day_totals()
+        series = []
+        for day in range(parse_timestamp(start) // SECONDS_PER_DAY, parse_timestamp(end) // SECONDS_PER_DAY):
+            income, expenses = days.between(day - window + 1, day + 1)
+            cents = {"income": income, "expenses": expenses, "net": income - expenses}[kind]
+            series.append((day_text(day), cents / 100))
+        return series
+
+    def get_range_total(self, start, end):
+        """
+        Returns the net amount of transactions dated from start (inclusive) to end (exclusive).
+        Ranges of whole days are answered from the day totals.
+        """
+        start_time, end_time = parse_timestamp(start), parse_timestamp(end)
+        if not (start_time % SECONDS_PER_DAY or end_time % SECONDS_PER_DAY) and isinstance(self.transactions, list):
+            income, expenses = self._day_totals().between(start_time // SECONDS_PER_DAY, end_time // SECONDS_PER_DAY)
+            return (income - expenses) / 100
+        if not isinstance(self.transactions, list):
+            start, end = format_timestamp(parse_timestamp(start)), format_timestamp(parse_timestamp(end))
+            return self.transactions.range_total(start, end)
+        # Summed in cents, like the day totals, so the two paths agree to the cent
+        return sum(t.sign * round(t.amount * 100) for t in self.get_transactions_between(start, end)) / 100
+
+    def view_all_transactions(self, offset=0, limit=None, out=None):
+        """
+        Prints the transactions (or the page of `limit` of them starting at
+        `offset`) and the balance to out, sys.stdout by default, in a few large
+        writes. Returns the number of transactions shown.
+        """
+        if self.shared:
+            self.refresh()
         if not self.transactions:
-            print("\nNo transactions found")
+            print("\nNo transactions found", file=out)
+            return 0
+        total = len(self.transactions)
+        start = min(offset, total)
+        stop = total if limit is None else min(start + limit, total)
+        if isinstance(self.transactions, list):
+            page = self.transactions[start:stop]
         else:
-            print("\n -- All Transactions ---")
-            for t in self.transactions:
-                print(t)
-            print("-------------------")
-            print(f"Current Balance: ${self.get_balance():.2f}")
+            page = self.transactions.page(start, stop)
+        render = str if self._rendered is None else self._rendered.renderer(stop - start)
+        header = "\n -- All Transactions ---\n"
+        if stop - start < total:
+            header += f"(showing {start + 1}-{stop} of {total})\n" if stop > start else f"(none after {total})\n"
+        footer = f"-------------------\nCurrent Balance: ${self.get_balance():.2f}\n"
+        write_buffered(itertools.chain([header], (render(t) + "\n" for t in page), [footer]), out)
+        return stop - start
 
-def main():
+def main(file_path=BUDGET_FILE):
     """The main function to run the command-line interface"""
-    budget = Budget(BUDGET_FILE)
+    budget = Budget(file_path, shared=True)
     print("Welcome to your Personal Budget Tracker")
     while True:
         print("\nWhat would you like to do?")
         print("1. Add a new income")
         print("2. Add a new expense")
         print("3. View all transactions and balance")
-        print("4: Exit")
-        choice = input("Enter your choice (1-4): ")
+        print("4. Import a bank statement (CSV or OFX)")
+        print("5: Exit")
+        choice = input("Enter your choice (1-5): ")
         if choice == '1':
             try:
                 amount = float(input("Enter income amount: "))
@@ -132,11 +1319,187 @@ def main():
         elif choice == '3':
             budget.view_all_transactions()
         elif choice == '4':
+            budget.import_statement(input("Enter the path of the statement file: ").strip())
+        elif choice == '5':
+            try:
+                budget.close()
+            except OSError as e:
+                print(f"Error saving the budget: {e}")
             print("Exiting. Goodbye!")
             break
         else:
-            print("Invalid choice, Plese enter a number form 1 to 4")
+            print("Invalid choice, Plese enter a number form 1 to 5")
+
+
+def money(text):
+    """argparse type for amounts: a number above 0, written as banks do (see parse_amount)."""
+    try:
+        amount = parse_amount(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"needs an amount such as 12.50, got '{text}'")
+    if amount <= 0:
+        raise argparse.ArgumentTypeError(f"needs an amount above 0, got '{text}'")
+    return amount
+
+def date_text(text):
+    """argparse type for dates: checks the text parses and returns it unchanged."""
+    try:
+        parse_timestamp(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"needs a date as YYYY-MM-DD, got '{text}'")
+    return text
+
+def print_amounts(totals, empty):
+    """Prints 'name: $amount' lines sorted by name in a few large writes, or `empty` if there are none."""
+    if not totals:
+        print(empty)
+        return
+    write_buffered(f"  {name}: ${amount:.2f}\n" for name, amount in sorted(totals.items()))
+
+def command_income(budget, args):
+    budget.add_transaction(Income(args.amount, args.category, args.date))
+
+def command_expense(budget, args):
+    budget.add_transaction(Expense(args.amount, args.category, args.date))
+
+def command_remove(budget, args):
+    # Positions are 1-based as in the listing; negative ones count from the end
+    total = len(budget.transactions)
+    if not (1 <= args.position <= total or -total <= args.position <= -1):
+        raise ValueError(f"no transaction at position {args.position} (there are {total})")
+    print(budget.remove_transaction(args.position - 1 if args.position > 0 else args.position))
+
+def command_balance(budget, args):
+    print(f"Current Balance: ${budget.get_balance():.2f}")
+
+def command_summary(budget, args):
+    summary = budget.get_summary()
+    print(f"Income: ${summary['income']:.2f} | Expenses: ${summary['expenses']:.2f} | "
+          f"Balance: ${summary['balance']:.2f}")
 
+def command_categories(budget, args):
+    print_amounts(budget.get_category_totals(), "No transactions found")
+
+def command_monthly(budget, args):
+    print_amounts(budget.get_monthly_totals(), "No transactions found")
+
+def command_list(budget, args):
+    budget.view_all_transactions(args.offset, args.limit)
+
+def command_range(budget, args):
+    print(f"Net from {args.start} to {args.end}: ${budget.get_range_total(args.start, args.end):.2f}")
+
+def command_as_of(budget, args):
+    print(f"Balance at the end of {args.date}: ${budget.get_balance_as_of(args.date):.2f}")
+
+def command_between(budget, args):
+    transactions = budget.get_transactions_between(args.start, args.end)
+    if not transactions:
+        print("No transactions then.")
+        return
+    write_buffered(f"{t}\n" for t in transactions)
+
+def command_rolling(budget, args):
+    series = budget.get_rolling_totals(args.window, args.start, args.end, args.kind)
+    write_buffered(f"{day}: ${amount:.2f}\n" for day, amount in series)
+
+def command_import(budget, args):
+    return 0 if budget.import_statement(args.statement, args.workers, args.date_format) is not None else 1
+
+def command_convert(args):
+    convert_transactions(args.source, args.target)
+
+def build_parser():
+    """Builds the argparse parser for the command line; every command sets `handler` or `standalone`."""
+    parser = argparse.ArgumentParser(prog="personal_tracker.py", description="Tracks income and expenses. "
+                                     "Run without a command for the interactive menu.")
+    parser.add_argument("-f", "--file", default=BUDGET_FILE,
+                        help=f"budget file: JSON, .snap or .db/.sqlite (default {BUDGET_FILE})")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    for name, handler in (("income", command_income), ("expense", command_expense)):
+        add = commands.add_parser(name, help=f"add an {name}")
+        add.add_argument("amount", type=money)
+        add.add_argument("category")
+        add.add_argument("--date", type=date_text, help="YYYY-MM-DD [HH:MM:SS] (default now)")
+        add.set_defaults(handler=handler)
+
+    remove = commands.add_parser("remove", help="remove a transaction")
+    remove.add_argument("position", type=int, help="1 for the first transaction listed, -1 for the last")
+    remove.set_defaults(handler=command_remove)
+
+    commands.add_parser("balance", help="show the balance").set_defaults(handler=command_balance)
+    commands.add_parser("summary", help="show total income, expenses and balance").set_defaults(
+            handler=command_summary)
+    commands.add_parser("categories", help="show the net amount per category").set_defaults(
+            handler=command_categories)
+    commands.add_parser("monthly", help="show the net amount per month").set_defaults(handler=command_monthly)
+
+    listing = commands.add_parser("list", help="list the transactions and the balance")
+    listing.add_argument("--offset", type=count, default=0)
+    listing.add_argument("--limit", type=count)
+    listing.set_defaults(handler=command_list)
+
+    for name, handler, text in (("range", command_range, "show the net amount"),
+                                ("between", command_between, "list the transactions")):
+        span = commands.add_parser(name, help=f"{text} dated from START up to END")
+        span.add_argument("start", type=date_text, help="YYYY-MM-DD [HH:MM:SS]")
+        span.add_argument("end", type=date_text, help="YYYY-MM-DD [HH:MM:SS] (not included)")
+        span.set_defaults(handler=handler)
+
+    as_of = commands.add_parser("as-of", help="show the balance at the end of a day")
+    as_of.add_argument("date", type=date_text, help="YYYY-MM-DD")
+    as_of.set_defaults(handler=command_as_of)
+
+    rolling = commands.add_parser("rolling", help="show the total of the WINDOW days up to each day "
+                                  "from START up to END")
+    rolling.add_argument("window", type=count)
+    rolling.add_argument("start", type=date_text, help="YYYY-MM-DD")
+    rolling.add_argument("end", type=date_text, help="YYYY-MM-DD (not included)")
+    rolling.add_argument("--kind", choices=("income", "expenses", "net"), default="expenses")
+    rolling.set_defaults(handler=command_rolling)
+
+    statement = commands.add_parser("import", help="import a bank statement (CSV, or OFX/QFX)")
+    statement.add_argument("statement")
+    statement.add_argument("--workers", type=count, help="parsing processes (default one per CPU)")
+    statement.add_argument("--date-format", help="strptime format of the dates, if not ISO")
+    statement.set_defaults(handler=command_import)
+
+    batch = commands.add_parser("batch", help="run commands from a file or stdin, one per line, "
+                                "with a single load and a single write")
+    batch.add_argument("script", nargs="?", default="-", help="command file, or - for stdin (the default)")
+    batch.set_defaults(handler=command_batch, parser=parser)
+
+    convert = commands.add_parser("convert", help="copy a budget file into another format")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.set_defaults(standalone=command_convert)
+    return parser
+
+def cli(argv=None):
+    """Runs the command line and returns the exit status; without a command it starts the interactive menu."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        main(args.file)
+        return 0
+    try:
+        if getattr(args, "standalone", None) is not None:
+            return args.standalone(args) or 0
+        # One load, and one write when the outermost batch ends; shared, since scripts may overlap
+        budget = Budget(args.file, autosave_every=None, shared=True)
+        try:
+            with budget.batch():
+                return run_command(budget, args)
+        finally:
+            budget.close()
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; keep the exit quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -1,28 +1,202 @@
+"""
+A recipe manager: recipes with ingredients and steps, searchable by name and
+ingredient, kept in a JSON file (recipe.json by default), a binary snapshot
+(.snap) or an SQLite database (.db or .sqlite).
+
+Run it without a command for the interactive menu, or give one command for
+scripts and cron jobs (--help lists them, COMMAND --help shows the options):
+
+    python recipe.py -f recipes.db add Pancakes -i flour:200:g -i eggs:2 -s Mix -s Fry
+    python recipe.py -f recipes.db pantry flour eggs milk --missing 1
+    python recipe.py -f recipes.db shopping Pancakes Pancakes Omelette
+
+`batch` runs commands from a file (or stdin), one per line in the same syntax
+without the program name, with a single load and a single write:
+
+    python recipe.py -f recipes.db batch commands.txt
+
+Startup: sqlite3 is only imported for databases and a snapshot is opened
+lazily. The cold-start targets for 100k recipes, and how to check them, are
+in README.md.
+"""
+import argparse
+import bisect
+import collections
+import contextlib
+import functools
+import itertools
 import json
+import math
 import os
+import re
+import struct
+import sys
+import threading
+import time
+
+# The helpers the three apps share (storage formats, metrics, rendering, the batch runner)
+# live in appcommon.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from appcommon import (BackgroundWriter, METRICS_FILE_ENV, Metrics, RenderCache, Snapshot, SnapshotError,
+                       atomic_open, command_batch, count, is_database, is_snapshot, iter_json_array,
+                       iter_snapshot, metrics_enabled, run_command, write_buffered, write_snapshot)
+
+RECIPES_FILE = 'recipe.json'
+# Minimum share of trigrams a name must have in common with the query to count as a fuzzy match
+FUZZY_THRESHOLD = 0.3
+# First bytes of a recipe snapshot (.snap) file
+SNAPSHOT_MAGIC = b'RECIPES1'
+# Full recipes kept in memory by a lazily loaded recipe book (see LazyRecipes)
+LAZY_CACHE_SIZE = 256
+# Unit spelling -> (base unit, how many base units one of it is). Masses add up in grams,
+# volumes in millilitres and counted items in pieces; other units are only added to themselves.
+UNITS = {
+        "mg": ("g", 0.001), "g": ("g", 1.0), "gram": ("g", 1.0), "kg": ("g", 1000.0),
+        "kilogram": ("g", 1000.0), "oz": ("g", 28.349523125), "ounce": ("g", 28.349523125),
+        "lb": ("g", 453.59237), "lbs": ("g", 453.59237), "pound": ("g", 453.59237),
+        "ml": ("ml", 1.0), "millilitre": ("ml", 1.0), "milliliter": ("ml", 1.0),
+        "cl": ("ml", 10.0), "dl": ("ml", 100.0), "l": ("ml", 1000.0), "litre": ("ml", 1000.0),
+        "liter": ("ml", 1000.0), "tsp": ("ml", 5.0), "teaspoon": ("ml", 5.0),
+        "tbsp": ("ml", 15.0), "tablespoon": ("ml", 15.0), "cup": ("ml", 240.0),
+        "fl oz": ("ml", 29.5735295625), "pint": ("ml", 473.176473), "quart": ("ml", 946.352946),
+        "gallon": ("ml", 3785.411784),
+        "": ("pcs", 1.0), "pcs": ("pcs", 1.0), "pc": ("pcs", 1.0), "piece": ("pcs", 1.0),
+        "whole": ("pcs", 1.0), "each": ("pcs", 1.0),
+        }
+# Shopping-list totals of at least this many grams or millilitres are shown in kg or l
+DISPLAY_UNITS = {"g": ("kg", 1000.0), "ml": ("l", 1000.0)}
+# Ingredient columns kept as bitsets by an IngredientMatrix (each is up to one bit per recipe)
+BITSET_CACHE_SIZE = 1024
+# Answers to similarity and pantry queries remembered until the next recipe is added
+QUERY_CACHE_SIZE = 1024
+# Single-character fractions people paste into quantities
+VULGAR_FRACTIONS = {"\u00bc": 0.25, "\u00bd": 0.5, "\u00be": 0.75, "\u2153": 1 / 3, "\u2154": 2 / 3,
+                    "\u215b": 0.125, "\u215c": 0.375, "\u215d": 0.625, "\u215e": 0.875}
+
+def normalize(text):
+    """Lower-cases text and collapses runs of whitespace, so lookups ignore case and spacing."""
+    return " ".join(text.lower().split())
+
+def trigrams(text):
+    """Returns the set of 3-character substrings of a padded, normalized string."""
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+@functools.lru_cache(maxsize=None)
+def unit_base(unit):
+    """
+    Returns (base unit, factor) for a unit as typed, so that amount * factor is in
+    the base unit. Unknown units are their own base, with plurals folded ("cloves"
+    and "clove" add up). Cached because the same few units repeat everywhere.
+    """
+    key = normalize(unit).rstrip(".")
+    if key in UNITS:
+        return UNITS[key]
+    if key.endswith("es") and key[:-2] in UNITS:
+        return UNITS[key[:-2]]
+    if key.endswith("s"):
+        key = key[:-1]
+        if key in UNITS:
+            return UNITS[key]
+    return (key, 1.0)
+
+def _parse_number(text):
+    """Parses '2', '1.5', '1,5', '1/2' or a vulgar fraction such as '\u00bd'; raises ValueError otherwise."""
+    if text in VULGAR_FRACTIONS:
+        return VULGAR_FRACTIONS[text]
+    if text[-1] in VULGAR_FRACTIONS:
+        return float(text[:-1]) + VULGAR_FRACTIONS[text[-1]]
+    numerator, slash, denominator = text.partition("/")
+    if slash:
+        return float(numerator) / float(denominator)
+    return float(text.replace(",", "."))
 
-RECIPE_FILES = 'recipe.json'
+@functools.lru_cache(maxsize=1 << 16)
+def parse_quantity(text):
+    """
+    Parses a quantity as typed into a number: '2', '0.5', '1/2', '1 1/2', '1\u00bd'
+    or a range such as '2-3' (the upper end, so a shopping list buys enough).
+    Returns None for quantities that aren't numbers, like 'to taste'.
+    Raises ValueError for a signed number ('-1', '+2') or one that isn't finite ('inf').
+    Cached because recipes reuse the same handful of quantities.
+    """
+    text = str(text).strip().replace("\u2013", "-")
+    words = text.split("-")
+    # A plus sign, or a range with an empty end ('-1', '2--3'), makes a signed number
+    if "+" in text or (len(words) > 1 and not all(word.strip() for word in words)):
+        raise ValueError(f"quantity cannot be signed, got '{text}'")
+    if len(words) > 2:
+        return None
+    try:
+        values = []
+        for word in words:
+            parts = word.split()
+            if not parts or len(parts) > 2:
+                return None
+            values.append(sum(_parse_number(part) for part in parts))
+    except (ValueError, ZeroDivisionError):
+        return None
+    value = values[-1]
+    if not all(map(math.isfinite, values)):
+        raise ValueError(f"quantity must be a finite number, got '{text}'")
+    return value
+
+def format_quantity(value):
+    """Formats a computed quantity without float noise: 2.0 -> '2', 0.3333 -> '0.33'."""
+    return f"{round(value, 2):g}"
 
 class Ingredient:
     """
     Represents a single ingredient for a recipe.
     This class encapsulates the data for an ingredient (name, quantity, unit)
     and provides methods for serialization.
+    Names and units repeat across recipes, so they are interned and shared.
     """
+    __slots__ = ("name", "quantity", "unit")
+    RECORD = struct.Struct("<III") # name, quantity and unit as string pool indexes
+
     def __init__(self, name, quantity, unit):
-        self.name = name
+        self.name = sys.intern(name)
         self.quantity = quantity
-        self.unit = unit
+        self.unit = sys.intern(unit)
 
     def to_dict(self):
         """
         Returns the ingredient object to a dictionary for JSON serialization"""
         return {
                 "name": self.name,
-                "quantity": self.quantity
+                "quantity": self.quantity,
                 "unit": self.unit
                 }
 
+    def to_record(self, pool):
+        """Packs the ingredient into a fixed-width binary record, storing its strings in the pool."""
+        return self.RECORD.pack(pool.add(self.name), pool.add(str(self.quantity)), pool.add(self.unit))
+
+    @staticmethod
+    def from_record(snapshot, offset):
+        """Creates an Ingredient from the binary record at offset in a snapshot"""
+        fields = Ingredient.RECORD.unpack_from(snapshot.buffer, offset)
+        return Ingredient(*map(snapshot.string, fields))
+
+    @property
+    def amount(self):
+        """The quantity as a number in the ingredient's own unit, or None if it isn't one."""
+        return parse_quantity(self.quantity)
+
+    def base_amount(self):
+        """Returns (amount, base unit) with the amount converted into the base unit (None if unknown)."""
+        base, factor = unit_base(self.unit)
+        amount = parse_quantity(self.quantity)
+        return (None if amount is None else amount * factor), base
+
+    def scale(self, factor):
+        """Returns a copy with the quantity multiplied by factor; unparseable quantities are kept as they are."""
+        amount = parse_quantity(self.quantity)
+        if amount is None:
+            return Ingredient(self.name, self.quantity, self.unit)
+        return Ingredient(self.name, format_quantity(amount * factor), self.unit)
+
     def __str__(self):
         """Provides a user-friendly string representation of the ingredient."""
         return f"{self.quantity} {self.unit} of {self.name}"
@@ -33,6 +207,9 @@ class Recipe:
     This class is an excellent example of composition, as it "has-a" list of
     ingredient objects. It encapsulates all data and logic related to a recipe.
     """
+    __slots__ = ("name", "steps", "ingredients")
+    HEADER = struct.Struct("<III") # name index, number of steps, number of ingredients
+
     def __init__(self, name, steps, ingredients = None):
         self.name = name
         self.steps = steps
@@ -45,129 +222,1161 @@ class Recipe:
                 "name": self.name,
                 "steps": self.steps,
                 "ingredients": [ingredient.to_dict() for ingredient in self.ingredients]
+                }
 
     @staticmethod
     def from_dict(data):
-    """Creates a Recipe object from a dictionary (for JSON deserialization)"""
-    ingredients = [ingredient(**d) for d in data['ingredients']]
-    return Recipe(data['name'], data['steps'], ingredients)
+        """Creates a Recipe object from a dictionary (for JSON deserialization)"""
+        ingredients = [Ingredient(**d) for d in data['ingredients']]
+        return Recipe(data['name'], data['steps'], ingredients)
+
+    def to_record(self, pool):
+        """Packs the recipe into a fixed-width header followed by its step and ingredient records."""
+        steps = [pool.add(step) for step in self.steps]
+        parts = [self.HEADER.pack(pool.add(self.name), len(steps), len(self.ingredients)),
+                 struct.pack(f"<{len(steps)}I", *steps)]
+        parts.extend(ingredient.to_record(pool) for ingredient in self.ingredients)
+        return b"".join(parts)
+
+    @staticmethod
+    def from_record(snapshot, offset):
+        """Creates a Recipe from the binary record at offset in a snapshot"""
+        name, step_count, ingredient_count = Recipe.HEADER.unpack_from(snapshot.buffer, offset)
+        offset += Recipe.HEADER.size
+        steps = [snapshot.string(i) for i in struct.unpack_from(f"<{step_count}I", snapshot.buffer, offset)]
+        offset += 4 * step_count
+        ingredients = [Ingredient.from_record(snapshot, offset + i * Ingredient.RECORD.size)
+                       for i in range(ingredient_count)]
+        return Recipe(snapshot.string(name), steps, ingredients)
+
+    def scale(self, factor):
+        """Returns a copy of the recipe with every ingredient quantity multiplied by factor."""
+        return Recipe(self.name, list(self.steps), [ingredient.scale(factor) for ingredient in self.ingredients])
+
+    @staticmethod
+    def header_from_record(snapshot, offset):
+        """
+        Reads only what a RecipeHeader needs from the record at offset: the name,
+        the ingredient count and the string pool indexes of the ingredient names.
+        """
+        name, step_count, ingredient_count = Recipe.HEADER.unpack_from(snapshot.buffer, offset)
+        first = offset + Recipe.HEADER.size + 4 * step_count
+        ingredient_names = [Ingredient.RECORD.unpack_from(snapshot.buffer, first + i * Ingredient.RECORD.size)[0]
+                            for i in range(ingredient_count)]
+        return RecipeHeader(snapshot.string(name), offset, ingredient_count), ingredient_names
 
     def __str__(self):
         """Provides a user-frientdly string representation of the recipe."""
         ingredients_list = "\n- ".join([str(ing) for ing in self.ingredients])
-        steps_list "\n".join([f"{i+1}. {step}" for i, step in enumerate(self.steps)])
+        steps_list = "\n".join([f"{i+1}. {step}" for i, step in enumerate(self.steps)])
         return (
             f"--- {self.name} ---\n\n"
             f"Ingredients:\n- {ingredients_list}\n\n"
             f"Instrutions:\n{steps_list}\n"
             )
 
+def build_shopping_list(plan):
+    """
+    Merges the ingredients of a meal plan into one shopping list. The plan is an
+    iterable of recipes, or of (recipe, factor) pairs to scale a recipe (e.g. 2
+    for double servings). Ingredients are summed in one pass through a dict
+    keyed by (normalized name, base unit), so "500 g" and "1 kg" of flour give
+    "1.5 kg of flour". Quantities that aren't numbers ("to taste") are listed
+    once each next to the total.
+    Returns Ingredient objects sorted by name.
+    """
+    totals = {}
+    names = {}
+    unmeasured = {}
+    for entry in plan:
+        recipe, factor = entry if isinstance(entry, tuple) else (entry, 1)
+        for ingredient in recipe.ingredients:
+            base, unit_factor = unit_base(ingredient.unit)
+            key = (normalize(ingredient.name), base)
+            if key not in names:
+                names[key] = ingredient.name
+            amount = parse_quantity(ingredient.quantity)
+            if amount is None:
+                unmeasured.setdefault(key, {})[str(ingredient.quantity).strip()] = ingredient.unit
+            else:
+                totals[key] = totals.get(key, 0.0) + amount * unit_factor * factor
+    shopping = []
+    for key, total in totals.items():
+        unit = key[1]
+        if unit in DISPLAY_UNITS and total >= DISPLAY_UNITS[unit][1]:
+            unit, scale = DISPLAY_UNITS[unit]
+            total /= scale
+        shopping.append(Ingredient(names[key], format_quantity(total), unit))
+    for key, quantities in unmeasured.items():
+        shopping.extend(Ingredient(names[key], quantity, unit) for quantity, unit in quantities.items())
+    shopping.sort(key=lambda ingredient: normalize(ingredient.name))
+    return shopping
+
+# Runs of bytes that have at least one bit set, and the bits set in each byte value
+NONZERO_BYTES = re.compile(rb"[^\x00]+")
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+def bitset(positions):
+    """Returns an int with the bits at the given positions set, built in one pass."""
+    positions = list(positions)
+    if not positions:
+        return 0
+    data = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+def iter_bits(bits):
+    """Yields the positions of the bits set in an int, lowest first, skipping zero bytes in C."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for run in NONZERO_BYTES.finditer(data):
+        for index in range(run.start(), run.end()):
+            for bit in BYTE_BITS[data[index]]:
+                yield index * 8 + bit
+
+class IngredientMatrix:
+    """
+    The recipes x ingredients matrix behind similar_recipes and recipes_from_pantry.
+    Each recipe is a sparse 0/1 vector over the vocabulary of normalized
+    ingredient names. The matrix is kept by column: `postings` maps every
+    ingredient to the positions of the recipes using it, and the columns that
+    queries touch are turned into bitsets (Python ints with one bit per recipe)
+    and kept in an LRU cache, so one & or ^ works on every recipe at once.
+    Recipes are also grouped into bitsets by how many distinct ingredients they have.
+
+    A query adds up its columns with a bit-sliced counter: bit plane i holds
+    bit i of "how many of the query's ingredients each recipe has". Comparing
+    those counts with the recipe sizes answers, for all recipes together, both
+    the cosine similarity of two 0/1 vectors (shared / sqrt(|a| * |b|)) and
+    the pantry subset test popcount(recipe & pantry) == popcount(recipe).
+    Answers are cached until add() records a new recipe.
+    """
+    def __init__(self, postings, count):
+        self._postings = postings
+        self.count = count
+        self._columns = collections.OrderedDict()
+        self._results = collections.OrderedDict()
+        sizes = collections.defaultdict(list)
+        for position, size in collections.Counter(itertools.chain.from_iterable(postings.values())).items():
+            sizes[size].append(position)
+        self._by_size = {size: bitset(positions) for size, positions in sizes.items()}
+        # Recipes without ingredients are in no column at all
+        empty = (1 << count) - 1
+        for bits in self._by_size.values():
+            empty ^= bits
+        if empty:
+            self._by_size[0] = empty
+
+    def add(self, position, keys):
+        """Records the recipe at position with the given normalized ingredient names."""
+        keys = set(keys)
+        bit = 1 << position
+        for key in keys:
+            self._postings.setdefault(key, set()).add(position)
+            if key in self._columns:
+                self._columns[key] |= bit
+        self._by_size[len(keys)] = self._by_size.get(len(keys), 0) | bit
+        self.count = max(self.count, position + 1)
+        self._results.clear()
+
+    def column(self, key):
+        """Returns the bitset of the recipes that use an ingredient."""
+        bits = self._columns.get(key)
+        if bits is not None:
+            self._columns.move_to_end(key)
+            return bits
+        bits = self._columns[key] = bitset(self._postings.get(key, ()))
+        if len(self._columns) > BITSET_CACHE_SIZE:
+            self._columns.popitem(last=False)
+        return bits
+
+    def _counts(self, keys):
+        """Returns the bit planes of how many of the ingredients each recipe has."""
+        planes = []
+        for key in keys:
+            carry = self.column(key)
+            # Ripple-carry addition of one bit to every recipe's counter at once
+            for i, plane in enumerate(planes):
+                planes[i] = plane ^ carry
+                carry &= plane
+                if not carry:
+                    break
+            else:
+                if carry:
+                    planes.append(carry)
+        return planes
+
+    @staticmethod
+    def _exactly(planes, value, bits):
+        """Returns the recipes among `bits` whose counter in `planes` equals value."""
+        if value >> len(planes):
+            return 0
+        for i, plane in enumerate(planes):
+            bits = bits & plane if value >> i & 1 else bits & ~plane
+            if not bits:
+                break
+        return bits
+
+    def _cached(self, key, compute):
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = compute()
+            if len(self._results) > QUERY_CACHE_SIZE:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return result
+
+    def similar(self, keys, limit=10, exclude=None):
+        """
+        Returns up to `limit` (position, cosine similarity) pairs of the recipes
+        closest to a recipe with the given ingredients, best first (ties by position),
+        leaving out the recipe at position `exclude`.
+        """
+        keys = frozenset(keys)
+        return self._cached(("similar", keys, limit, exclude), lambda: self._similar(keys, limit, exclude))
+
+    def _similar(self, keys, limit, exclude):
+        if not keys or not limit:
+            return []
+        planes = self._counts(key for key in keys if key in self._postings)
+        # Every (shared ingredients, recipe size) pair scores the same, so walk the pairs best first
+        groups = sorted(((shared / math.sqrt(len(keys) * size), shared, size)
+                         for size in self._by_size for shared in range(1, min(len(keys), size) + 1)),
+                        key=lambda group: (-group[0], -group[1], group[2]))
+        sharing = {}
+        result = []
+        for score, shared, size in groups:
+            if shared not in sharing:
+                sharing[shared] = self._exactly(planes, shared, (1 << self.count) - 1)
+            for position in iter_bits(sharing[shared] & self._by_size[size]):
+                if position != exclude:
+                    result.append((position, score))
+                    if len(result) == limit:
+                        return result
+        return result
+
+    def makeable(self, keys, missing=0):
+        """
+        Returns (position, missing count) for every recipe that has at most `missing`
+        ingredients outside `keys`, those missing fewer first, then by position.
+        """
+        keys = frozenset(keys)
+        return self._cached(("makeable", keys, missing), lambda: self._makeable(keys, missing))
+
+    def _makeable(self, keys, missing):
+        planes = self._counts(key for key in keys if key in self._postings)
+        result = []
+        for lacking in range(missing + 1):
+            bits = 0
+            for size, recipes in self._by_size.items():
+                if size >= lacking:
+                    bits |= self._exactly(planes, size - lacking, recipes)
+            result.extend((position, lacking) for position in iter_bits(bits))
+        return result
+
+class RecipeHeader:
+    """
+    What a lazily loaded recipe book keeps in memory for a recipe it hasn't needed yet:
+    the name, where the full record starts in the snapshot and how many ingredients it has.
+    """
+    __slots__ = ("name", "offset", "ingredient_count")
+
+    def __init__(self, name, offset, ingredient_count):
+        self.name = name
+        self.offset = offset
+        self.ingredient_count = ingredient_count
+
+def stream_recipes(file_path, start=0, limit=None):
+    """
+    Yields Recipe objects straight from a recipe file, reading only as far as needed.
+    'start' and 'limit' select a page, e.g. stream_recipes(path, 0, 50) for the first 50.
+    Snapshot files and SQLite databases jump straight to the first record of the page.
+    """
+    stop = None if limit is None else start + limit
+    if is_database(file_path):
+        return iter_database(file_path, start, stop)
+    if is_snapshot(file_path):
+        return iter_snapshot(file_path, Recipe.from_record, SNAPSHOT_MAGIC, start, stop)
+    return itertools.islice(map(Recipe.from_dict, iter_json_array(file_path)), start, stop)
+
+def write_recipes(file_path, recipes):
+    """Writes recipes as JSON, an SQLite database or a binary snapshot, depending on the extension."""
+    if is_database(file_path):
+        store = SqliteRecipes(file_path)
+        try:
+            store.clear()
+            for recipe in recipes:
+                store.append(recipe)
+            store.commit()
+        finally:
+            store.close()
+        return
+    if is_snapshot(file_path):
+        write_snapshot(file_path, recipes, SNAPSHOT_MAGIC)
+        return
+    data_to_save = [recipe.to_dict() for recipe in recipes]
+    with atomic_open(file_path) as f:
+        json.dump(data_to_save, f, indent=4)
+
+def convert_recipes(source, target):
+    """Copies a recipe file into another format, e.g. recipe.json -> recipe.snap or back."""
+    write_recipes(target, stream_recipes(source))
+
+class SqliteRecipes:
+    """
+    A list-like store that keeps recipes in an SQLite database instead of memory.
+    It is used for recipe files ending in .db or .sqlite. A recipe's position
+    in the list is its row id minus one (recipes are never deleted), rows are
+    only read when asked for, and name, token and ingredient lookups run as
+    SQL over indexed tables, so the recipe book can be larger than RAM. The
+    database runs in WAL mode; changes become durable when commit() is called.
+    """
+    SCHEMA = (
+            "CREATE TABLE IF NOT EXISTS recipes ("
+            "id INTEGER PRIMARY KEY, name TEXT NOT NULL, key TEXT NOT NULL, steps TEXT NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS ingredients ("
+            "recipe_id INTEGER NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, "
+            "key TEXT NOT NULL, quantity, unit TEXT NOT NULL)",
+            "CREATE TABLE IF NOT EXISTS tokens (token TEXT NOT NULL, recipe_id INTEGER NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS recipes_key ON recipes (key)",
+            "CREATE INDEX IF NOT EXISTS ingredients_recipe ON ingredients (recipe_id)",
+            "CREATE INDEX IF NOT EXISTS ingredients_key ON ingredients (key, recipe_id)",
+            "CREATE INDEX IF NOT EXISTS tokens_token ON tokens (token, recipe_id)",
+            )
+    # Recipe ids whose name has a token starting with a prefix
+    PREFIX_QUERY = "SELECT recipe_id FROM tokens WHERE token >= ? AND token < ?"
+
+    def __init__(self, file_path):
+        import sqlite3 # only databases need it, so it is imported on first use to keep startup fast
+        self.connection = sqlite3.connect(file_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self._size, = self.connection.execute("SELECT COUNT(*) FROM recipes").fetchone()
+
+    def append(self, recipe):
+        """Inserts a recipe with its ingredients and name tokens (visible to others after commit())."""
+        key = normalize(recipe.name)
+        recipe_id = self.connection.execute(
+                "INSERT INTO recipes (name, key, steps) VALUES (?, ?, ?)",
+                (recipe.name, key, json.dumps(recipe.steps))).lastrowid
+        self.connection.executemany(
+                "INSERT INTO ingredients (recipe_id, position, name, key, quantity, unit) VALUES (?, ?, ?, ?, ?, ?)",
+                [(recipe_id, i, ing.name, normalize(ing.name), ing.quantity, ing.unit)
+                 for i, ing in enumerate(recipe.ingredients)])
+        self.connection.executemany(
+                "INSERT INTO tokens (token, recipe_id) VALUES (?, ?)",
+                [(token, recipe_id) for token in set(key.split())])
+        self._size += 1
+
+    def clear(self):
+        for table in ("recipes", "ingredients", "tokens"):
+            self.connection.execute(f"DELETE FROM {table}")
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _recipe(self, recipe_id, name, steps):
+        rows = self.connection.execute(
+                "SELECT name, quantity, unit FROM ingredients WHERE recipe_id = ? ORDER BY position", (recipe_id,))
+        return Recipe(name, json.loads(steps), [Ingredient(*row) for row in rows])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("recipe index out of range")
+        row = self.connection.execute("SELECT id, name, steps FROM recipes WHERE id = ?", (i + 1,)).fetchone()
+        return self._recipe(*row)
+
+    def __iter__(self):
+        return self.page(0, None)
+
+    def page(self, start=0, stop=None):
+        """Yields the recipes at positions start..stop, reading rows lazily."""
+        limit = -1 if stop is None else max(stop - start, 0)
+        cursor = self.connection.execute(
+                "SELECT id, name, steps FROM recipes ORDER BY id LIMIT ? OFFSET ?", (limit, start))
+        for row in cursor:
+            yield self._recipe(*row)
+
+    def name(self, position):
+        """Returns only the name of the recipe at position."""
+        return self.connection.execute("SELECT name FROM recipes WHERE id = ?", (position + 1,)).fetchone()[0]
+
+    def names(self):
+        """Yields (position, name) for every recipe, without reading steps or ingredients."""
+        for recipe_id, name in self.connection.execute("SELECT id, name FROM recipes ORDER BY id"):
+            yield recipe_id - 1, name
+
+    def find_by_key(self, key):
+        """Returns the position of the first recipe with the given normalized name, or None."""
+        row = self.connection.execute("SELECT MIN(id) FROM recipes WHERE key = ?", (key,)).fetchone()
+        return None if row[0] is None else row[0] - 1
+
+    def search(self, prefixes):
+        """Returns the positions of recipes with a name token starting with every prefix."""
+        query = " INTERSECT ".join([self.PREFIX_QUERY] * len(prefixes)) + " ORDER BY recipe_id"
+        # Every token starting with the prefix sorts between the prefix and prefix + the highest code point
+        bounds = [bound for prefix in prefixes for bound in (prefix, prefix + "\U0010ffff")]
+        return [recipe_id - 1 for recipe_id, in self.connection.execute(query, bounds)]
+
+    def find_by_ingredients(self, keys):
+        """Returns the positions of recipes that contain every normalized ingredient name."""
+        keys = sorted(set(keys))
+        placeholders = ", ".join("?" * len(keys))
+        rows = self.connection.execute(
+                f"SELECT recipe_id FROM ingredients WHERE key IN ({placeholders}) "
+                "GROUP BY recipe_id HAVING COUNT(DISTINCT key) = ? ORDER BY recipe_id", (*keys, len(keys)))
+        return [recipe_id - 1 for recipe_id, in rows]
+
+    def ingredient_positions(self):
+        """Returns {normalized ingredient name: positions of the recipes using it}."""
+        postings = {}
+        for key, recipe_id in self.connection.execute("SELECT DISTINCT key, recipe_id FROM ingredients"):
+            postings.setdefault(key, set()).add(recipe_id - 1)
+        return postings
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        """Closes the connection; anything not committed is rolled back."""
+        self.connection.close()
+
+def iter_database(file_path, start=0, stop=None):
+    """Yields recipes start..stop of an SQLite recipe file, closing it afterwards."""
+    store = SqliteRecipes(file_path)
+    try:
+        yield from store.page(start, stop)
+    finally:
+        store.close()
+
+class LazyRecipes:
+    """
+    A list-like store for a recipe book loaded from a binary snapshot without
+    decoding it. Recipes read from the file are kept as RecipeHeader entries
+    and only turned into Recipe objects when accessed; the last `cache_size` of
+    those stay in an LRU cache. Recipes added later are kept in full.
+    Iterating decodes every recipe without filling the cache, so saving or
+    listing the whole book does not push out the recipes in use.
+    """
+    def __init__(self, snapshot, cache_size=LAZY_CACHE_SIZE):
+        self.snapshot = snapshot
+        self.cache_size = cache_size
+        self._entries = []
+        self._cache = collections.OrderedDict()
+        # Recipes can be read from a background writer thread while the caller uses the cache
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load_headers(self):
+        """Adds a header for every recipe in the snapshot, yielding (header, ingredient names)."""
+        names = {}
+        for i in range(len(self.snapshot)):
+            header, indexes = Recipe.header_from_record(self.snapshot, self.snapshot.offset(i))
+            self._entries.append(header)
+            ingredient_names = []
+            for index in indexes:
+                if index not in names:
+                    names[index] = self.snapshot.string(index)
+                ingredient_names.append(names[index])
+            yield header, ingredient_names
+
+    def append(self, recipe):
+        self._entries.append(recipe)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _decode(self, entry):
+        return Recipe.from_record(self.snapshot, entry.offset) if isinstance(entry, RecipeHeader) else entry
+
+    def __getitem__(self, i):
+        entry = self._entries[i]
+        if not isinstance(entry, RecipeHeader):
+            return entry
+        with self._lock:
+            recipe = self._cache.get(entry.offset)
+            if recipe is not None:
+                self._cache.move_to_end(entry.offset)
+                self.hits += 1
+                return recipe
+            self.misses += 1
+            recipe = self._cache[entry.offset] = self._decode(entry)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return recipe
+
+    def __iter__(self):
+        for entry in self._entries:
+            yield self._decode(entry)
+
+    def page(self, start=0, stop=None):
+        """Yields the recipes at positions start..stop, like iterating, without filling the cache."""
+        for entry in self._entries[start:stop]:
+            yield self._decode(entry)
+
+    def name(self, position):
+        """Returns only the name of the recipe at position."""
+        return self._entries[position].name
+
+    def copy(self):
+        """Returns a store with the same entries, to save from another thread while this one changes."""
+        copy = LazyRecipes(self.snapshot, 0)
+        copy._entries = list(self._entries)
+        return copy
+
+    def stats(self):
+        """Returns the cache counters."""
+        with self._lock:
+            return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self._cache.clear()
+        self.snapshot.close()
+
 class RecipeManager:
     """
     Manages the collection of recipes.
     This class handles the logic for solving, loading, adding and viewing recipes, separating the management logic form the data itself.
+
+    Lookups go through in-memory indexes that are built while loading and kept
+    up to date by add_recipe. Each index maps a key to the positions of the
+    matching recipes in the 'recipes' list:
+    - normalized name -> position, for O(1) exact lookup
+    - name token -> positions, plus a sorted token list for prefix search
+    - ingredient name -> positions, for "contains all of these" queries
+    - name trigram -> positions (only with fuzzy=True), for typo-tolerant search
+    The ingredient index also backs an IngredientMatrix, built on the first
+    similar_recipes or recipes_from_pantry call and updated by every add after.
+
+    Saving follows an autosave policy: the file is rewritten once
+    `autosave_every` recipes are unsaved (1 by default, i.e. after every add)
+    or once `autosave_interval` seconds have passed since the last save. With
+    both set to None nothing is saved until flush() is called. Recipes added
+    inside `with manager.batch():` (or through add_many) are always saved
+    once, when the outermost batch ends.
+
+    Every save writes a temporary file, fsyncs it and renames it over the
+    data file, so a crash never leaves a truncated file behind. With
+    background=True saves run on a BackgroundWriter thread instead of
+    blocking the caller; call flush() to wait for them and close() when done.
+
+    Files ending in .db or .sqlite are SQLite databases: recipes stay on disk
+    in a SqliteRecipes store, which keeps the name, token and ingredient
+    indexes as SQL indexes, and a save is a commit (so `background` is
+    ignored). Only the trigram index for fuzzy search is built in memory.
+
+    With lazy=True a binary snapshot (.snap) is not decoded when it is loaded:
+    'recipes' is a LazyRecipes store holding a small header per recipe, and a
+    recipe's steps and ingredients are read from the file the first time it is
+    needed, keeping the last `cache_size` of them. Other formats, and a snapshot
+    that does not exist yet, ignore lazy.
+
+    With metrics=True (or the APP_METRICS environment variable set) the
+    methods in INSTRUMENTED are timed into a Metrics object; see stats() and
+    export_stats().
     """
-    def __init__(self, file_path):
+    # Methods timed when metrics are on, and the kind of operation each one is
+    INSTRUMENTED = {
+            "_load_recipes": "load", "_write_file": "write", "save_recipes": "save", "flush": "save",
+            "add_recipe": "add", "add_many": "add",
+            "find_recipe": "query", "search_recipes": "query", "find_by_ingredients": "query",
+            "fuzzy_find": "query", "shopping_list": "query", "similar_recipes": "query",
+            "recipes_from_pantry": "query", "view_all_recipes": "render",
+            }
+
+    def __init__(self, file_path, fuzzy=False, autosave_every=1, autosave_interval=None,
+                 background=False, metrics=None, lazy=False, cache_size=LAZY_CACHE_SIZE):
         self.file_path = file_path
-        self.recipes =[]
+        self.autosave_every = autosave_every
+        self.autosave_interval = autosave_interval
+        self._unsaved = 0
+        self._batch_depth = 0
+        self._last_save = time.monotonic()
+        self.database = is_database(file_path)
+        # A snapshot that doesn't exist yet starts as a plain list, so lazy is only for one that does
+        self.lazy = lazy and is_snapshot(file_path) and os.path.exists(file_path)
+        self.cache_size = cache_size
+        self._writer = BackgroundWriter("recipe-writer") if background and not self.database else None
+        self.recipes = SqliteRecipes(file_path) if self.database else []
+        self.fuzzy = fuzzy
+        self._by_name = {}
+        self._by_token = {}
+        self._sorted_tokens = []
+        self._by_ingredient = {}
+        self._by_trigram = {}
+        # Ingredient vectors for similarity and pantry queries, built on first use
+        self._matrix = None
+        # Recipes are never changed in place, so their text can be cached for as long as they exist;
+        # the lazy and SQLite stores create new objects on every read, which would never hit the cache
+        self._rendered = RenderCache() if not self.database and not self.lazy else None
+        self.metrics = Metrics("recipes") if metrics_enabled(metrics) else None
+        if self.metrics is not None:
+            self.metrics.instrument(self, self.INSTRUMENTED)
         self._load_recipes()
 
     def _load_recipes(self):
-        """Loads recipes from the JSON file into the 'recipes' list."""
+        """Loads recipes from the JSON file (or binary snapshot) into the 'recipes' list."""
+        if self.database:
+            # Recipes stay in the database; only names are read, for the trigram index
+            if self.fuzzy:
+                for position, name in self.recipes.names():
+                    self._add_trigrams(position, name)
+            return
         if not os.path.exists(self.file_path):
             print("Recipe file not found, Starting with an empty recipe book.")
             return
 
         try:
-            with open(self.file_path, 'r') as f:
-                data = json.load(f)
-                self.recipes = [Recipe.from_dict(d) for d in data]
-        except (IOError, json.JSONDecodeError) as e:
+            if self.lazy:
+                self.recipes = LazyRecipes(Snapshot(self.file_path, Recipe.from_record, SNAPSHOT_MAGIC), self.cache_size)
+                for position, (header, ingredient_names) in enumerate(self.recipes.load_headers()):
+                    self._index(position, header.name, ingredient_names)
+            else:
+                for recipe in stream_recipes(self.file_path):
+                    self._append(recipe)
+        except (IOError, json.JSONDecodeError, SnapshotError, struct.error) as e:
             print(f"Error loading recipe file: {e}. Starting with an empty recipe book.")
+            if isinstance(self.recipes, LazyRecipes):
+                self.recipes.close()
+            self.lazy = False
             self.recipes = []
+            if self._rendered is not None:
+                self._rendered.clear()
+            self._by_name = {}
+            self._by_token = {}
+            self._sorted_tokens = []
+            self._by_ingredient = {}
+            self._by_trigram = {}
+            self._matrix = None
+
+    def _append(self, recipe):
+        """Adds a recipe to the list and to every index."""
+        position = len(self.recipes)
+        self.recipes.append(recipe)
+        self._index(position, recipe.name, [ingredient.name for ingredient in recipe.ingredients])
+
+    def _index(self, position, name, ingredient_names):
+        """Adds the recipe at position to every index."""
+        if self.fuzzy:
+            self._add_trigrams(position, name)
+        if self._matrix is not None:
+            self._matrix.add(position, [normalize(ingredient_name) for ingredient_name in ingredient_names])
+        if self.database:
+            # The database maintains its own name, token and ingredient indexes
+            return
+        name = normalize(name)
+        # Keep the first recipe with a given name, like the old linear scan did
+        self._by_name.setdefault(name, position)
+        for token in set(name.split()):
+            if token not in self._by_token:
+                self._by_token[token] = set()
+                bisect.insort(self._sorted_tokens, token)
+            self._by_token[token].add(position)
+        for ingredient_name in ingredient_names:
+            self._by_ingredient.setdefault(normalize(ingredient_name), set()).add(position)
+
+    def _add_trigrams(self, position, name):
+        """Adds a recipe name to the trigram index used by fuzzy_find."""
+        for gram in trigrams(name):
+            self._by_trigram.setdefault(gram, set()).add(position)
 
+    def _name_at(self, position):
+        """Returns the name of the recipe at position without loading the rest of it."""
+        return self.recipes.name(position) if self.database or self.lazy else self.recipes[position].name
 
     def save_recipes(self):
-        """Saves all recipes from the 'recipes' list to the JSON file."""
-        data_to_save = [recipe.to_dict() for recipe in self.recipes]
-        with open(self.file_path, 'w') as f:
-            json.dump(data_to_save, f, indent=4)
-        print("Recipes saved successfully.")
+        """Saves all recipes from the 'recipes' list to the JSON file (or binary snapshot), on the background writer if there is one."""
+        if self.database:
+            self.recipes.commit()
+        elif self._writer is None:
+            self._write_file(self.recipes)
+            print("Recipes saved successfully.")
+        else:
+            # Recipes are never changed in place, so a shallow copy is a consistent snapshot
+            recipes = self.recipes.copy() if self.lazy else list(self.recipes)
+            self._writer.submit(lambda: self._write_file(recipes))
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def _write_file(self, recipes):
+        """Writes the recipes to the recipe file (on the writer thread, if there is one)."""
+        write_recipes(self.file_path, recipes)
+        if self.metrics is not None:
+            self.metrics.add_bytes(os.path.getsize(self.file_path))
+
+    def _save_pending(self):
+        """Saves the recipe book if there are unsaved changes."""
+        if self._unsaved:
+            self.save_recipes()
+
+    def flush(self):
+        """Saves unsaved changes and waits until they are on disk."""
+        self._save_pending()
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self):
+        """Saves unsaved changes and stops the background writer (or closes the database)."""
+        self._save_pending()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.database or self.lazy:
+            self.recipes.close()
+        export_path = os.environ.get(METRICS_FILE_ENV)
+        if self.metrics is not None and export_path:
+            self.metrics.export(export_path)
+
+    def stats(self):
+        """Returns the recorded metrics (empty unless metrics are on) plus the writer and lazy-cache counters."""
+        stats = self.metrics.stats() if self.metrics is not None else {}
+        if self._writer is not None:
+            stats["writer"] = self._writer.stats()
+        if self.lazy:
+            stats["cache"] = self.recipes.stats()
+        return stats
+
+    def export_stats(self, file_path):
+        """Writes the metrics to file_path: JSON for .json files, Prometheus text otherwise."""
+        if self.metrics is None:
+            raise RuntimeError("metrics are not enabled for this recipe book")
+        self.metrics.export(file_path)
+
+    def _changed(self, count=1):
+        """Records unsaved mutations and saves if the autosave policy is due."""
+        self._unsaved += count
+        if self._batch_depth:
+            return
+        if self.autosave_every is not None and self._unsaved >= self.autosave_every:
+            self._save_pending()
+        elif self.autosave_interval is not None and time.monotonic() - self._last_save >= self.autosave_interval:
+            self._save_pending()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Groups mutations into one unit of work: nothing is saved while the
+        batch is open, and everything is saved once when the outermost batch ends.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._save_pending()
 
     def add_recipe(self, recipe):
-        """Adds a new recipe object and saves the recipe book."""
-        self.recipes.append(recipe)
-        self.save_recipes()
+        """Adds a new recipe object and saves the recipe book according to the autosave policy."""
+        self._append(recipe)
+        self._changed()
         print("\nRecipe added successfully.")
 
-    def view_all_recipes(self):
-        """Prints all recipes to the console."""
+    def add_many(self, recipes):
+        """Adds several recipes and saves the recipe book once."""
+        with self.batch():
+            count = 0
+            for recipe in recipes:
+                self._append(recipe)
+                count += 1
+            self._changed(count)
+        print(f"\n{count} recipes added.")
+
+    def view_all_recipes(self, offset=0, limit=None, out=None):
+        """
+        Prints the recipes (or the page of `limit` of them starting at `offset`)
+        to out, sys.stdout by default, in a few large writes.
+        Returns the number of recipes shown.
+        """
         if not self.recipes:
-            print("\nNo recipes found")
+            print("\nNo recipes found", file=out)
+            return 0
+        total = len(self.recipes)
+        start = min(offset, total)
+        stop = total if limit is None else min(start + limit, total)
+        if isinstance(self.recipes, list):
+            page = self.recipes[start:stop]
+            render = self._rendered.renderer(stop - start) if self._rendered is not None else str
         else:
-            print(f"\n-- Showing {len(self.recipes)} Recipes ---")
-            for recipe in self.recipes:
-                print(recipe)
-                print("-" * 20)
+            page = self.recipes.page(start, stop)
+            render = str
+        if stop - start < total:
+            header = f"\n-- Showing recipes {start + 1}-{stop} of {total} ---\n"
+        else:
+            header = f"\n-- Showing {total} Recipes ---\n"
+        separator = "\n" + "-" * 20 + "\n"
+        write_buffered(itertools.chain([header], (render(recipe) + separator for recipe in page)), out)
+        return stop - start
+
     def find_recipe(self, name):
         """Finds and returns a recipe by its name."""
-        for recipe in self.recipes:
-            if recipe.name.lower() == name.lower():
-                return recipe
-        return None
+        if self.database:
+            position = self.recipes.find_by_key(normalize(name))
+        else:
+            position = self._by_name.get(normalize(name))
+        return None if position is None else self.recipes[position]
 
-    def get_recipe_details():
-        """Helper function to get recipe details from the user."""
-        name = input("Enter recipe name: ")
-        num_ingredients = int(input("How many ingredients: "))
-        ingredients = []
-        for  _ in range(num_ingredients):
-            ing_name = input("Ingredient name: ")
-            ing_quantity = input("Quantity: ")
-            ing_unit = input("Unit (e.g., cups, g, ml): ")
-        steps = []
-        print("Enter recipe steps (type 'done' on a new line when finished):")
-        while True:
-            step = input()
-            if step.lower() == 'done':
+    def _positions_with_prefix(self, prefix):
+        """Returns the positions of recipes with a name token starting with prefix."""
+        positions = set()
+        start = bisect.bisect_left(self._sorted_tokens, prefix)
+        for token in self._sorted_tokens[start:]:
+            if not token.startswith(prefix):
                 break
-            steps.append(step)
+            positions |= self._by_token[token]
+        return positions
 
-        return Recipe(name, steps, ingredients)
+    def search_recipes(self, query):
+        """
+        Returns recipes whose name has a token starting with every word of the query,
+        e.g. "choc cak" finds "Chocolate Cake".
+        """
+        words = normalize(query).split()
+        if self.database:
+            positions = self.recipes.search(words) if words else []
+            return [self.recipes[p] for p in positions]
+        result = None
+        for word in words:
+            positions = self._positions_with_prefix(word)
+            result = positions if result is None else result & positions
+            if not result:
+                return []
+        return [self.recipes[p] for p in sorted(result or ())]
+
+    def find_by_ingredients(self, names):
+        """Returns recipes that contain all of the given ingredients."""
+        if self.database:
+            positions = self.recipes.find_by_ingredients([normalize(n) for n in names]) if names else []
+            return [self.recipes[p] for p in positions]
+        sets = [self._by_ingredient.get(normalize(name), set()) for name in names]
+        if not sets:
+            return []
+        # Intersect starting from the rarest ingredient to keep intermediate sets small
+        sets.sort(key=len)
+        result = set(sets[0])
+        for positions in sets[1:]:
+            result &= positions
+        return [self.recipes[p] for p in sorted(result)]
+
+    def fuzzy_find(self, name, limit=5):
+        """
+        Returns up to 'limit' recipes whose names are close to 'name', best first.
+        Similarity is the share of trigrams the two names have in common, so small
+        typos still match. Requires the manager to be created with fuzzy=True.
+        """
+        if not self.fuzzy:
+            raise ValueError("Fuzzy search needs RecipeManager(..., fuzzy=True)")
+        query = trigrams(name)
+        shared = {}
+        for gram in query:
+            for position in self._by_trigram.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+        scored = []
+        for position, count in shared.items():
+            score = count / len(query | trigrams(self._name_at(position)))
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, position))
+        scored.sort()
+        return [self.recipes[p] for _, p in scored[:limit]]
+
+    def _ingredient_matrix(self):
+        """Returns the IngredientMatrix, building it from the ingredient index on first use."""
+        if self._matrix is None:
+            postings = self.recipes.ingredient_positions() if self.database else self._by_ingredient
+            self._matrix = IngredientMatrix(postings, len(self.recipes))
+        return self._matrix
 
-    def main():
+    def similar_recipes(self, name, limit=5):
         """
-        The main function that provides the command-line interface.
+        Returns up to 'limit' (recipe, similarity) pairs for the recipes whose ingredients
+        are most like those of the named recipe, best first. Similarity is the cosine of
+        the two recipes' ingredient vectors, from 0 (nothing shared) to 1 (same ingredients).
         """
-        recipe_manager = RecipeManager(RECIPES_FILE)
-        print("Welcome to your Recipe Manager!")
+        recipe = self.find_recipe(name)
+        if recipe is None:
+            print(f"Recipe '{name}' not found.")
+            return []
+        position = self.recipes.find_by_key(normalize(name)) if self.database else self._by_name[normalize(name)]
+        keys = [normalize(ingredient.name) for ingredient in recipe.ingredients]
+        return [(self.recipes[p], score) for p, score in self._ingredient_matrix().similar(keys, limit, position)]
 
+    def recipes_from_pantry(self, pantry, missing=0, limit=None):
+        """
+        Returns the recipes that can be made from the pantry, an iterable of ingredient
+        names; with missing > 0 also those lacking up to that many ingredients, which
+        come after the ones lacking fewer. 'limit' caps how many recipes are returned.
+        """
+        keys = [normalize(name) for name in pantry]
+        matches = self._ingredient_matrix().makeable(keys, missing)
+        return [self.recipes[p] for p, _ in itertools.islice(matches, limit)]
+
+    def shopping_list(self, plan):
+        """
+        Builds a shopping list for a meal plan given as recipe names, or as a dict of
+        recipe name -> factor. Names that aren't in the book are reported and skipped.
+        """
+        items = plan.items() if isinstance(plan, dict) else ((name, 1) for name in plan)
+        recipes = []
+        for name, factor in items:
+            recipe = self.find_recipe(name)
+            if recipe is None:
+                print(f"Recipe '{name}' not found, skipping it.")
+            else:
+                recipes.append((recipe, factor))
+        return build_shopping_list(recipes)
+
+def get_recipe_details():
+    """Helper function to get recipe details from the user."""
+    name = input("Enter recipe name: ")
+    num_ingredients = int(input("How many ingredients: "))
+    ingredients = []
+    for  _ in range(num_ingredients):
+        ing_name = input("Ingredient name: ")
         while True:
-            print("\nWhat would you like to d?")
-            print("1. Add a new recipe")
-            print("2. View all recipes")
-            print("3. Find a recipe by name")
-            print("4. Exit")
-            choice = input("Enter your choice (1-4): ")
-
-            if choice == '1':
-                new_recipe = get_recipe_details()
-                recipe_manager.add_recipe(new_recipe)
-            elif choice == '2':
-                recipe_manager.view_all_recipes()
-            elif choice == '3':
-                name = input("Enter the name of the recipe you want to find: ")
-                recipe = recipe_manager.find_recipe(name)
-                if recipe:
-                    print("\nRecipe found: \n")
-                    print(recipe)
-                else:
-                    print(f"\nRecipe '{name}' not found")
-            elif choice == '4':
-                print("Exiting. Goodbye!")
+            ing_quantity = input("Quantity: ")
+            try:
+                parse_quantity(ing_quantity)
                 break
+            except ValueError as e:
+                print(f"Invalid quantity: {e}")
+        ing_unit = input("Unit (e.g., cups, g, ml): ")
+        ingredients.append(Ingredient(ing_name, ing_quantity, ing_unit))
+    steps = []
+    print("Enter recipe steps (type 'done' on a new line when finished):")
+    while True:
+        step = input()
+        if step.lower() == 'done':
+            break
+        steps.append(step)
+
+    return Recipe(name, steps, ingredients)
+
+def main(file_path=RECIPES_FILE):
+    """
+    The main function that provides the command-line interface.
+    """
+    recipe_manager = RecipeManager(file_path, fuzzy=True, background=True)
+    print("Welcome to your Recipe Manager!")
+
+    while True:
+        print("\nWhat would you like to d?")
+        print("1. Add a new recipe")
+        print("2. View all recipes")
+        print("3. Find a recipe by name")
+        print("4. Shopping list for a meal plan")
+        print("5. What can I cook with my pantry?")
+        print("6. Exit")
+        choice = input("Enter your choice (1-6): ")
+
+        if choice == '1':
+            new_recipe = get_recipe_details()
+            recipe_manager.add_recipe(new_recipe)
+        elif choice == '2':
+            recipe_manager.view_all_recipes()
+        elif choice == '3':
+            name = input("Enter the name of the recipe you want to find: ")
+            recipe = recipe_manager.find_recipe(name)
+            if recipe:
+                print("\nRecipe found: \n")
+                print(recipe)
+                similar = recipe_manager.similar_recipes(name, 3)
+                if similar:
+                    print("\nYou might also like: " + ", ".join(r.name for r, _ in similar))
+            else:
+                print(f"\nRecipe '{name}' not found")
+                suggestions = recipe_manager.search_recipes(name) or recipe_manager.fuzzy_find(name)
+                if suggestions:
+                    print("Did you mean: " + ", ".join(r.name for r in suggestions[:5]))
+        elif choice == '4':
+            names = input("Enter recipe names separated by commas: ")
+            plan = {}
+            for name in names.split(","):
+                if name.strip():
+                    plan[name.strip()] = plan.get(name.strip(), 0) + 1
+            shopping = recipe_manager.shopping_list(plan)
+            if shopping:
+                print("\nShopping list:\n- " + "\n- ".join(str(item) for item in shopping))
+        elif choice == '5':
+            items = input("Enter your ingredients separated by commas: ")
+            pantry = [item.strip() for item in items.split(",") if item.strip()]
+            recipes = recipe_manager.recipes_from_pantry(pantry, limit=20)
+            if recipes:
+                print("\nYou can make: " + ", ".join(r.name for r in recipes))
             else:
-                print("Invalid choice. Please enter a number from 1 to 4.")
+                recipes = recipe_manager.recipes_from_pantry(pantry, missing=1, limit=20)
+                if recipes:
+                    print("\nThese need just one more ingredient: " + ", ".join(r.name for r in recipes))
+                else:
+                    print("\nNothing can be made with those ingredients.")
+        elif choice == '6':
+            try:
+                recipe_manager.close()
+            except OSError as e:
+                print(f"Error saving the recipe book: {e}")
+            print("Exiting. Goodbye!")
+            break
+        else:
+            print("Invalid choice. Please enter a number from 1 to 6.")
+
+def ingredient(text):
+    """argparse type for 'NAME:QUANTITY[:UNIT]', e.g. 'flour:500:g' or 'eggs:2'."""
+    name, _, rest = text.partition(":")
+    quantity, _, unit = rest.partition(":")
+    if not name.strip() or not quantity.strip():
+        raise argparse.ArgumentTypeError(f"needs NAME:QUANTITY[:UNIT], got '{text}'")
+    try:
+        parse_quantity(quantity.strip())
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return Ingredient(name.strip(), quantity.strip(), unit.strip())
+
+def print_names(recipes, empty):
+    """Prints one recipe name per line in a few large writes, or `empty` if there are none."""
+    if not recipes:
+        print(empty)
+        return
+    write_buffered(f"{recipe.name}\n" for recipe in recipes)
+
+def command_add(manager, args):
+    manager.add_recipe(Recipe(args.name, args.step, args.ingredient))
+
+def command_show(manager, args):
+    recipe = manager.find_recipe(args.name)
+    if recipe is None:
+        print(f"Recipe '{args.name}' not found")
+        suggestions = manager.search_recipes(args.name)
+        if suggestions:
+            print("Did you mean: " + ", ".join(r.name for r in suggestions[:5]))
+        return 1
+    print(recipe)
+
+def command_search(manager, args):
+    print_names(manager.search_recipes(args.query), "No matching recipes.")
+
+def command_with_ingredients(manager, args):
+    print_names(manager.find_by_ingredients(args.names), "No recipe has all of those ingredients.")
+
+def command_similar(manager, args):
+    if manager.find_recipe(args.name) is None:
+        print(f"Recipe '{args.name}' not found")
+        return 1
+    similar = manager.similar_recipes(args.name, args.limit)
+    if not similar:
+        print("No recipe shares an ingredient with it.")
+        return
+    write_buffered(f"{score:.2f}  {recipe.name}\n" for recipe, score in similar)
+
+def command_pantry(manager, args):
+    print_names(manager.recipes_from_pantry(args.items, args.missing, args.limit),
+                "Nothing can be made with those ingredients.")
+
+def command_shopping(manager, args):
+    # A name given twice means the recipe is made twice
+    plan = collections.Counter(args.names)
+    shopping = manager.shopping_list(plan)
+    if len(shopping) == 0:
+        print("Nothing to buy.")
+    else:
+        write_buffered(f"- {item}\n" for item in shopping)
+    return 0 if all(manager.find_recipe(name) is not None for name in plan) else 1
+
+def command_list(manager, args):
+    manager.view_all_recipes(args.offset, args.limit)
+
+def command_convert(args):
+    convert_recipes(args.source, args.target)
+
+def build_parser():
+    """Builds the argparse parser for the command line; every command sets `handler` or `standalone`."""
+    parser = argparse.ArgumentParser(prog="recipe.py", description="Keeps a recipe book. "
+                                     "Run without a command for the interactive menu.")
+    parser.add_argument("-f", "--file", default=RECIPES_FILE,
+                        help=f"recipe file: JSON, .snap or .db/.sqlite (default {RECIPES_FILE})")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    add = commands.add_parser("add", help="add a recipe")
+    add.add_argument("name")
+    add.add_argument("-i", "--ingredient", type=ingredient, action="append", required=True,
+                     metavar="NAME:QUANTITY[:UNIT]", help="an ingredient; repeat for each one")
+    add.add_argument("-s", "--step", action="append", required=True, help="a step; repeat for each one, in order")
+    add.set_defaults(handler=command_add)
+
+    show = commands.add_parser("show", aliases=["find"], help="show a recipe by name")
+    show.add_argument("name")
+    show.set_defaults(handler=command_show)
+
+    search = commands.add_parser("search", help="list recipes whose name has words starting with the query's")
+    search.add_argument("query")
+    search.set_defaults(handler=command_search)
+
+    containing = commands.add_parser("with-ingredients", help="list recipes that contain all the ingredients")
+    containing.add_argument("names", nargs="+", metavar="ingredient")
+    containing.set_defaults(handler=command_with_ingredients)
+
+    similar = commands.add_parser("similar", help="list the recipes with the most similar ingredients")
+    similar.add_argument("name")
+    similar.add_argument("--limit", type=count, default=5)
+    similar.set_defaults(handler=command_similar)
+
+    pantry = commands.add_parser("pantry", help="list recipes that can be made from the ingredients")
+    pantry.add_argument("items", nargs="+", metavar="ingredient")
+    pantry.add_argument("--missing", type=count, default=0, help="also allow recipes lacking up to this many")
+    pantry.add_argument("--limit", type=count)
+    pantry.set_defaults(handler=command_pantry)
+
+    shopping = commands.add_parser("shopping", help="build the shopping list for a meal plan")
+    shopping.add_argument("names", nargs="+", metavar="recipe", help="recipe names; repeat one to make it twice")
+    shopping.set_defaults(handler=command_shopping)
+
+    listing = commands.add_parser("list", help="list the recipes")
+    listing.add_argument("--offset", type=count, default=0)
+    listing.add_argument("--limit", type=count)
+    listing.set_defaults(handler=command_list)
+
+    batch = commands.add_parser("batch", help="run commands from a file or stdin, one per line, "
+                                "with a single load and a single write")
+    batch.add_argument("script", nargs="?", default="-", help="command file, or - for stdin (the default)")
+    batch.set_defaults(handler=command_batch, parser=parser)
+
+    convert = commands.add_parser("convert", help="copy a recipe file into another format")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.set_defaults(standalone=command_convert)
+    return parser
+
+def cli(argv=None):
+    """Runs the command line and returns the exit status; without a command it starts the interactive menu."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        main(args.file)
+        return 0
+    try:
+        if getattr(args, "standalone", None) is not None:
+            return args.standalone(args) or 0
+        # One load, and one write when the outermost batch ends; a snapshot is only
+        # decoded as far as the command needs
+        manager = RecipeManager(args.file, autosave_every=None, lazy=True)
+        try:
+            with manager.batch():
+                return run_command(manager, args)
+        finally:
+            manager.close()
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; keep the exit quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
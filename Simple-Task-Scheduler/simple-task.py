@@ -1,9 +1,110 @@
+"""
+A task scheduler: tasks with a priority, a due date and the tasks they depend
+on, kept in a JSON file (tasks.josn by default), a binary snapshot (.snap) or
+an SQLite database (.db or .sqlite).
+
+Run it without a command for the interactive menu, or give one command for
+scripts and cron jobs (--help lists them, COMMAND --help shows the options):
+
+    python simple-task.py -f tasks.db add "Pay rent" --due 2025-07-01 --priority HIGH
+    python simple-task.py -f tasks.db next
+    python simple-task.py -f tasks.db list --limit 20
+
+`batch` runs commands from a file (or stdin), one per line in the same syntax
+without the program name, with a single load and a single write:
+
+    python simple-task.py -f tasks.db batch commands.txt
+
+Startup: asyncio, concurrent.futures and sqlite3 are only imported by the
+commands that use them. The cold-start targets for 100k tasks, and how to
+check them, are in README.md.
+"""
+import argparse
+import bisect
+import collections
+import contextlib
+import copy
+import functools
+import heapq
+import io
+import itertools
 import json
+import math
 import os
-from datetime import datetime
+import struct
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
 from enum import Enum
 
+# The helpers the three apps share (storage formats, metrics, rendering, the batch runner)
+# live in appcommon.py at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from appcommon import (BackgroundWriter, LOCK_SUFFIX, METRICS_FILE_ENV, Metrics, RenderCache, SnapshotError,
+                       atomic_open, command_batch, count, file_lock, file_stamp, fsync_directory, is_database,
+                       is_snapshot, iter_json_array, iter_snapshot, metrics_enabled, run_command,
+                       write_buffered, write_snapshot)
+
 TASK_FILE = 'tasks.josn'
+# Mutations are appended to this file (next to the snapshot) as JSON lines
+JOURNAL_SUFFIX = '.journal'
+# Number of journal records after which the journal is folded into the snapshot
+COMPACT_THRESHOLD = 1000
+# First bytes of a task snapshot (.snap) file
+SNAPSHOT_MAGIC = b'TASKSNP2'
+# Snapshots written before tasks had dependencies; still read, with no dependencies
+LEGACY_SNAPSHOT_MAGIC = b'TASKSNP1'
+# Default address for 'serve': host:port for TCP, anything else is a Unix socket path
+SERVER_ADDRESS = '127.0.0.1:8765'
+# Seconds the server waits after a mutation so that mutations arriving meanwhile share one write
+FLUSH_DELAY = 0.002
+
+# Dates are kept as whole seconds since 0001-01-01 (local time), which compare and sort as plain ints
+SECONDS_PER_DAY = 86400
+
+@functools.lru_cache(maxsize=None)
+def day_ordinal(text):
+    """Day number of a 'YYYY-MM-DD' string; cached because the same days repeat across tasks."""
+    return date.fromisoformat(text).toordinal()
+
+@functools.lru_cache(maxsize=None)
+def day_text(ordinal):
+    """'YYYY-MM-DD' for a day number; the cached counterpart of day_ordinal."""
+    return date.fromordinal(ordinal).isoformat()
+
+def parse_timestamp(text):
+    """
+    Parses 'YYYY-MM-DD', optionally followed by ' HH:MM' or ' HH:MM:SS', into
+    seconds since 0001-01-01. Slices the fixed-width fields instead of calling
+    strptime and falls back to datetime.fromisoformat for other ISO forms.
+    Raises ValueError for anything that isn't a valid date.
+    """
+    if len(text) == 10:
+        return day_ordinal(text) * SECONDS_PER_DAY
+    if len(text) in (16, 19) and text[10] in " T" and text[13] == ":" and text[:10].count("-") == 2:
+        seconds = int(text[11:13]) * 3600 + int(text[14:16]) * 60 + (int(text[17:19]) if len(text) == 19 else 0)
+        if seconds < SECONDS_PER_DAY:
+            return day_ordinal(text[:10]) * SECONDS_PER_DAY + seconds
+    moment = datetime.fromisoformat(text)
+    return moment.toordinal() * SECONDS_PER_DAY + moment.hour * 3600 + moment.minute * 60 + moment.second
+
+@functools.lru_cache(maxsize=None)
+def clock_text(seconds):
+    """'HH:MM:SS' for seconds into a day; cached like day_text, as formatting it dominates rendering a task."""
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def format_timestamp(seconds):
+    """Formats seconds from parse_timestamp as 'YYYY-MM-DD', with ' HH:MM:SS' only if there is a time of day."""
+    day, rest = divmod(seconds, SECONDS_PER_DAY)
+    if not rest:
+        return day_text(day)
+    return f"{day_text(day)} {clock_text(rest)}"
+
+def local_timestamp(seconds):
+    """Converts seconds from parse_timestamp (local time) to epoch seconds."""
+    day, rest = divmod(seconds, SECONDS_PER_DAY)
+    return (datetime.fromordinal(day) + timedelta(seconds=rest)).timestamp()
 
 class Priority(Enum):
     """
@@ -20,17 +121,70 @@ class Priority(Enum):
         Returns string reperesentation for user display"""
         return self.name
 
+def dependency_ids(ids):
+    """Normalizes task ids (ints or digit strings) to a tuple of ints without duplicates."""
+    return tuple(dict.fromkeys(map(int, ids)))
+
+def edit_fields(fields):
+    """
+    Checks the fields of a task edit and returns them as journal records keep them:
+    the priority's name, the due date in canonical form and the prerequisites as ints.
+    Raises ValueError for a field that cannot be edited or a bad value.
+    """
+    normalized = {}
+    for field, value in fields.items():
+        if field in ("title", "description"):
+            if not isinstance(value, str):
+                raise ValueError(f"{field} must be text")
+        elif field == "due_date":
+            value = format_timestamp(parse_timestamp(value))
+        elif field == "priority":
+            if not isinstance(value, str) or value.upper() not in Priority.__members__:
+                raise ValueError(f"unknown priority '{value}'")
+            value = value.upper()
+        elif field == "depends_on":
+            try:
+                value = list(dependency_ids(value))
+            except TypeError:
+                raise ValueError("depends_on must be a list of task ids")
+        else:
+            raise ValueError(f"cannot edit '{field}' (only title, description, due_date, priority, depends_on)")
+        normalized[field] = value
+    return normalized
+
 class Task:
     """
     Represents a single task with its attributes and status.
     Demonstrates encapsulation by  bundling all task data and behaviour.
+    Uses __slots__ so large task lists don't pay for a __dict__ per task.
+    The due date is parsed once into an int (see parse_timestamp) and only
+    formatted back to text when it is shown or saved.
+    `depends_on` holds the ids of the tasks that must be complete before this one is ready.
     """
-    def __init__(self, title, description, due_date, priority_level):
+    __slots__ = ("title", "description", "due", "status", "priority", "task_id", "depends_on")
+    # title, description, due date and status as string pool indexes, priority value, id (-1 if unset),
+    # and the prerequisite ids joined by commas as a string pool index
+    RECORD = struct.Struct("<IIIIBqI")
+    # The record of LEGACY_SNAPSHOT_MAGIC snapshots, without prerequisites
+    LEGACY_RECORD = struct.Struct("<IIIIBq")
+
+    def __init__(self, title, description, due_date, priority_level, depends_on=()):
         self.title = title
         self.description = description
         self.due_date = due_date
         self.status = "Pending"
         self.priority = Priority[priority_level.upper()]
+        # Stable identifier assigned by the Scheduler, used by journal records
+        self.task_id = None
+        self.depends_on = dependency_ids(depends_on)
+
+    @property
+    def due_date(self):
+        return format_timestamp(self.due)
+
+    @due_date.setter
+    def due_date(self, text):
+        self.due = parse_timestamp(text)
 
     def mark_complete(self):
         """Changes the state of the task to 'Complete'."""
@@ -39,18 +193,48 @@ class Task:
     def to_dict(self):
         """Converts the Task object to a dictionary for JSON serialization"""
         return {
+                "id": self.task_id,
                 "title": self.title,
                 "description": self.description,
                 "due_date": self.due_date,
                 "status": self.status,
-                "priority": self.priority.name
+                "priority": self.priority.name,
+                "depends_on": list(self.depends_on)
                 }
 
     @staticmethod
     def from_dict(data):
         """Creates a Task objet form a dictionary (for JSON deserialization)"""
         # Note: We pass the priortiy string directly to the constructor
-        task = Task(data['title'], data['description'], data['due_date'], data['priority'])
+        task = Task(data['title'], data['description'], data['due_date'], data['priority'],
+                    data.get('depends_on', ()))
+        task.status = sys.intern(data.get('status', "Pending"))
+        task.task_id = data.get('id')
+        return task
+
+    def to_record(self, pool):
+        """Packs the task into a fixed-width binary record, storing its strings in the pool."""
+        return self.RECORD.pack(pool.add(self.title), pool.add(self.description), pool.add(self.due_date),
+                                pool.add(self.status), self.priority.value,
+                                -1 if self.task_id is None else self.task_id,
+                                pool.add(",".join(map(str, self.depends_on))))
+
+    @staticmethod
+    def from_record(snapshot, offset):
+        """Creates a Task object from the binary record at offset in a snapshot"""
+        if snapshot.magic == LEGACY_SNAPSHOT_MAGIC:
+            title, description, due_date, status, priority, task_id = Task.LEGACY_RECORD.unpack_from(
+                    snapshot.buffer, offset)
+            depends_on = ()
+        else:
+            title, description, due_date, status, priority, task_id, depends_on = Task.RECORD.unpack_from(
+                    snapshot.buffer, offset)
+            depends_on = snapshot.string(depends_on)
+            depends_on = depends_on.split(",") if depends_on else ()
+        task = Task(snapshot.string(title), snapshot.string(description), snapshot.string(due_date),
+                    Priority(priority).name, depends_on)
+        task.status = sys.intern(snapshot.string(status))
+        task.task_id = None if task_id < 0 else task_id
         return task
 
     def __str__(self):
@@ -60,75 +244,1519 @@ class Task:
         if self.priority == Priority.CRITICAL:
             priority_str = f" {priority_str}"
         elif self.priority == Priority.HIGH:
-            priority_str = f" {priortiy_str}"
+            priority_str = f" {priority_str}"
 
-        return (
-                f"{indicator} Title: {self.title}\n"
+        # The id is what the command line and "Depends on" refer to
+        id_str = "" if self.task_id is None else f" (#{self.task_id})"
+        text = (
+                f"Title: {self.title}{id_str}\n"
                 f"  > Priority: {priority_str} | Status: {self.status} | {due_str}\n"
                 f"  > Description: {self.description}"
                 )
+        if self.depends_on:
+            text += f"\n  > Depends on: {', '.join(f'#{i}' for i in self.depends_on)}"
+        return text
+
+def stream_tasks(file_path, start=0, limit=None):
+    """
+    Yields Task objects straight from a task snapshot, reading only as far as needed.
+    'start' and 'limit' select a page. Journal records are not applied, so this
+    shows the file as of the last compaction. Binary snapshots jump straight to
+    the first task of the page, and SQLite databases are read directly.
+    """
+    stop = None if limit is None else start + limit
+    if is_database(file_path):
+        return iter_database(file_path, start, stop)
+    if is_snapshot(file_path):
+        return iter_snapshot(file_path, Task.from_record, SNAPSHOT_MAGIC, start, stop, (LEGACY_SNAPSHOT_MAGIC,))
+    return itertools.islice(map(Task.from_dict, iter_json_array(file_path)), start, stop)
+
+def write_tasks(file_path, tasks):
+    """Writes tasks as JSON, an SQLite database or a binary snapshot, depending on the extension."""
+    if is_database(file_path):
+        store = SqliteTasks(file_path)
+        try:
+            store.clear()
+            for task in tasks:
+                store.append(task)
+            store.commit()
+        finally:
+            store.close()
+        return
+    if is_snapshot(file_path):
+        write_snapshot(file_path, tasks, SNAPSHOT_MAGIC)
+        return
+    data_to_save = [t.to_dict() for t in tasks]
+    with atomic_open(file_path) as f:
+        json.dump(data_to_save, f, indent=4)
+
+def convert_tasks(source, target):
+    """
+    Copies a task file into another format, e.g. tasks.josn -> tasks.snap or back.
+    The snapshot is streamed across, unless it has a journal: then the tasks are
+    loaded with the journal applied first.
+    """
+    if os.path.exists(source + JOURNAL_SUFFIX):
+        scheduler = Scheduler(source, autosave_every=None)
+        write_tasks(target, scheduler.tasks)
+        scheduler.close()
+        return
+    write_tasks(target, stream_tasks(source))
+
+class SqliteTasks:
+    """
+    A list-like store that keeps tasks in an SQLite database instead of memory.
+    It is used for task files ending in .db or .sqlite. Rows are only read when
+    they are asked for, and the priority view is an indexed SQL query over
+    (status, priority, due date), so the task list can be larger than RAM.
+    Prerequisites are rows of a separate dependencies table, and the priority
+    view skips tasks that still have a pending (or missing) prerequisite.
+    The database runs in WAL mode, which takes the place of the journal;
+    changes become durable when commit() is called.
+    """
+    SCHEMA = (
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY, title TEXT NOT NULL, description TEXT NOT NULL, "
+            "due_date TEXT NOT NULL, status TEXT NOT NULL, priority INTEGER NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS tasks_by_priority ON tasks (status, priority DESC, due_date, id)",
+            "CREATE INDEX IF NOT EXISTS tasks_by_due_date ON tasks (status, due_date, id)",
+            "CREATE TABLE IF NOT EXISTS dependencies ("
+            "task_id INTEGER NOT NULL, prerequisite INTEGER NOT NULL, "
+            "PRIMARY KEY (task_id, prerequisite)) WITHOUT ROWID",
+            )
+    COLUMNS = "id, title, description, due_date, status, priority"
+    # What every query reads: the columns plus the task's prerequisites joined by commas
+    SELECT_COLUMNS = (COLUMNS + ", (SELECT group_concat(prerequisite) FROM dependencies "
+                      "WHERE dependencies.task_id = tasks.id)")
+    # True for tasks whose prerequisites are all complete
+    READY = ("NOT EXISTS (SELECT 1 FROM dependencies d LEFT JOIN tasks p ON p.id = d.prerequisite "
+             "WHERE d.task_id = tasks.id AND COALESCE(p.status, 'Pending') = 'Pending')")
+    # Columns edit records may change
+    EDITABLE = ("title", "description", "due_date", "priority")
+
+    def __init__(self, file_path):
+        import sqlite3 # only databases need it, so it is imported on first use to keep startup fast
+        self.connection = sqlite3.connect(file_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self._size, = self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()
+
+    @staticmethod
+    def _task(row):
+        task_id, title, description, due_date, status, priority, depends_on = row
+        task = Task(title, description, due_date, Priority(priority).name,
+                    depends_on.split(",") if depends_on else ())
+        task.status = sys.intern(status)
+        task.task_id = task_id
+        return task
+
+    def append(self, task):
+        """Inserts a task, assigning it the next id if it has none."""
+        task.task_id = self.connection.execute(
+                f"INSERT INTO tasks ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                (task.task_id, task.title, task.description, task.due_date,
+                 task.status, task.priority.value)).lastrowid
+        self._set_dependencies(task.task_id, task.depends_on)
+        self._size += 1
+
+    def _set_dependencies(self, task_id, depends_on):
+        self.connection.execute("DELETE FROM dependencies WHERE task_id = ?", (task_id,))
+        self.connection.executemany("INSERT INTO dependencies (task_id, prerequisite) VALUES (?, ?)",
+                                    ((task_id, prerequisite) for prerequisite in depends_on))
+
+    def clear(self):
+        self.connection.execute("DELETE FROM tasks")
+        self.connection.execute("DELETE FROM dependencies")
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("task index out of range")
+        return next(self.page(i, i + 1))
+
+    def __iter__(self):
+        return self.page(0, None)
+
+    def page(self, start=0, stop=None):
+        """Yields the tasks at positions start..stop, reading rows lazily."""
+        limit = -1 if stop is None else max(stop - start, 0)
+        cursor = self.connection.execute(
+                f"SELECT {self.SELECT_COLUMNS} FROM tasks ORDER BY id LIMIT ? OFFSET ?", (limit, start))
+        for row in cursor:
+            yield self._task(row)
+
+    def get(self, task_id):
+        """Returns the task with the given id, or None."""
+        row = self.connection.execute(f"SELECT {self.SELECT_COLUMNS} FROM tasks WHERE id = ?",
+                                      (task_id,)).fetchone()
+        return None if row is None else self._task(row)
+
+    def apply(self, record):
+        """Applies a complete or edit journal record as an UPDATE."""
+        if record['op'] == "complete":
+            self.connection.execute("UPDATE tasks SET status = 'Complete' WHERE id = ?", (record['id'],))
+        elif record['op'] == "edit":
+            if "depends_on" in record['fields']:
+                self._set_dependencies(record['id'], dependency_ids(record['fields']['depends_on']))
+            fields = {f: v for f, v in record['fields'].items() if f in self.EDITABLE}
+            if "priority" in fields:
+                fields["priority"] = Priority[fields["priority"].upper()].value
+            if "due_date" in fields:
+                # Stored in the canonical form so due dates compare correctly as text
+                fields["due_date"] = format_timestamp(parse_timestamp(fields["due_date"]))
+            if fields:
+                assignments = ", ".join(f"{field} = ?" for field in fields)
+                self.connection.execute(f"UPDATE tasks SET {assignments} WHERE id = ?",
+                                        (*fields.values(), record['id']))
+
+    def top(self, k=None):
+        """Returns the k highest-priority ready tasks (all of them if k is None), straight from the index."""
+        cursor = self.connection.execute(
+                f"SELECT {self.SELECT_COLUMNS} FROM tasks WHERE status = 'Pending' AND {self.READY} "
+                "ORDER BY priority DESC, due_date, id LIMIT ?", (-1 if k is None else k,))
+        return [self._task(row) for row in cursor]
+
+    def blocked(self):
+        """Returns the pending tasks that still wait on a prerequisite, by priority."""
+        cursor = self.connection.execute(
+                f"SELECT {self.SELECT_COLUMNS} FROM tasks WHERE status = 'Pending' AND NOT {self.READY} "
+                "ORDER BY priority DESC, due_date, id")
+        return [self._task(row) for row in cursor]
+
+    def is_blocked(self, task_id):
+        """Checks whether the task is pending and still waits on a prerequisite."""
+        return self.connection.execute(
+                f"SELECT 1 FROM tasks WHERE id = ? AND status = 'Pending' AND NOT {self.READY}",
+                (task_id,)).fetchone() is not None
+
+    def released_by(self, task_id):
+        """Returns the pending tasks that depend on the task and have no other pending prerequisite."""
+        cursor = self.connection.execute(
+                f"SELECT {self.SELECT_COLUMNS} FROM tasks WHERE status = 'Pending' AND {self.READY} "
+                "AND id IN (SELECT task_id FROM dependencies WHERE prerequisite = ?)", (task_id,))
+        return [self._task(row) for row in cursor]
+
+    def due_between(self, start, end):
+        """Returns the pending tasks due in [start, end) (canonical date strings) in due order, using the index."""
+        cursor = self.connection.execute(
+                f"SELECT {self.SELECT_COLUMNS} FROM tasks WHERE status = 'Pending' AND due_date >= ? AND due_date < ? "
+                "ORDER BY due_date, id", (start, end))
+        return [self._task(row) for row in cursor]
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        """Closes the connection; anything not committed is rolled back."""
+        self.connection.close()
+
+def iter_database(file_path, start=0, stop=None):
+    """Yields tasks start..stop of an SQLite task file, closing it afterwards."""
+    store = SqliteTasks(file_path)
+    try:
+        yield from store.page(start, stop)
+    finally:
+        store.close()
+
+def topological_order(tasks):
+    """
+    Orders {task id: task} so that every task comes after its prerequisites
+    (Kahn's algorithm, O(V + E)); prerequisites missing from `tasks` are ignored.
+    Returns (ordered ids, ids left over because they are on or behind a cycle).
+    """
+    waiting = {}
+    dependents = collections.defaultdict(list)
+    for task_id, task in tasks.items():
+        count = 0
+        for prerequisite in task.depends_on:
+            if prerequisite in tasks:
+                dependents[prerequisite].append(task_id)
+                count += 1
+        waiting[task_id] = count
+    order = [task_id for task_id, count in waiting.items() if not count]
+    # The list grows while it is walked: each task released is visited in turn
+    for task_id in order:
+        for dependent_id in dependents.get(task_id, ()):
+            waiting[dependent_id] -= 1
+            if not waiting[dependent_id]:
+                order.append(dependent_id)
+    return order, [task_id for task_id, count in waiting.items() if count]
 
 class Scheduler:
         """
         Manages the collection of tasks and handles persistence and prioritization.
         Encapsulates all logic related to managing the task list.
+
+        Persistence is journaled: the task file holds a snapshot, and every
+        mutation (add, complete, edit) is appended as one JSON line to a
+        journal next to it. Loading replays the snapshot plus the journal, and
+        once the journal grows past `compact_threshold` records it is folded
+        back into the snapshot. A single add therefore costs O(1) I/O.
+
+        Pending tasks are also kept in a heap ordered by (priority, due date)
+        with lazy deletion: completing or re-prioritising a task leaves its old
+        entry behind, and stale entries are skipped when they surface.
+
+        Tasks may depend on other tasks (Task.depends_on), forming a DAG. Each
+        pending task counts its unfinished prerequisites and only enters the
+        heap once the count drops to zero, so the priority views only show
+        ready tasks. Every task keeps the list of tasks waiting on it, and
+        completing it decrements their counters, which costs O(1) per released
+        edge. Adds may only name existing tasks and edits are checked for
+        cycles; critical_path() finds the longest chain of pending work and
+        TaskGraphRunner executes ready tasks on a pool.
+
+        Journal records are buffered and written according to an autosave
+        policy: once `autosave_every` records are pending (1 by default, i.e.
+        after every call) or once `autosave_interval` seconds have passed since
+        the last write. With both set to None nothing is written until flush()
+        or save_tasks() is called. Mutations made inside `with scheduler.batch():`
+        (or through add_many) are written in one append when the outermost
+        batch ends.
+
+        Snapshots are written to a temporary file, fsynced and renamed into
+        place, and journal appends are fsynced, so a crash never truncates the
+        task file. With background=True all writes run on a BackgroundWriter
+        thread in the order they were queued; call flush() to wait for them
+        and close() when done.
+
+        Files ending in .db or .sqlite are SQLite databases instead: tasks stay
+        on disk in a SqliteTasks store, mutations become UPDATEs, the priority
+        view is an indexed query, and writing the journal becomes a commit
+        (so there is no journal file, heap or background writer).
+
+        With shared=True several processes can use the same task file. Every
+        mutation (or whole batch) runs under an fcntl lock on a '.lock' file:
+        the scheduler first catches up with what other processes wrote, by
+        replaying only the journal lines added since it last looked or by
+        reloading if the snapshot's stamp changed, and it writes its own
+        records before releasing the lock. Writes are therefore synchronous
+        and `background` is ignored.
+
+        With metrics=True (or the APP_METRICS environment variable set) the
+        methods in INSTRUMENTED are timed into a Metrics object; see stats()
+        and export_stats().
         """
-        def __init__(self, file_path):
+        # Methods timed when metrics are on, and the kind of operation each one is
+        INSTRUMENTED = {
+                "_load_tasks": "load", "_write_queued": "write", "save_tasks": "save", "flush": "save",
+                "add_task": "add", "add_many": "add", "complete_task": "update", "edit_task": "update",
+                "next_task": "query", "top_tasks": "query", "tasks_due_between": "query",
+                "blocked_tasks": "query", "critical_path": "query", "view_task_by_priority": "render",
+                }
+
+        def __init__(self, file_path, compact_threshold=COMPACT_THRESHOLD,
+                     autosave_every=1, autosave_interval=None, background=False, shared=False, metrics=None):
             self.file_path = file_path
-            self.tasks = []
-            self._load_tasks()
+            self.shared = shared
+            self.lock_path = file_path + LOCK_SUFFIX
+            self._lock_depth = 0
+            # What has been read so far: the snapshot's stamp and the byte offset into the journal
+            self._snapshot_stamp = None
+            self._journal_offset = 0
+            self.autosave_every = autosave_every
+            self.autosave_interval = autosave_interval
+            # Journal records that have been applied in memory but not written yet
+            self._pending_records = []
+            self._batch_depth = 0
+            self._last_save = time.monotonic()
+            self.database = is_database(file_path)
+            self._writer = None
+            if background and not self.database and not shared:
+                self._writer = BackgroundWriter("task-writer")
+            # Work handed over for writing: a snapshot to write first, then records to append.
+            # The writer thread drains both under the lock, so queued work is never lost or reordered.
+            self._write_lock = threading.Lock()
+            self._queued_snapshot = None
+            self._queued_records = []
+            self.journal_path = file_path + JOURNAL_SUFFIX
+            self.compact_threshold = compact_threshold
+            self.tasks = SqliteTasks(file_path) if self.database else []
+            self._tasks_by_id = {}
+            self._next_id = 1
+            self._journal_records = 0
+            # Heap of (-priority, due, task_id, version) entries for pending tasks
+            self._pending_heap = []
+            self._pending_count = 0
+            self._stale_entries = 0
+            # task id -> version of its newest heap entry; older entries for the task are stale
+            self._heap_versions = {}
+            # task id -> ids of the pending tasks waiting for it to be completed
+            self._dependents = collections.defaultdict(list)
+            # task id -> number of unfinished prerequisites, for pending tasks that are not ready
+            self._blocked = {}
+            # Sorted (due, task_id) pairs for date-range queries, built on first use
+            self._due_index = None
+            # Functions called with a task whenever it is added or changes (see add_listener)
+            self._listeners = []
+            # Text of tasks shown before, dropped whenever a task changes; database tasks are
+            # new objects on every read, which would never hit the cache
+            self._rendered = None if self.database else RenderCache()
+            self.metrics = Metrics("scheduler") if metrics_enabled(metrics) else None
+            if self.metrics is not None:
+                self.metrics.instrument(self, self.INSTRUMENTED)
+            with file_lock(self.lock_path) if shared else contextlib.nullcontext():
+                self._load_tasks()
 
         def _load_tasks(self):
-            """Loads tasks from the JSON file"""
-            if not os.path.exists(self.file_path):
+            """Loads tasks from the JSON or binary snapshot and replays the journal on top of it"""
+            if self.database:
+                # Tasks stay in the database and are queried on demand
+                return
+            self._snapshot_stamp = file_stamp(self.file_path)
+            if not os.path.exists(self.file_path) and not os.path.exists(self.journal_path):
                 print("Task file not found. Starting with an empty scheduler.")
                 return
             try:
-                with open(self.file_path, 'r') as f:
-                    data = json.load(f)
-                    self.tasks = [Task.from_dict(d) for d in data]
-            except (IOError, json.JSONDecodeError) as e:
+                if os.path.exists(self.file_path):
+                    for task in stream_tasks(self.file_path):
+                        self._register(task)
+                self._replay_journal()
+            except (IOError, ValueError, KeyError, SnapshotError) as e:
                 print(f"Error loading task file. {e} Starting with an emoty scheduler")
-                self.tasks = []
+                self._reset()
+
+        def _reset(self):
+            """Forgets every loaded task, before a failed or repeated load."""
+            self.tasks = []
+            self._tasks_by_id = {}
+            self._next_id = 1
+            self._pending_heap = []
+            self._pending_count = 0
+            self._stale_entries = 0
+            self._heap_versions = {}
+            self._dependents = collections.defaultdict(list)
+            self._blocked = {}
+            self._due_index = None
+            self._journal_records = 0
+            self._journal_offset = 0
+            if self._rendered is not None:
+                self._rendered.clear()
+
+        def _replay_journal(self):
+            """Applies every complete record of the journal after the part already read, in order."""
+            if not os.path.exists(self.journal_path):
+                return
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._journal_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # A torn last line means a writer crashed (or is still) mid-append; stop before it
+                        break
+                    self._apply(json.loads(line))
+                    self._journal_records += 1
+                    self._journal_offset += len(line)
+
+        def refresh(self):
+            """Catches up with changes other processes made to the task file (shared mode only)."""
+            with self._exclusive():
+                pass
+
+        def _catch_up(self):
+            """Applies what other processes wrote since we last read the files."""
+            if self.database:
+                return
+            if file_stamp(self.file_path) != self._snapshot_stamp:
+                # Another process compacted the journal into a new snapshot; reload it all
+                self._reset()
+                self._load_tasks()
+            else:
+                self._replay_journal()
+
+        @contextlib.contextmanager
+        def _exclusive(self):
+            """
+            In shared mode, holds the inter-process lock around a mutation: catches up
+            with other processes first, then writes our records before releasing it.
+            """
+            if not self.shared or self._lock_depth:
+                yield
+                return
+            with file_lock(self.lock_path):
+                self._lock_depth += 1
+                try:
+                    self._catch_up()
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    self._save_pending()
+
+        def _register(self, task):
+            """Adds a task to the in-memory collections, assigning an id if it has none."""
+            if self.database:
+                self.tasks.append(task)
+                self._notify(task)
+                return
+            if task.task_id is None:
+                task.task_id = self._next_id
+            self._next_id = max(self._next_id, task.task_id + 1)
+            self.tasks.append(task)
+            self._tasks_by_id[task.task_id] = task
+            if task.status == "Pending":
+                if self._link(task):
+                    self._push(task)
+                    self._pending_count += 1
+            else:
+                # Tasks loaded before it may be waiting for it
+                self._release(task)
+            if self._due_index is not None:
+                bisect.insort(self._due_index, (task.due, task.task_id))
+            self._notify(task)
+
+        def _link(self, task):
+            """Records which prerequisites a pending task waits for; returns True if it is ready."""
+            waiting = 0
+            for prerequisite in task.depends_on:
+                other = self._tasks_by_id.get(prerequisite)
+                # A prerequisite not loaded yet (later in the file) counts as unfinished until it is
+                if other is None or other.status == "Pending":
+                    self._dependents[prerequisite].append(task.task_id)
+                    waiting += 1
+            if waiting:
+                self._blocked[task.task_id] = waiting
+            return not waiting
+
+        def _unlink(self, task):
+            """Undoes _link before a task's prerequisites change."""
+            for prerequisite in task.depends_on:
+                dependents = self._dependents.get(prerequisite)
+                if dependents and task.task_id in dependents:
+                    dependents.remove(task.task_id)
+            self._blocked.pop(task.task_id, None)
+
+        def _release(self, task):
+            """Counts a completed task off every task waiting for it and queues those that become ready."""
+            for dependent_id in self._dependents.pop(task.task_id, ()):
+                waiting = self._blocked[dependent_id] - 1
+                if waiting:
+                    self._blocked[dependent_id] = waiting
+                    continue
+                del self._blocked[dependent_id]
+                dependent = self._tasks_by_id[dependent_id]
+                if dependent.status == "Pending":
+                    self._push(dependent)
+                    self._pending_count += 1
+                    self._notify(dependent)
+
+        def _apply(self, record):
+            """Applies a single journal record to the in-memory state."""
+            if self.database:
+                self.tasks.apply(record)
+                if self._listeners and record['op'] != "add":
+                    self._notify(self.tasks.get(record['id']))
+                    if record['op'] == "complete":
+                        for dependent in self.tasks.released_by(record['id']):
+                            self._notify(dependent)
+                return
+            op = record['op']
+            if op == "add":
+                task = Task.from_dict(record['task'])
+                # A crash between writing a snapshot and dropping the journal replays adds twice
+                if task.task_id in self._tasks_by_id:
+                    return
+                self._register(task)
+            elif op == "complete":
+                task = self._tasks_by_id[record['id']]
+                if task.status == "Pending":
+                    task.mark_complete()
+                    if task.task_id in self._blocked:
+                        # Completed ahead of its prerequisites; it had no heap entry
+                        self._unlink(task)
+                    else:
+                        self._pending_count -= 1
+                        self._mark_stale()
+                    self._release(task)
+                self._notify(task)
+            elif op == "edit":
+                task = self._tasks_by_id[record['id']]
+                # Every field is checked before the task changes, so a bad one leaves it as it was
+                fields = edit_fields(record['fields'])
+                if "priority" in fields:
+                    fields["priority"] = Priority[fields["priority"]]
+                if "depends_on" in fields:
+                    fields["depends_on"] = tuple(fields["depends_on"])
+                old_key = self._priority_key(task)
+                was_ready = task.task_id not in self._blocked
+                if "depends_on" in fields:
+                    self._unlink(task)
+                for field, value in fields.items():
+                    setattr(task, field, value)
+                ready = was_ready
+                if "depends_on" in record['fields'] and task.status == "Pending":
+                    ready = self._link(task)
+                new_key = self._priority_key(task)
+                if task.status == "Pending" and ready and (new_key != old_key or not was_ready):
+                    self._push(task)
+                    if was_ready:
+                        self._mark_stale()
+                    else:
+                        self._pending_count += 1
+                elif task.status == "Pending" and was_ready and not ready:
+                    self._pending_count -= 1
+                    self._mark_stale()
+                if self._due_index is not None and new_key[1] != old_key[1]:
+                    del self._due_index[bisect.bisect_left(self._due_index, (old_key[1], task.task_id))]
+                    bisect.insort(self._due_index, (task.due, task.task_id))
+                self._notify(task)
+
+        def add_listener(self, listener):
+            """
+            Calls listener(task) after every task is added, completed or edited,
+            including changes picked up from other processes by refresh(), and when a
+            completion releases a task (completes its last pending prerequisite).
+            """
+            self._listeners.append(listener)
+
+        def remove_listener(self, listener):
+            self._listeners.remove(listener)
+
+        def _notify(self, task):
+            if self._rendered is not None:
+                self._rendered.forget(task)
+            for listener in self._listeners:
+                listener(task)
+
+        @staticmethod
+        def _priority_key(task):
+            """Heap key: highest priority first, then earliest due date, then oldest task."""
+            return (-task.priority.value, task.due, task.task_id)
+
+        def _push(self, task):
+            """
+            Pushes a heap entry for a ready task. It gets a new version, so any entry
+            pushed for the task before is stale, even one with the same key.
+            """
+            version = self._heap_versions.get(task.task_id, 0) + 1
+            self._heap_versions[task.task_id] = version
+            heapq.heappush(self._pending_heap, self._priority_key(task) + (version,))
+
+        def _is_live(self, entry):
+            """Checks whether a heap entry is the newest one of a ready pending task."""
+            task = self._tasks_by_id[entry[2]]
+            return (task.status == "Pending" and self._heap_versions[task.task_id] == entry[3]
+                    and task.task_id not in self._blocked)
+
+        def _mark_stale(self):
+            """Counts a dead heap entry and rebuilds the heap once most entries are dead."""
+            self._stale_entries += 1
+            if self._stale_entries > self._pending_count:
+                self._pending_heap = [e for e in self._pending_heap if self._is_live(e)]
+                heapq.heapify(self._pending_heap)
+                self._stale_entries = 0
+
+        def _append_journal(self, record):
+            """Queues a mutation for the journal and writes it if the autosave policy is due."""
+            self._pending_records.append(record)
+            if self._batch_depth:
+                return
+            if self.autosave_every is not None and len(self._pending_records) >= self.autosave_every:
+                self._save_pending()
+            elif self.autosave_interval is not None and time.monotonic() - self._last_save >= self.autosave_interval:
+                self._save_pending()
+
+        def _save_pending(self):
+            """Hands the buffered records over for writing, compacting when the journal gets too long."""
+            if not self._pending_records:
+                return
+            if self.database:
+                self.compact()
+                return
+            self._journal_records += len(self._pending_records)
+            if self._journal_records >= self.compact_threshold:
+                self.compact()
+                return
+            with self._write_lock:
+                self._queued_records.extend(self._pending_records)
+            self._pending_records = []
+            self._last_save = time.monotonic()
+            self._submit()
+
+        def _submit(self):
+            """Writes the queued work now, or on the background writer if there is one."""
+            if self._writer is None:
+                self._write_queued()
+            else:
+                self._writer.submit(self._write_queued)
+
+        def _write_queued(self):
+            """Writes the queued snapshot (if any) and appends the queued journal records."""
+            with self._write_lock:
+                tasks, self._queued_snapshot = self._queued_snapshot, None
+                records, self._queued_records = self._queued_records, []
+            if tasks is not None:
+                write_tasks(self.file_path, tasks)
+                if self.metrics is not None:
+                    self.metrics.add_bytes(os.path.getsize(self.file_path))
+                # Only drop the journal once the snapshot containing it is written
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self.journal_path)
+                    fsync_directory(os.path.dirname(os.path.abspath(self.journal_path)))
+                self._snapshot_stamp = file_stamp(self.file_path)
+                self._journal_offset = 0
+            if records:
+                with open(self.journal_path, 'ab') as f:
+                    start = f.tell()
+                    f.writelines((json.dumps(record) + "\n").encode() for record in records)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._journal_offset = f.tell()
+                if self.metrics is not None:
+                    self.metrics.add_bytes(self._journal_offset - start)
+
+        def flush(self, wait=True):
+            """
+            Writes the buffered records and, unless wait is False, waits until
+            everything queued is on disk.
+            """
+            self._save_pending()
+            if wait:
+                self.wait_for_writes()
+
+        def wait_for_writes(self):
+            """Blocks until the background writer has written everything handed to it. Safe from any thread."""
+            if self._writer is not None:
+                self._writer.flush()
+
+        def close(self):
+            """Writes the buffered records and stops the background writer (or closes the database)."""
+            self._save_pending()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if self.database:
+                self.tasks.close()
+            export_path = os.environ.get(METRICS_FILE_ENV)
+            if self.metrics is not None and export_path:
+                self.metrics.export(export_path)
+
+        def stats(self):
+            """Returns the recorded metrics (empty unless metrics are on) plus the background writer's counters."""
+            stats = self.metrics.stats() if self.metrics is not None else {}
+            if self._writer is not None:
+                stats["writer"] = self._writer.stats()
+            return stats
+
+        def export_stats(self, file_path):
+            """Writes the metrics to file_path: JSON for .json files, Prometheus text otherwise."""
+            if self.metrics is None:
+                raise RuntimeError("metrics are not enabled for this scheduler")
+            self.metrics.export(file_path)
+
+        def _get_task(self, task_id):
+            """Returns the task with the given id, or None."""
+            return self.tasks.get(task_id) if self.database else self._tasks_by_id.get(task_id)
+
+        @contextlib.contextmanager
+        def batch(self):
+            """
+            Groups mutations into one unit of work: nothing is written while the
+            batch is open, and the journal is appended once when the outermost batch ends.
+            """
+            with self._exclusive():
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                    if not self._batch_depth:
+                        self._save_pending()
+
+        def compact(self):
+            """Folds the journal into a fresh snapshot and truncates the journal."""
+            if self.database:
+                # The database is always up to date; committing makes it durable
+                self.tasks.commit()
+                self._pending_records = []
+                self._last_save = time.monotonic()
+                return
+            # Tasks are edited in place, so the background writer gets copies as of now
+            tasks = self.tasks if self._writer is None else [copy.copy(t) for t in self.tasks]
+            with self._write_lock:
+                self._queued_snapshot = tasks
+                # The snapshot already contains every record queued so far
+                self._queued_records = []
+            self._pending_records = []
+            self._journal_records = 0
+            self._last_save = time.monotonic()
+            self._submit()
 
         def save_tasks(self):
             """Saves all tasks to the JSON file"""
-            data_to_save = [t.to_dict() for t in self.tasks]
-            with open(self.file_path, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
+            with self._exclusive():
+                self.compact()
             print("Tasks saved successfully.")
 
+        def _check_dependencies(self, depends_on, task_id=None):
+            """
+            Raises ValueError unless every prerequisite is an existing task other than
+            task_id, and (for an existing task) none of them already depends on it.
+            """
+            for prerequisite in depends_on:
+                if prerequisite == task_id:
+                    raise ValueError(f"task {task_id} cannot depend on itself")
+                if self._get_task(prerequisite) is None:
+                    raise ValueError(f"unknown prerequisite task {prerequisite}")
+            if task_id is None:
+                # A new task has nothing depending on it yet, so it cannot close a cycle
+                return
+            # Depth-first search through the prerequisites' own prerequisites
+            stack = list(depends_on)
+            seen = set(stack)
+            while stack:
+                task = self._get_task(stack.pop())
+                if task is None:
+                    continue
+                for prerequisite in task.depends_on:
+                    if prerequisite == task_id:
+                        raise ValueError(f"dependency cycle: task {task.task_id} already depends on task {task_id}")
+                    if prerequisite not in seen:
+                        seen.add(prerequisite)
+                        stack.append(prerequisite)
+
         def add_task(self, task):
-            """Adds a new task object and saves the list."""
-            self.tasks.append(task)
-            self.save_tasks()
-            print("\nTask added.")
+            """
+            Adds a new task object and appends it to the journal.
+            Raises ValueError if it depends on a task that does not exist.
+            """
+            with self._exclusive():
+                self._check_dependencies(task.depends_on)
+                task.task_id = None
+                self._register(task)
+                self._append_journal({"op": "add", "task": task.to_dict()})
+            print(f"\nTask #{task.task_id} added.")
+
+        def add_many(self, tasks):
+            """
+            Adds several tasks and writes their journal records in one append.
+            A task may depend on tasks added before it in the same call.
+            """
+            with self.batch():
+                count = 0
+                for task in tasks:
+                    self._check_dependencies(task.depends_on)
+                    task.task_id = None
+                    self._register(task)
+                    self._append_journal({"op": "add", "task": task.to_dict()})
+                    count += 1
+            print(f"\n{count} tasks added.")
+
+        def complete_task(self, task_id):
+            """Marks the task with the given id as complete and returns it (None if there is no such task)."""
+            with self._exclusive():
+                task = self._get_task(task_id)
+                if task is None:
+                    print("Invalid task number.")
+                    return None
+                record = {"op": "complete", "id": task_id}
+                self._apply(record)
+                self._append_journal(record)
+                if self.database:
+                    # Database tasks are rows, not live objects, so re-read the updated one
+                    task = self._get_task(task_id)
+            print(f"\nTask '{task.title}' marked as complete!")
+            return task
+
+        def edit_task(self, task_id, **fields):
+            """
+            Updates fields (title, description, due_date, priority, depends_on) of an existing task
+            and returns it (None if there is no such task).
+            Raises ValueError, leaving the task unchanged, for any other field, a bad value,
+            or prerequisites that do not exist or would form a cycle.
+            """
+            fields = edit_fields(fields)
+            with self._exclusive():
+                if self._get_task(task_id) is None:
+                    print("Invalid task number.")
+                    return None
+                if "depends_on" in fields:
+                    self._check_dependencies(fields["depends_on"], task_id)
+                record = {"op": "edit", "id": task_id, "fields": fields}
+                self._apply(record)
+                self._append_journal(record)
+                return self._get_task(task_id)
+
+        def next_task(self):
+            """Returns the highest-priority pending task (or None) in O(log N) amortized."""
+            if self.database:
+                top = self.tasks.top(1)
+                return top[0] if top else None
+            heap = self._pending_heap
+            while heap and not self._is_live(heap[0]):
+                heapq.heappop(heap)
+                self._stale_entries -= 1
+            return self._tasks_by_id[heap[0][2]] if heap else None
+
+        def top_tasks(self, k=None):
+            """
+            Returns the k highest-priority pending tasks in order (all of them if k is None).
+            Walks the heap from the root with a small frontier heap, so only the
+            entries near the top are visited instead of sorting every task.
+            """
+            if self.database:
+                return self.tasks.top(k)
+            if k is None:
+                k = self._pending_count
+            heap = self._pending_heap
+            result = []
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and len(result) < k:
+                entry, i = heapq.heappop(frontier)
+                if self._is_live(entry):
+                    result.append(self._tasks_by_id[entry[2]])
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+            return result
+
+        def is_blocked(self, task_id):
+            """Checks whether a pending task still waits on a prerequisite."""
+            if self.database:
+                return self.tasks.is_blocked(task_id)
+            return task_id in self._blocked
+
+        def blocked_tasks(self):
+            """Returns the pending tasks still waiting on a prerequisite, highest priority first."""
+            if self.database:
+                return self.tasks.blocked()
+            return sorted((self._tasks_by_id[task_id] for task_id in self._blocked), key=self._priority_key)
 
-        def view_task_by_priority(self):
+        def _pending_graph(self):
+            """Returns {task id: task} for the pending tasks; completed prerequisites are already satisfied."""
+            return {task.task_id: task for task in self.tasks if task.status == "Pending"}
+
+        def dependency_cycle(self):
+            """
+            Returns the ids of a cycle among the pending tasks' prerequisites, each
+            depending on the next and the last on the first, or [] if there is none.
+            Tasks on a cycle can never become ready; files edited by hand may contain one.
+            """
+            graph = self._pending_graph()
+            _, left = topological_order(graph)
+            if not left:
+                return []
+            # Every task left over waits on another left-over task, so following them must loop
+            left = set(left)
+            path = []
+            position = {}
+            task_id = next(iter(left))
+            while task_id not in position:
+                position[task_id] = len(path)
+                path.append(task_id)
+                task_id = next(p for p in graph[task_id].depends_on if p in left)
+            return path[position[task_id]:]
+
+        def critical_path(self, duration=None):
+            """
+            Returns (earliest finish, tasks) for the pending work: the finish time of
+            the longest chain of pending tasks when every task starts as soon as its
+            prerequisites are done, and the tasks on that chain in the order they run.
+            duration(task) gives a task's length (1 for every task by default).
+            Runs in O(V + E) over a topological order; raises ValueError on a cycle.
+            """
+            if duration is None:
+                duration = lambda task: 1
+            graph = self._pending_graph()
+            order, left = topological_order(graph)
+            if left:
+                raise ValueError(f"dependency cycle through tasks {self.dependency_cycle()}")
+            finish = {}
+            # task id -> the prerequisite that finishes last, i.e. the previous task on its longest chain
+            previous = {}
+            for task_id in order:
+                task = graph[task_id]
+                start, before = 0, None
+                for prerequisite in task.depends_on:
+                    end = finish.get(prerequisite)
+                    if end is not None and end > start:
+                        start, before = end, prerequisite
+                finish[task_id] = start + duration(task)
+                previous[task_id] = before
+            if not finish:
+                return 0, []
+            task_id = max(finish, key=finish.get)
+            total = finish[task_id]
+            chain = []
+            while task_id is not None:
+                chain.append(graph[task_id])
+                task_id = previous[task_id]
+            chain.reverse()
+            return total, chain
+
+        def tasks_due_between(self, start, end):
+            """
+            Returns the pending tasks due from start (inclusive) to end (exclusive) in
+            due-date order, e.g. tasks_due_between("2025-01-06", "2025-01-13") for a week.
+            Bisects a due-date index that is built on first use and kept up to date after.
+            """
+            start, end = parse_timestamp(start), parse_timestamp(end)
+            if self.database:
+                return self.tasks.due_between(format_timestamp(start), format_timestamp(end))
+            if self._due_index is None:
+                self._due_index = sorted((task.due, task.task_id) for task in self.tasks)
+            index = self._due_index
+            tasks = (self._tasks_by_id[task_id]
+                     for _, task_id in index[bisect.bisect_left(index, (start,)):bisect.bisect_left(index, (end,))])
+            return [task for task in tasks if task.status == "Pending"]
+
+        def view_task_by_priority(self, offset=0, limit=None, out=None):
             """
             Displays pending tasks sorted by priority (Critical > High > Medium > Low) and then by due date
+            (or the page of `limit` of them starting at `offset`) to out, sys.stdout by default.
+            Returns the displayed tasks so a menu number can be mapped back to a task.
             """
-            pending_tasks = [t for t in self.tasks if t.status == "Pending"]
-            # Re-sort to match the displayed view_tasks_by_priority order
-            sorted_tasks = sorted(
-                    pending_tasks,
-                    key=lambda t: (t.priority.value, t.due_date),
-                    reverse = True
-                    )
-            try:
-                #Get the actual Task object from the sorted list
-                task_to_compelete = sorted_tasks[task_index - 1]
-                # Now, find that *same* object in the main list and mark it complete
-                for t in self.tasks:
-                    if t is task_to_complete:
-                        t.mark_complete()
+            if self.shared:
+                self.refresh()
+            sorted_tasks = self.top_tasks(None if limit is None else offset + limit)[offset:]
+            if not sorted_tasks:
+                print("\nNo pending tasks.", file=out)
+                return sorted_tasks
+            render = str if self._rendered is None else self._rendered.renderer(len(sorted_tasks))
+            write_buffered((f"\n{i}. {render(task)}\n" for i, task in enumerate(sorted_tasks, start=offset + 1)), out)
+            return sorted_tasks
+
+class TimerWheel:
+    """
+    A hierarchical timing wheel holding timers keyed by id.
+    Level 0 has one slot per tick and every higher level has slots `slots`
+    times as wide. A timer goes into the lowest level whose span reaches its
+    due tick, so insert and cancel are O(1); when time crosses a slot boundary
+    of a higher level, that slot's timers are cascaded down a level. Timers
+    beyond the whole wheel wait in the top level and are re-placed as it turns.
+    Timers due in the same tick fire in order of due time, then rank.
+    Not thread-safe; DueTaskEngine guards it with a lock.
+    """
+    def __init__(self, tick=1.0, slots=64, levels=6, now=None):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        # Ticks covered by one slot at each level
+        self._widths = [slots ** level for level in range(levels)]
+        # Each slot maps key -> (due tick, due time, rank, payload)
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._counts = [0] * levels
+        # Bit i is set while level 0 slot i holds timers, to find the next one without scanning
+        self._occupied = 0
+        # key -> (level, slot), so a timer can be found and cancelled in O(1)
+        self._where = {}
+        # The last tick that has been processed
+        self._current = int((time.time() if now is None else now) // tick)
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def insert(self, key, when, rank=0, payload=None):
+        """Sets timer `key` to fire at time `when` (epoch seconds), replacing any earlier timer with that key."""
+        self.cancel(key)
+        # Never before `when`; a time already passed fires at the next tick
+        due = max(math.ceil(when / self.tick), self._current + 1)
+        self._place(key, (due, when, rank, payload))
+
+    def _place(self, key, entry):
+        delta = entry[0] - self._current
+        level = 0
+        while level < self.levels - 1 and delta >= self._widths[level + 1]:
+            level += 1
+        slot = (entry[0] // self._widths[level]) % self.slots
+        self._wheels[level][slot][key] = entry
+        self._counts[level] += 1
+        self._where[key] = (level, slot)
+        if not level:
+            self._occupied |= 1 << slot
+
+    def cancel(self, key):
+        """Removes timer `key`; returns False if there was no such timer."""
+        location = self._where.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        bucket = self._wheels[level][slot]
+        del bucket[key]
+        self._counts[level] -= 1
+        if not level and not bucket:
+            self._occupied &= ~(1 << slot)
+        return True
+
+    def _lowest_level(self):
+        for level, count in enumerate(self._counts):
+            if count:
+                return level
+
+    def _next_tick(self):
+        """Returns the next tick with work to do: an occupied level 0 slot or a cascade, or None if empty."""
+        if not self._where:
+            return None
+        level = self._lowest_level()
+        if level:
+            # Nothing can fire before that level's next slot boundary
+            width = self._widths[level]
+            return (self._current // width + 1) * width
+        # Rotate the occupancy bits so bit k stands for tick current + 1 + k
+        start = (self._current + 1) % self.slots
+        rotated = (self._occupied >> start) | (self._occupied << (self.slots - start))
+        offset = ((rotated & -rotated).bit_length() - 1) % self.slots
+        if len(self._where) > self._counts[0]:
+            # Higher levels must cascade at the next rotation
+            offset = min(offset, (self.slots - start) % self.slots)
+        return self._current + 1 + offset
+
+    def advance(self, now):
+        """Moves the wheel forward to time `now` and returns the expired (key, payload) pairs in firing order."""
+        target = int(now // self.tick)
+        expired = []
+        while True:
+            tick = self._next_tick()
+            if tick is None or tick > target:
+                break
+            self._current = tick
+            if tick % self.slots == 0:
+                self._cascade(1)
+            slot = tick % self.slots
+            bucket = self._wheels[0][slot]
+            if bucket:
+                self._wheels[0][slot] = {}
+                self._occupied &= ~(1 << slot)
+                self._counts[0] -= len(bucket)
+                for key in bucket:
+                    del self._where[key]
+                fired = sorted(bucket.items(), key=lambda item: (item[1][1], item[1][2]))
+                expired.extend((key, entry[3]) for key, entry in fired)
+        self._current = max(self._current, target)
+        return expired
+
+    def _cascade(self, level):
+        """Re-places the timers of the slot at `level` that the current tick has just entered."""
+        if level >= self.levels:
+            return
+        index = (self._current // self._widths[level]) % self.slots
+        if index == 0:
+            self._cascade(level + 1)
+        if not self._counts[level]:
+            return
+        bucket = self._wheels[level][index]
+        if not bucket:
+            return
+        self._wheels[level][index] = {}
+        self._counts[level] -= len(bucket)
+        for key, entry in bucket.items():
+            self._place(key, entry)
+
+    def next_deadline(self):
+        """Returns the earliest time at which advance() may have work to do, or None if the wheel is empty."""
+        tick = self._next_tick()
+        return None if tick is None else tick * self.tick
+
+class DueTaskEngine:
+    """
+    Fires callback(task) for every ready pending task of a Scheduler when it comes due.
+    A task blocked by a prerequisite is scheduled once the scheduler releases it.
+
+    Due dates are kept in a TimerWheel keyed by task id, so scheduling and
+    cancelling are O(1) even with a million pending tasks. The engine listens
+    to the scheduler: new tasks are scheduled, edited ones re-scheduled and
+    completed ones cancelled. One timer thread sleeps on a condition until the
+    wheel's next deadline (or until a task changes), so it never busy-waits.
+
+    Tasks due together fire highest priority first. Callbacks run on a thread
+    pool, or on a process pool with processes=True (the callback must then be
+    picklable), and at most `workers` of them are handed to the pool at a time.
+    A task that is already overdue when scheduled fires straight away; each
+    task fires once unless its due date is edited.
+    """
+    def __init__(self, scheduler, callback, workers=4, processes=False, tick=1.0):
+        import concurrent.futures # imported on first use to keep startup fast
+        self.scheduler = scheduler
+        self.callback = callback
+        self._wheel = TimerWheel(tick)
+        self._condition = threading.Condition()
+        pool = concurrent.futures.ProcessPoolExecutor if processes else concurrent.futures.ThreadPoolExecutor
+        self._executor = pool(max_workers=workers)
+        self._in_flight = threading.Semaphore(workers)
+        self._stopped = False
+        self._thread = None
+        # task id -> the due date it fired for, so a reload of the task file doesn't fire it again
+        self._fired = {}
+        self.fired = 0
+        self.failed = 0
+
+    def start(self):
+        """Schedules the scheduler's pending tasks and starts the timer thread."""
+        with self._condition:
+            self.scheduler.add_listener(self._task_changed)
+            for task in self.scheduler.top_tasks():
+                self._schedule(task)
+        self._thread = threading.Thread(target=self._run, name="task-timers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        """Stops firing tasks; with wait=True also waits for running callbacks."""
+        self.scheduler.remove_listener(self._task_changed)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __len__(self):
+        """Number of tasks waiting to come due."""
+        with self._condition:
+            return len(self._wheel)
+
+    def _schedule(self, task):
+        if self._fired.get(task.task_id) == task.due:
+            return
+        self._wheel.insert(task.task_id, local_timestamp(task.due), (-task.priority.value, task.task_id), task)
+
+    def _task_changed(self, task):
+        with self._condition:
+            # A blocked task is scheduled when the scheduler reports it released
+            if task.status == "Pending" and not self.scheduler.is_blocked(task.task_id):
+                self._schedule(task)
+            else:
+                self._wheel.cancel(task.task_id)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                due = []
+                while not self._stopped:
+                    now = time.time()
+                    due = self._wheel.advance(now)
+                    if due:
+                        for _, task in due:
+                            self._fired[task.task_id] = task.due
                         break
-                    self.save_tasks()
-                    print(f"\nTask '{task_to_complete.title}' narked as complete!")
-            except IndexError:
-                    print("Invalid task number.")
-            except Exception as e:
-                    print(f"An error occured: {e}")
+                    deadline = self._wheel.next_deadline()
+                    self._condition.wait(None if deadline is None else max(deadline - now, 0))
+                if self._stopped:
+                    return
+            for _, task in due:
+                self._dispatch(task)
+
+    def _dispatch(self, task):
+        # Blocks while `workers` callbacks are outstanding, so the pool's queue stays bounded
+        self._in_flight.acquire()
+        try:
+            future = self._executor.submit(self.callback, task)
+        except RuntimeError:
+            # The pool has been shut down
+            self._in_flight.release()
+            return
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._in_flight.release()
+        error = future.exception()
+        with self._condition:
+            if error is None:
+                self.fired += 1
+            else:
+                self.failed += 1
+        if error is not None:
+            print(f"Due-task callback failed: {error}")
+
+class TaskGraphRunner:
+    """
+    Works through a Scheduler's dependency graph: runs callback(task) for the
+    ready tasks, highest priority first, and marks each one complete when its
+    callback returns, which releases the tasks waiting on it.
+
+    Callbacks run on a thread pool, or on a process pool with processes=True
+    (the callback must then be picklable), and at most `workers` of them are
+    in flight; a worker that finishes is given the best task ready at that
+    moment. The scheduler itself is only used from the thread calling run(),
+    and the completions that arrive together are journaled as one batch.
+    A task whose callback raises stays pending, so its dependents stay blocked.
+    """
+    def __init__(self, scheduler, callback, workers=4, processes=False):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.workers = workers
+        self.processes = processes
+        self.completed = 0
+        self.failed = 0
+
+    def run(self):
+        """
+        Runs until no task is ready or in flight, and returns the number of tasks
+        completed and failed so far and the number left blocked (behind a failure or a cycle).
+        """
+        import concurrent.futures # imported on first use to keep startup fast
+        scheduler = self.scheduler
+        pool = concurrent.futures.ProcessPoolExecutor if self.processes else concurrent.futures.ThreadPoolExecutor
+        # future -> task, and the ids of tasks that are running or have failed, which stay ready
+        running = {}
+        skipped = set()
+        with pool(max_workers=self.workers) as executor:
+            while True:
+                free = self.workers - len(running)
+                if free:
+                    # The best ready tasks include the ones skipped, so ask for that many more
+                    for task in scheduler.top_tasks(len(skipped) + free):
+                        if task.task_id not in skipped:
+                            running[executor.submit(self.callback, task)] = task
+                            skipped.add(task.task_id)
+                if not running:
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                with scheduler.batch():
+                    for future in done:
+                        task = running.pop(future)
+                        error = future.exception()
+                        if error is None:
+                            scheduler.complete_task(task.task_id)
+                            skipped.discard(task.task_id)
+                            self.completed += 1
+                        else:
+                            print(f"Task callback failed for '{task.title}': {error}")
+                            self.failed += 1
+        return {"completed": self.completed, "failed": self.failed,
+                "blocked": len(scheduler.blocked_tasks())}
+
+def announce_due(task):
+    """Default DueTaskEngine callback for the command line."""
+    print(f"\nDue now: {task}")
+
+def run_due_tasks(file_path=TASK_FILE, workers=4):
+    """Announces pending tasks as they come due until interrupted, including tasks other processes add."""
+    scheduler = Scheduler(file_path, shared=True)
+    with DueTaskEngine(scheduler, announce_due, int(workers)) as engine:
+        print(f"Watching {len(engine)} pending tasks in {file_path}. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+                scheduler.refresh()
+        except KeyboardInterrupt:
+            pass
+    scheduler.close()
+
+class TaskServer:
+    """
+    Serves one in-memory Scheduler to many local clients with asyncio.
+
+    The protocol is line-delimited JSON in both directions. Each request is an
+    object with an "op":
+        {"op": "add", "title": ..., "due_date": "YYYY-MM-DD", "description": ..., "priority": "HIGH",
+         "depends_on": [1, 2]}             prerequisite ids are optional
+        {"op": "next"}                      highest-priority pending task (or null)
+        {"op": "complete", "id": 3}
+        {"op": "list", "limit": 10}         pending tasks by priority
+        {"op": "stats"}                     request and write counters
+    and each reply is {"ok": true, ...} or {"ok": false, "error": ...}. Any
+    "seq" value in a request is echoed back in its reply.
+
+    Clients may pipeline: requests on one connection are applied in the order
+    they arrive without waiting for earlier replies, and replies come back in
+    the same order. Everything runs on the event loop thread, so the scheduler
+    needs no locking.
+
+    Persistence is micro-batched. The scheduler only buffers journal records;
+    FLUSH_DELAY seconds after the first unsaved mutation, every mutation made
+    by any client in the meantime is handed to the background writer as one
+    append. Replies to add and complete are sent only once that write is on
+    disk, so an acknowledged mutation survives a crash.
+
+    asyncio is imported by the methods that need it, so the other commands start without it.
+    """
+    MUTATIONS = ("add", "complete")
+
+    def __init__(self, scheduler, flush_delay=FLUSH_DELAY):
+        self.scheduler = scheduler
+        self.flush_delay = flush_delay
+        # (future, reply) pairs for mutations waiting for the next write
+        self._waiting = []
+        self._flush_task = None
+        self._server = None
+        self.connections = 0
+        self.requests = 0
+        self.batches = 0
+
+    async def start(self, address=SERVER_ADDRESS):
+        """Starts listening on 'host:port' (TCP) or on a Unix socket path."""
+        import asyncio
+        host, sep, port = address.rpartition(":")
+        if sep and port.isdigit():
+            self._server = await asyncio.start_server(self._handle, host or None, int(port))
+        else:
+            self._server = await asyncio.start_unix_server(self._handle, address)
+        return self._server
+
+    async def serve_forever(self, address=SERVER_ADDRESS):
+        """Starts the server and runs until cancelled."""
+        server = await self.start(address)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """Stops listening and writes everything still buffered."""
+        if self._server is not None:
+            self._server.close()
+        self.scheduler.close()
+
+    async def _handle(self, reader, writer):
+        """Reads one client's requests and queues their replies in order."""
+        import asyncio
+        self.connections += 1
+        replies = asyncio.Queue()
+        sender = asyncio.create_task(self._send(replies, writer))
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    replies.put_nowait(self._dispatch(line))
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the stream limit; drop the client
+            pass
+        finally:
+            replies.put_nowait(None)
+            await sender
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _send(self, replies, writer):
+        """Writes replies as they complete, keeping request order."""
+        while (reply := await replies.get()) is not None:
+            response = await reply
+            writer.write((json.dumps(response) + "\n").encode())
+            # Replies already waiting go out in the same drain
+            if replies.empty():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    return
+
+    def _dispatch(self, line):
+        """Applies one request and returns a future for its reply."""
+        import asyncio
+        self.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            # The scheduler reports to the console; a server has no use for that
+            with contextlib.redirect_stdout(io.StringIO()):
+                response = self._execute(request)
+        except KeyError as e:
+            response = {"ok": False, "error": f"missing or invalid field {e}"}
+        except (ValueError, TypeError) as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            # A bug hit by one request must not end the client's session or lose its other replies
+            response = {"ok": False, "error": f"internal error: {e!r}"}
+        if "seq" in request:
+            response["seq"] = request["seq"]
+        if response["ok"] and request.get("op") in self.MUTATIONS:
+            self._waiting.append((future, response))
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_soon())
+        else:
+            future.set_result(response)
+        return future
+
+    @staticmethod
+    def _check_types(request, fields):
+        """Raises ValueError if a field of the request is present with the wrong JSON type."""
+        for field, kind, name in fields:
+            value = request.get(field)
+            # bool is an int subclass, but true/false are not ids or limits
+            if value is not None and (not isinstance(value, kind) or isinstance(value, bool)):
+                raise ValueError(f"field '{field}' must be {name}")
+
+    def _execute(self, request):
+        """Runs a request against the scheduler and returns the reply."""
+        op = request.get("op")
+        scheduler = self.scheduler
+        if op == "add":
+            self._check_types(request, (("title", str, "a string"), ("description", str, "a string"),
+                                        ("due_date", str, "a string"), ("priority", str, "a string"),
+                                        ("depends_on", list, "a list of task ids")))
+            priority = request.get("priority", "MEDIUM")
+            if priority.upper() not in Priority.__members__:
+                raise ValueError(f"invalid priority {priority!r}")
+            task = Task(request["title"], request.get("description", ""), request["due_date"], priority,
+                        request.get("depends_on", ()))
+            scheduler.add_task(task)
+            return {"ok": True, "task": task.to_dict()}
+        if op == "complete":
+            self._check_types(request, (("id", int, "a task id"),))
+            task = scheduler.complete_task(request["id"])
+            if task is None:
+                return {"ok": False, "error": f"no task with id {request['id']}"}
+            return {"ok": True, "task": task.to_dict()}
+        if op == "next":
+            task = scheduler.next_task()
+            return {"ok": True, "task": None if task is None else task.to_dict()}
+        if op == "list":
+            self._check_types(request, (("limit", int, "a whole number"),))
+            return {"ok": True, "tasks": [t.to_dict() for t in scheduler.top_tasks(request.get("limit"))]}
+        if op == "stats":
+            return {"ok": True, "connections": self.connections, "requests": self.requests,
+                    "batches": self.batches, **scheduler.stats()}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    async def _flush_soon(self):
+        """
+        Writes every mutation made during the flush delay in one go, then releases their replies.
+        Every waiting reply is resolved whatever happens: with its response once the write is
+        done, else with an error reply, so that no client waits forever.
+        """
+        import asyncio
+        waiting = None
+        error = "the server stopped before saving"
+        try:
+            await asyncio.sleep(self.flush_delay)
+            waiting, self._waiting = self._waiting, []
+            self._flush_task = None
+            self.batches += 1
+            self.scheduler.flush(wait=False)
+            await asyncio.get_running_loop().run_in_executor(None, self.scheduler.wait_for_writes)
+            error = None
+        except OSError as e:
+            error = f"could not save: {e}"
+        except Exception as e:
+            error = f"internal error: {e!r}"
+        finally:
+            if waiting is None:
+                # Cancelled during the delay, before taking the waiting replies
+                waiting, self._waiting = self._waiting, []
+                self._flush_task = None
+            for future, response in waiting:
+                if error is not None:
+                    seq = {"seq": response["seq"]} if "seq" in response else {}
+                    response = {"ok": False, "error": error, **seq}
+                if not future.done():
+                    future.set_result(response)
+
+async def serve(file_path=TASK_FILE, address=SERVER_ADDRESS, flush_delay=FLUSH_DELAY):
+    """Runs a TaskServer for the given task file until interrupted."""
+    scheduler = Scheduler(file_path, autosave_every=None, background=True)
+    server = TaskServer(scheduler, flush_delay)
+    print(f"Serving {file_path} on {address}")
+    try:
+        await server.serve_forever(address)
+    finally:
+        server.close()
 
 def get_task_details():
         """Helper function to get task details from the user."""
@@ -137,7 +1765,7 @@ def get_task_details():
         while True:
             due_date_str = input("Enter due date (YYYY-MM-DD): ")
             try:
-                datetime.strptime(due_date_str, "%Y-%m-%d")
+                parse_timestamp(due_date_str)
                 break
             except ValueError:
                 print("Invalid date format. Please use YYY-MM-DD.")
@@ -149,9 +1777,9 @@ def get_task_details():
             print("Invalid priority. Please choose form the list.")
         return Task(title, description, due_date_str, priority_level)
 
-def main():
+def main(file_path=TASK_FILE):
         """The main function to run the command-line interface."""
-        scheduler = Scheduler(TASK_FILE)
+        scheduler = Scheduler(file_path, shared=True)
         print("Welcome to your Simple Taks Scheduler!")
 
         while True:
@@ -168,18 +1796,184 @@ def main():
             elif choice == '2':
                 scheduler.view_task_by_priority()
             elif choice == '3':
-                scheduler.view_task_by_priority()
-                if [t for t in scheduler.tasks if t.status == "Pending"]:
+                shown = scheduler.view_task_by_priority()
+                if shown:
                     try:
                         task_num = int(input("Enter the number of the task to mark complete: "))
-                        scheduler.complete_task(task_num)
+                        if 1 <= task_num <= len(shown):
+                            scheduler.complete_task(shown[task_num - 1].task_id)
+                        else:
+                            print("Invalid task number.")
                     except ValueError:
                         print("Please enter a valid number.")
             elif choice == '4':
                 print("Saving tasks and exiting. Goodbye!")
+                # Like the command line: write what's buffered to the journal, without rewriting the task file
+                try:
+                    scheduler.close()
+                except OSError as e:
+                    print(f"Error saving tasks: {e}")
                 break
             else:
                 print("Invalid choice. Please enter a number from 1 to 4.")
 
+def print_tasks(tasks, empty):
+    """Prints tasks for the command line in a few large writes, or `empty` if there are none."""
+    if not tasks:
+        print(empty)
+        return
+    write_buffered(f"\n{task}\n" for task in tasks)
+
+def command_add(scheduler, args):
+    scheduler.add_task(Task(args.title, args.description, args.due, args.priority, args.depends_on))
+
+def command_complete(scheduler, args):
+    return 0 if scheduler.complete_task(args.id) is not None else 1
+
+def command_edit(scheduler, args):
+    fields = {"title": args.title, "description": args.description, "due_date": args.due,
+              "priority": args.priority, "depends_on": args.depends_on}
+    fields = {field: value for field, value in fields.items() if value is not None}
+    if not fields:
+        raise ValueError("nothing to change; give at least one of the options")
+    task = scheduler.edit_task(args.id, **fields)
+    if task is None:
+        return 1
+    print(task)
+
+def command_next(scheduler, args):
+    task = scheduler.next_task()
+    print("No pending tasks." if task is None else task)
+
+def command_list(scheduler, args):
+    scheduler.view_task_by_priority(args.offset, args.limit)
+
+def command_due(scheduler, args):
+    print_tasks(scheduler.tasks_due_between(args.start, args.end), "No pending tasks due then.")
+
+def command_blocked(scheduler, args):
+    print_tasks(scheduler.blocked_tasks(), "No blocked tasks.")
+
+def command_critical_path(scheduler, args):
+    finish, chain = scheduler.critical_path()
+    if not chain:
+        print("No pending tasks.")
+        return
+    print(f"Longest chain of pending tasks ({finish} long), in the order they must run:")
+    write_buffered(f"  #{task.task_id} {task.title}\n" for task in chain)
+
+def command_convert(args):
+    convert_tasks(args.source, args.target)
+
+def command_run(args):
+    run_due_tasks(args.file, args.workers)
+
+def command_serve(args):
+    import asyncio
+    try:
+        asyncio.run(serve(args.file, args.address))
+    except KeyboardInterrupt:
+        pass
+
+def date_text(text):
+    """argparse type for dates: checks the text parses and returns it unchanged."""
+    try:
+        parse_timestamp(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"needs a date as YYYY-MM-DD, got '{text}'")
+    return text
+
+def build_parser():
+    """Builds the argparse parser for the command line; every command sets `handler` or `standalone`."""
+    parser = argparse.ArgumentParser(prog="simple-task.py", description="Schedules tasks by priority, "
+                                     "due date and dependencies. Run without a command for the interactive menu.")
+    parser.add_argument("-f", "--file", default=TASK_FILE,
+                        help=f"task file: JSON, .snap or .db/.sqlite (default {TASK_FILE})")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    priorities = [p.name for p in Priority]
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("title")
+    add.add_argument("--due", type=date_text, required=True, help="due date, YYYY-MM-DD")
+    add.add_argument("--priority", type=str.upper, choices=priorities, default="MEDIUM")
+    add.add_argument("--description", default="")
+    add.add_argument("--depends-on", type=int, nargs="+", default=(), metavar="ID",
+                     help="ids of tasks that must be completed first")
+    add.set_defaults(handler=command_add)
+
+    complete = commands.add_parser("complete", help="mark a task complete")
+    complete.add_argument("id", type=int)
+    complete.set_defaults(handler=command_complete)
+
+    edit = commands.add_parser("edit", help="change fields of a task")
+    edit.add_argument("id", type=int)
+    edit.add_argument("--title")
+    edit.add_argument("--description")
+    edit.add_argument("--due", type=date_text, help="due date, YYYY-MM-DD")
+    edit.add_argument("--priority", type=str.upper, choices=priorities)
+    edit.add_argument("--depends-on", type=int, nargs="*", metavar="ID",
+                      help="replaces the prerequisites (none given clears them)")
+    edit.set_defaults(handler=command_edit)
+
+    commands.add_parser("next", help="show the highest-priority ready task").set_defaults(handler=command_next)
+
+    listing = commands.add_parser("list", help="list ready tasks by priority")
+    listing.add_argument("--offset", type=count, default=0)
+    listing.add_argument("--limit", type=count)
+    listing.set_defaults(handler=command_list)
+
+    due = commands.add_parser("due", help="list pending tasks due from START up to END")
+    due.add_argument("start", type=date_text, help="YYYY-MM-DD")
+    due.add_argument("end", type=date_text, help="YYYY-MM-DD (not included)")
+    due.set_defaults(handler=command_due)
+
+    commands.add_parser("blocked", help="list tasks waiting on prerequisites").set_defaults(handler=command_blocked)
+    commands.add_parser("critical-path", help="show the longest chain of pending tasks").set_defaults(
+            handler=command_critical_path)
+
+    batch = commands.add_parser("batch", help="run commands from a file or stdin, one per line, "
+                                "with a single load and a single write")
+    batch.add_argument("script", nargs="?", default="-", help="command file, or - for stdin (the default)")
+    batch.set_defaults(handler=command_batch, parser=parser)
+
+    convert = commands.add_parser("convert", help="copy a task file into another format")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    convert.set_defaults(standalone=command_convert)
+
+    run = commands.add_parser("run", help="announce tasks as they come due until interrupted")
+    run.add_argument("workers", nargs="?", type=int, default=4)
+    run.set_defaults(standalone=command_run)
+
+    server = commands.add_parser("serve", help="serve the task file to local clients (see TaskServer)")
+    server.add_argument("address", nargs="?", default=SERVER_ADDRESS, help="host:port or a Unix socket path")
+    server.set_defaults(standalone=command_serve)
+    return parser
+
+def cli(argv=None):
+    """Runs the command line and returns the exit status; without a command it starts the interactive menu."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        main(args.file)
+        return 0
+    try:
+        if getattr(args, "standalone", None) is not None:
+            return args.standalone(args) or 0
+        # One load, and one write when the outermost batch ends; shared, since cron jobs may overlap
+        scheduler = Scheduler(args.file, autosave_every=None, shared=True)
+        try:
+            with scheduler.batch():
+                return run_command(scheduler, args)
+        finally:
+            scheduler.close()
+    except BrokenPipeError:
+        # The reader (e.g. head) stopped early; keep the exit quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -0,0 +1,575 @@
+"""
+Helpers shared by the three apps (Simple-Task-Scheduler, Personal_Budget_Tracker
+and Recipe-Manager): streaming JSON arrays, the binary snapshot format, atomic
+writes and file locks, opt-in metrics, buffered rendering, background saves
+and the command-line batch runner. Each app puts this directory on sys.path
+and imports what it uses from here.
+"""
+import argparse
+import bisect
+import collections
+import contextlib
+import functools
+import itertools
+import json
+import mmap
+import os
+import re
+import shlex
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError: # advisory file locking is only available on POSIX
+    fcntl = None
+
+# Characters read at a time when streaming a data file
+CHUNK_SIZE = 1 << 16
+# Data files with this extension use the binary snapshot format instead of JSON
+SNAPSHOT_EXTENSION = '.snap'
+# magic, record count, string count, offsets table position, string pool position
+SNAPSHOT_HEADER = struct.Struct("<8sIIQQ")
+# Data files with these extensions are SQLite databases
+DATABASE_EXTENSIONS = ('.db', '.sqlite')
+# Processes sharing a data file take turns by locking this file next to it
+LOCK_SUFFIX = '.lock'
+# Set to 1 to record per-operation counters and latencies in the managers (see Metrics)
+METRICS_ENV = 'APP_METRICS'
+# If set as well, managers write their metrics to this file when closed (.json, else Prometheus text)
+METRICS_FILE_ENV = 'APP_METRICS_FILE'
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+# Characters of rendered output collected before each write to the console
+RENDER_BUFFER_SIZE = 1 << 16
+# Rendered records whose text is kept for the next listing (see RenderCache)
+RENDER_CACHE_SIZE = 100_000
+# The rest of a JSON array element up to the whitespace, ',' or ']' after it
+JSON_ELEMENT_END = re.compile(r"[^ \t\r\n,\]]*[ \t\r\n,\]]")
+# The process umask, read once at import: os.umask() can only be read by setting it,
+# which would race with files created by the background writer thread
+UMASK = os.umask(0o022)
+os.umask(UMASK)
+
+def iter_json_array(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the elements of a top-level JSON array one at a time.
+    The file is read in chunks and each element is decoded as soon as it is
+    complete, so memory use depends on the largest element, not the file size.
+    Anything but whitespace after the closing ']' is an error, as in json.load.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as f:
+        buf, pos, eof = "", 0, False
+
+        def refill():
+            # Keeps the unparsed tail of the buffer and reads the next chunk after it
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        def next_char():
+            # Skips whitespace and returns the next character ('' at the end of the file)
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                refill()
+
+        if next_char() != "[":
+            raise json.JSONDecodeError("Expecting '[' at the start of the file", buf, pos)
+        pos += 1
+        separator = next_char()
+        if separator == "]":
+            pos += 1
+        while separator != "]":
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A number or literal cut off by the end of the buffer (even just after
+                    # its '.') may continue in the next chunk, so wait for the delimiter after it
+                    if eof or JSON_ELEMENT_END.match(buf, end):
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                refill()
+            pos = end
+            yield value
+            separator = next_char()
+            if separator not in (",", "]"):
+                raise json.JSONDecodeError("Expecting ',' or ']'", buf, pos)
+            pos += 1
+        if next_char():
+            raise json.JSONDecodeError("Extra data after the closing ']'", buf, pos)
+
+class SnapshotError(Exception):
+    """Raised when a binary snapshot file is truncated or not a snapshot at all."""
+
+class StringPool:
+    """Gives every distinct string an index while a snapshot is being written."""
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def add(self, text):
+        """Returns the index of text, adding it to the pool if it is new."""
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+def is_database(file_path):
+    """Checks whether a data file is an SQLite database (by extension)."""
+    return file_path.endswith(DATABASE_EXTENSIONS)
+
+def is_snapshot(file_path):
+    """Checks whether a data file uses the binary snapshot format (by extension)."""
+    return file_path.endswith(SNAPSHOT_EXTENSION)
+
+def write_snapshot(file_path, records, magic):
+    """
+    Writes records to a binary snapshot file whose header starts with magic.
+    Layout: header, record bodies (each from record.to_record(pool)), an offsets
+    table with the start of every record plus the end of the last one, then the
+    string pool as a table of offsets followed by the UTF-8 bytes of every string.
+    """
+    pool = StringPool()
+    offsets = []
+    with atomic_open(file_path, 'wb') as f:
+        position = f.write(bytes(SNAPSHOT_HEADER.size))
+        for record in records:
+            offsets.append(position)
+            position += f.write(record.to_record(pool))
+        offsets.append(position)
+        offsets_position = position
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        strings_position = f.tell()
+        encoded = [text.encode('utf-8') for text in pool.strings]
+        string_offsets = itertools.accumulate(map(len, encoded), initial=0)
+        f.write(struct.pack(f"<{len(encoded) + 1}Q", *string_offsets))
+        f.write(b"".join(encoded))
+        f.seek(0)
+        f.write(SNAPSHOT_HEADER.pack(magic, len(offsets) - 1, len(encoded),
+                                     offsets_position, strings_position))
+
+class Snapshot:
+    """
+    A read-only, memory-mapped view of a binary snapshot file.
+    Opening it only reads the header; each record is decoded by `decode`
+    (a from_record function) when it is accessed, and strings are read from
+    the pool on demand. The file must start with magic, or one of the older
+    magics in legacy; the one found is kept as `magic`.
+    """
+    def __init__(self, file_path, decode, magic, legacy=()):
+        self._decode = decode
+        with open(file_path, 'rb') as f:
+            try:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e: # mmap refuses empty files
+                raise SnapshotError(f"{file_path} is not a valid snapshot: {e}")
+        if len(self.buffer) < SNAPSHOT_HEADER.size:
+            self.close()
+            raise SnapshotError(f"{file_path} is too short to be a snapshot")
+        header = SNAPSHOT_HEADER.unpack_from(self.buffer)
+        self.magic, self._count, string_count, self._offsets_position, self._strings_position = header
+        if self.magic != magic and self.magic not in legacy:
+            self.close()
+            raise SnapshotError(f"{file_path} is not a {magic.decode()} snapshot")
+        self._blob_position = self._strings_position + 8 * (string_count + 1)
+
+    def string(self, index):
+        """Returns the string with the given index in the pool."""
+        start, end = struct.unpack_from("<2Q", self.buffer, self._strings_position + 8 * index)
+        return self.buffer[self._blob_position + start:self._blob_position + end].decode('utf-8')
+
+    def __len__(self):
+        return self._count
+
+    def offset(self, i):
+        """Returns the position of record i in the buffer."""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("snapshot record index out of range")
+        return struct.unpack_from("<Q", self.buffer, self._offsets_position + 8 * i)[0]
+
+    def __getitem__(self, i):
+        return self._decode(self, self.offset(i))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_snapshot(file_path, decode, magic, start=0, stop=None, legacy=()):
+    """Yields records start..stop of a snapshot, jumping straight to the first one."""
+    with Snapshot(file_path, decode, magic, legacy) as snapshot:
+        for i in range(*slice(start, stop).indices(len(snapshot))):
+            yield snapshot[i]
+
+@contextlib.contextmanager
+def atomic_open(file_path, mode='w'):
+    """
+    Opens a temporary file next to file_path for writing. When the block ends
+    the file is fsynced and renamed over file_path, so a crash mid-write leaves
+    the previous version intact instead of a truncated file. A new file gets
+    the permissions open() would give it (0o666 less the umask).
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(file_path) + '.', suffix='.tmp')
+    try:
+        # mkstemp creates owner-only files; keep the permissions the user had
+        if os.path.exists(file_path):
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o777)
+        else:
+            os.chmod(temp_path, 0o666 & ~UMASK)
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+
+def fsync_directory(directory):
+    """Makes a rename or delete in directory durable (a no-op where directories can't be opened)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+@contextlib.contextmanager
+def file_lock(lock_path):
+    """
+    Holds an exclusive advisory lock (fcntl.flock) on lock_path for the duration
+    of the block; other processes locking the same path wait until it is released.
+    The data file itself is replaced on every atomic save, so a separate lock
+    file is used. Without fcntl (e.g. on Windows) this does nothing.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def file_stamp(file_path):
+    """Returns a version stamp that changes whenever the file is rewritten (None if it is missing)."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def metrics_enabled(flag=None):
+    """Resolves a manager's `metrics` argument: True/False wins, None defers to the APP_METRICS variable."""
+    if flag is not None:
+        return flag
+    return os.environ.get(METRICS_ENV, "").lower() not in ("", "0", "false", "no")
+
+class Metrics:
+    """
+    Counters and latency histograms per operation, for opt-in instrumentation.
+    instrument() replaces chosen methods of one object with timed wrappers
+    stored on the instance, so a manager created without metrics keeps calling
+    its plain methods and pays nothing. Recording is thread-safe, since
+    background saves are timed on the writer thread.
+    """
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # method name -> {"kind", "count", "errors", "seconds", "max_seconds", "buckets"}
+        self._operations = {}
+        self.bytes_written = 0
+
+    def instrument(self, target, kinds):
+        """Times target's methods; kinds maps each method name to its kind (load, save, add, query, render...)."""
+        for name, kind in kinds.items():
+            setattr(target, name, self._timed(name, kind, getattr(target, name)))
+
+    def _timed(self, name, kind, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.record(name, kind, time.perf_counter() - start, failed)
+        return timed
+
+    def record(self, name, kind, seconds, failed=False):
+        """Counts one call of an operation that took `seconds`."""
+        with self._lock:
+            operation = self._operations.get(name)
+            if operation is None:
+                operation = self._operations[name] = {"kind": kind, "count": 0, "errors": 0, "seconds": 0.0,
+                                                      "max_seconds": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+            operation["count"] += 1
+            operation["errors"] += failed
+            operation["seconds"] += seconds
+            operation["max_seconds"] = max(operation["max_seconds"], seconds)
+            operation["buckets"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def add_bytes(self, count):
+        """Counts bytes written to the data files."""
+        with self._lock:
+            self.bytes_written += count
+
+    def stats(self):
+        """Returns a snapshot: per operation its kind, count, errors, total/mean/max ms and latency histogram."""
+        with self._lock:
+            operations = {}
+            for name, operation in self._operations.items():
+                bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+                operations[name] = {
+                        "kind": operation["kind"],
+                        "count": operation["count"],
+                        "errors": operation["errors"],
+                        "total_ms": operation["seconds"] * 1000,
+                        "mean_ms": operation["seconds"] * 1000 / operation["count"],
+                        "max_ms": operation["max_seconds"] * 1000,
+                        "histogram": dict(zip(bounds, operation["buckets"])),
+                        }
+            return {"operations": operations, "bytes_written": self.bytes_written}
+
+    def to_prometheus(self):
+        """Renders the metrics in the Prometheus text exposition format."""
+        metric = f"{self.prefix}_operation_seconds"
+        lines = [f"# HELP {metric} Latency of {self.prefix} operations.", f"# TYPE {metric} histogram"]
+        with self._lock:
+            for name, operation in sorted(self._operations.items()):
+                labels = f'method="{name}",kind="{operation["kind"]}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), operation["buckets"]):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{metric}_sum{{{labels}}} {operation['seconds']}")
+                lines.append(f"{metric}_count{{{labels}}} {operation['count']}")
+            errors = f"{self.prefix}_operation_errors_total"
+            lines += [f"# HELP {errors} Operations that raised.", f"# TYPE {errors} counter"]
+            lines += [f'{errors}{{method="{name}",kind="{operation["kind"]}"}} {operation["errors"]}'
+                      for name, operation in sorted(self._operations.items())]
+            written = f"{self.prefix}_written_bytes_total"
+            lines += [f"# HELP {written} Bytes written to the data files.", f"# TYPE {written} counter",
+                      f"{written} {self.bytes_written}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_path):
+        """Writes a snapshot of the metrics to file_path: JSON for .json files, Prometheus text otherwise."""
+        text = json.dumps(self.stats(), indent=4) if file_path.endswith(".json") else self.to_prometheus()
+        with atomic_open(file_path) as f:
+            f.write(text)
+
+def write_buffered(chunks, out=None, buffer_size=RENDER_BUFFER_SIZE):
+    """
+    Writes an iterable of strings to out (sys.stdout by default), joined into
+    writes of about buffer_size characters instead of one call per line.
+    """
+    out = sys.stdout if out is None else out
+    parts = []
+    size = 0
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            out.write("".join(parts))
+            parts = []
+            size = 0
+    if parts:
+        out.write("".join(parts))
+    out.flush()
+
+class RenderCache:
+    """
+    Keeps the rendered text of up to `size` records, keyed by the record object
+    itself, so listing the same records again skips formatting them. The owner
+    calls forget(record) when a record changes; when full, the oldest entry goes.
+    """
+    def __init__(self, render=str, size=RENDER_CACHE_SIZE):
+        self._render = render
+        self.size = size
+        self._texts = collections.OrderedDict()
+
+    def render(self, record):
+        """Returns the cached text of record, rendering and caching it if needed."""
+        text = self._texts.get(record)
+        if text is None:
+            text = self._texts[record] = self._render(record)
+            if len(self._texts) > self.size:
+                self._texts.popitem(last=False)
+        return text
+
+    def renderer(self, count):
+        """
+        Returns the function to render a listing of count records with: render if
+        they fit in the cache, else plain rendering, as they would only evict each other.
+        """
+        return self.render if count <= self.size else self._render
+
+    def forget(self, record):
+        self._texts.pop(record, None)
+
+    def clear(self):
+        self._texts.clear()
+
+class BackgroundWriter:
+    """
+    Runs save jobs on a background thread so the caller never waits for the disk.
+    Only the latest submitted job is kept: saves submitted while an earlier one
+    is still queued replace it, so a burst of saves turns into a single write.
+    A job that fails is reported by the next flush() or close().
+    """
+    def __init__(self, name):
+        self._condition = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._error = None
+        self.writes = 0
+        self.coalesced = 0
+        self.total_latency = 0.0
+        self.last_latency = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        """Queues job (a function with no arguments), replacing any job that hasn't started yet."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("BackgroundWriter is closed")
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = job
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                job, self._pending = self._pending, None
+                self._busy = True
+            start = time.perf_counter()
+            try:
+                job()
+            except Exception as e:
+                self._error = e
+            latency = time.perf_counter() - start
+            with self._condition:
+                self._busy = False
+                self.writes += 1
+                self.total_latency += latency
+                self.last_latency = latency
+                self._condition.notify_all()
+
+    def flush(self):
+        """Blocks until every submitted job has run, re-raising the last failure if there was one."""
+        with self._condition:
+            while self._pending is not None or self._busy:
+                self._condition.wait()
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Flushes and stops the writer thread."""
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            self._thread.join()
+
+    def stats(self):
+        """Returns the number of writes, coalesced saves and the write latency in seconds."""
+        with self._condition:
+            return {
+                    "writes": self.writes,
+                    "coalesced": self.coalesced,
+                    "last_latency": self.last_latency,
+                    "mean_latency": self.total_latency / self.writes if self.writes else None
+                    }
+
+def count(text):
+    """argparse type for counts and offsets: a whole number, 0 or more."""
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"needs a whole number >= 0, got '{text}'")
+    return value
+
+def command_batch(manager, args):
+    with contextlib.nullcontext(sys.stdin) if args.script == "-" else open(args.script) as lines:
+        failed = run_script(manager, args.parser, lines)
+    if failed:
+        print(f"{failed} command(s) failed.", file=sys.stderr)
+    return 1 if failed else 0
+
+def run_command(manager, args):
+    """Runs one parsed command against a loaded manager and returns its exit status."""
+    try:
+        return args.handler(manager, args) or 0
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+def run_script(manager, parser, lines):
+    """
+    Runs commands, one per line in command-line syntax without the program name
+    (# starts a comment), against an already loaded manager, so the whole script
+    costs one load and one write. Returns the number of commands that failed.
+    """
+    failed = 0
+    for number, line in enumerate(lines, start=1):
+        try:
+            words = shlex.split(line, comments=True)
+        except ValueError as e:
+            print(f"line {number}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        if not words:
+            continue
+        try:
+            args = parser.parse_args(words, argparse.Namespace(file=manager.file_path))
+        except SystemExit:
+            # argparse has already explained what is wrong with the line
+            print(f"line {number}: skipped", file=sys.stderr)
+            failed += 1
+            continue
+        if getattr(args, "handler", None) in (None, command_batch) or args.file != manager.file_path:
+            print(f"line {number}: '{words[0]}' cannot run inside a batch", file=sys.stderr)
+            failed += 1
+            continue
+        failed += run_command(manager, args) != 0
+    return failed
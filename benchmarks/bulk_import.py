@@ -0,0 +1,59 @@
+"""
+Shows how bulk imports scale when every add saves the file (the old behaviour)
+compared with add_many, which saves once. Doubling the import size should
+roughly quadruple the per-call time but only double the add_many time.
+
+Usage: python benchmarks/bulk_import.py [largest count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from common import load_app, make_recipe_dicts, make_task_dicts, make_transaction_dicts, quiet
+
+
+def timed(fn):
+    """Returns the wall-clock seconds fn takes, with its output silenced."""
+    start = time.perf_counter()
+    with quiet():
+        fn()
+    return time.perf_counter() - start
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sizes = [largest // 4, largest // 2, largest]
+    scheduler = load_app("scheduler")
+    budget = load_app("budget")
+    recipes = load_app("recipes")
+
+    def make_transactions(n):
+        return [(budget.Income if d["type"] == "income" else budget.Expense)(d["amount"], d["category"], d["date"])
+                for d in make_transaction_dicts(n)]
+
+    # name -> (manager factory, item factory, single-add method name)
+    cases = {
+        "Budget": (budget.Budget, make_transactions, "add_transaction"),
+        "RecipeManager": (recipes.RecipeManager,
+                          lambda n: [recipes.Recipe.from_dict(d) for d in make_recipe_dicts(n)], "add_recipe"),
+        "Scheduler": (scheduler.Scheduler,
+                      lambda n: [scheduler.Task.from_dict(d) for d in make_task_dicts(n)], "add_task"),
+        }
+
+    print(f"{'manager':<14} {'count':>7} {'per-call save':>14} {'add_many':>10}")
+    for name, (factory, make_items, add_one) in cases.items():
+        for n in sizes:
+            items = make_items(n)
+            with tempfile.TemporaryDirectory() as tmp:
+                with quiet():
+                    manager = factory(os.path.join(tmp, "one.json"))
+                one_by_one = timed(lambda: [getattr(manager, add_one)(item) for item in items])
+                with quiet():
+                    manager = factory(os.path.join(tmp, "many.json"))
+                batched = timed(lambda: manager.add_many(items))
+            print(f"{name:<14} {n:>7} {one_by_one:>12.3f} s {batched:>8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
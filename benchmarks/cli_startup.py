@@ -0,0 +1,178 @@
+"""
+Times the command lines of the three apps from a cold start, as a script or
+cron job would run them: a fresh interpreter per command against a file of
+100k records in each format (JSON, .snap and .db). Times --help (import and
+parser only), a read-only query and an add, checks that loading the module
+doesn't import the modules only some commands need, and checks that a
+`batch` of adds (one load, one write) costs about as much as a single add,
+and how it compares with running the adds one by one.
+Every timing is checked against the cold-start targets in each app's
+README.md.
+
+Usage: python benchmarks/cli_startup.py [records] [batch commands]
+"""
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import APP_PATHS, load_app, make_recipe_dicts, make_task_dicts, make_transaction_dicts, quiet
+
+FORMATS = (".json", ".snap", ".db")
+# Runs of each command; the best one is reported, as the others only add noise from the machine
+RUNS = 3
+# Modules that loading an app must not import: only the commands that need them do
+DEFERRED = ("asyncio", "concurrent.futures", "sqlite3", "numpy")
+# Cold-start targets in seconds for 100k records, as listed in each app's README.md
+HELP_TARGET = 0.15
+TARGETS = {
+        "scheduler": {"query": {".json": 2, ".snap": 2, ".db": 0.25},
+                      "add": {".json": 2, ".snap": 2, ".db": 0.25}},
+        "budget": {"query": {".json": 1.5, ".snap": 1.5, ".db": 0.75},
+                   "add": {".json": 3.5, ".snap": 2, ".db": 1}},
+        "recipes": {"query": {".json": 7, ".snap": 3, ".db": 0.25},
+                    "add": {".json": 15, ".snap": 10, ".db": 0.25}},
+        }
+
+
+def make_files(tmp, n):
+    """Writes n records of every app in every format; returns {app: {extension: path}}."""
+    scheduler, budget, recipes = load_app("scheduler"), load_app("budget"), load_app("recipes")
+    classes = {"income": budget.Income, "expense": budget.Expense}
+    records = {
+            "scheduler": (scheduler.write_tasks, [scheduler.Task.from_dict(d) for d in make_task_dicts(n)]),
+            "budget": (budget.write_transactions,
+                       [classes[d["type"]](d["amount"], d["category"], d["date"]) for d in make_transaction_dicts(n)]),
+            "recipes": (recipes.write_recipes, [recipes.Recipe.from_dict(d) for d in make_recipe_dicts(n)]),
+            }
+    paths = {}
+    for app, (write, items) in records.items():
+        paths[app] = {}
+        for extension in FORMATS:
+            paths[app][extension] = os.path.join(tmp, app + extension)
+            with quiet():
+                write(paths[app][extension], items)
+    return paths
+
+
+def commands(n):
+    """The read-only query and the add timed for each app; each add appends one record."""
+    recipe = make_recipe_dicts(n)[n // 2]["name"]
+    return {
+            "scheduler": {"query": ["next"], "add": ["add", "Call back", "--due", "2025-06-01"]},
+            "budget": {"query": ["balance"], "add": ["expense", "12.50", "food", "--date", "2025-06-01"]},
+            "recipes": {"query": ["show", recipe], "add": ["add", "Toast", "-i", "bread:2:slices", "-s", "Toast it"]},
+            }
+
+
+def run(app, args, stdin=None):
+    """Runs the app's command line in a fresh interpreter; returns (seconds, exit status, output)."""
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable, APP_PATHS[app], *args], input=stdin, capture_output=True, text=True)
+    return time.perf_counter() - start, done.returncode, done.stdout + done.stderr
+
+
+def best(app, args):
+    times = []
+    for _ in range(RUNS):
+        seconds, status, output = run(app, args)
+        if status != 0:
+            print(f"{app} {' '.join(args)} exited with {status}:\n{output[-500:]}")
+            return None
+        times.append(seconds)
+    return min(times)
+
+
+def deferred_imports(app):
+    """Names in DEFERRED that a fresh interpreter has imported after loading the app."""
+    code = ("import importlib.util, json, sys\n"
+            f"spec = importlib.util.spec_from_file_location('app', {APP_PATHS[app]!r})\n"
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+            f"print(json.dumps([m for m in {DEFERRED!r} if m in sys.modules]))")
+    done = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(done.stdout)
+
+
+def count_records(app, path):
+    module = load_app(app)
+    with quiet():
+        if app == "scheduler":
+            manager = module.Scheduler(path, autosave_every=None)
+            size = len(manager.tasks)
+        elif app == "budget":
+            manager = module.Budget(path, autosave_every=None)
+            size = len(manager.transactions)
+        else:
+            manager = module.RecipeManager(path, autosave_every=None)
+            size = len(manager.recipes)
+        manager.close()
+    return size
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    wrong = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        paths = make_files(tmp, n)
+        print(f"wrote {n} records per app in {', '.join(FORMATS)} in {time.perf_counter() - start:.1f} s "
+              f"(best of {RUNS} runs below)")
+        added = {app: {extension: 0 for extension in FORMATS} for app in paths}
+        for app, timed in commands(n).items():
+            found = deferred_imports(app)
+            if found:
+                print(f"{app}: loading the module imports {', '.join(found)}")
+                wrong += 1
+            help_time = best(app, ["--help"])
+            if help_time is None:
+                wrong += 1
+            else:
+                print(f"{app}: --help {help_time * 1000:.0f} ms")
+                wrong += help_time > HELP_TARGET
+            single = {}
+            for kind, args in timed.items():
+                cells = []
+                for extension in FORMATS:
+                    seconds = best(app, ["-f", paths[app][extension], *args])
+                    if seconds is None:
+                        wrong += 1
+                        continue
+                    if kind == "add":
+                        added[app][extension] += RUNS
+                        single[extension] = seconds
+                    target = TARGETS[app][kind][extension]
+                    over = seconds > target
+                    wrong += over
+                    cells.append(f"{extension} {seconds * 1000:.0f} ms" + (f" (over {target} s)" if over else ""))
+                print(f"  {kind:<5} {' '.join(args[:2]):<12} " + ", ".join(cells))
+
+            # A batch loads and writes once however many commands it has; one by one is only
+            # timed on .db, as the other formats take seconds per command at this size
+            script = (shlex.join(timed["add"]) + "\n") * batch_size
+            cells = []
+            for extension in FORMATS:
+                seconds, status, output = run(app, ["-f", paths[app][extension], "batch"], script)
+                if status != 0:
+                    print(f"{app} batch exited with {status}:\n{output[-500:]}")
+                    wrong += 1
+                    continue
+                added[app][extension] += batch_size
+                wrong += extension in single and seconds > 1.5 * single[extension]
+                cells.append(f"{extension} {seconds * 1000:.0f} ms")
+            print(f"  batch of {batch_size} adds: " + ", ".join(cells))
+            separate = sum(run(app, ["-f", paths[app][".db"], *timed["add"]])[0] for _ in range(batch_size))
+            added[app][".db"] += batch_size
+            print(f"  the same {batch_size} adds one by one: .db {separate * 1000:.0f} ms")
+            for extension in FORMATS:
+                wrong += count_records(app, paths[app][extension]) != n + added[app][extension]
+    print(f"mismatches: {wrong}")
+    print("OK" if not wrong else "FAILED")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Shared helpers for the benchmark scripts.
+The project scripts are loaded with the tests' load_app (tests/helpers.py),
+so benchmarks and tests run the apps the same way.
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests"))
+from helpers import APP_PATHS, REPO_ROOT, load_app
+
+CATEGORIES = ["food", "rent", "salary", "transport", "fun", "bills", "gifts", "health"]
+UNITS = ["g", "kg", "ml", "l", "cups", "tbsp", "tsp", "pcs"]
+INGREDIENTS = ["salt", "sugar", "flour", "egg", "milk", "butter", "rice", "onion",
+               "garlic", "tomato", "pepper", "oil", "chicken", "beef", "carrot", "potato"]
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silences the print() calls the managers make on every operation."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def make_task_dicts(n, seed=0):
+    """Generates n task dictionaries in the scheduler's JSON format."""
+    rng = random.Random(seed)
+    priorities = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+    return [{
+        "id": i + 1,
+        "title": f"Task {i}",
+        "description": f"Synthetic task number {i}",
+        "due_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "status": "Pending" if rng.random() < 0.7 else "Complete",
+        "priority": rng.choice(priorities),
+        } for i in range(n)]
+
+
+def make_transaction_dicts(n, seed=0):
+    """Generates n transaction dictionaries in the budget tracker's JSON format."""
+    rng = random.Random(seed)
+    return [{
+        "type": "income" if rng.random() < 0.3 else "expense",
+        "category": rng.choice(CATEGORIES),
+        "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+        "amount": round(rng.uniform(1, 500), 2),
+        } for _ in range(n)]
+
+
+def make_recipe_dicts(n, seed=0):
+    """Generates n recipe dictionaries in the recipe manager's JSON format."""
+    rng = random.Random(seed)
+    return [{
+        "name": f"Recipe {i} {rng.choice(INGREDIENTS)}",
+        "steps": [f"Step {s} of recipe {i}" for s in range(rng.randint(2, 6))],
+        "ingredients": [{
+            "name": name,
+            "quantity": str(rng.randint(1, 500)),
+            "unit": rng.choice(UNITS),
+            } for name in rng.sample(INGREDIENTS, rng.randint(2, 8))],
+        } for i in range(n)]
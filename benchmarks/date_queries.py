@@ -0,0 +1,61 @@
+"""
+Compares the typed-date paths with the string ones they replaced: parsing
+dates with parse_timestamp versus strptime, and date-range queries answered
+by bisecting the date index versus scanning every record.
+
+Usage: python benchmarks/date_queries.py [records]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from common import load_app, make_task_dicts, make_transaction_dicts, quiet
+
+
+def timed(fn, repeat=1):
+    """Returns the best wall-clock seconds of `repeat` runs of fn."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    scheduler = load_app("scheduler")
+    budget = load_app("budget")
+    transaction_dicts = make_transaction_dicts(n)
+    dates = [d["date"] for d in transaction_dicts]
+
+    strptime = timed(lambda: [datetime.strptime(d, "%Y-%m-%d %H:%M:%S") for d in dates])
+    fast = timed(lambda: [budget.parse_timestamp(d) for d in dates])
+    print(f"parse {n} dates:      strptime {strptime:.3f} s, parse_timestamp {fast:.3f} s")
+
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        tracker = budget.Budget(os.path.join(tmp, "budget.json"), autosave_every=None)
+        tracker.add_many((budget.Income if d["type"] == "income" else budget.Expense)(
+            d["amount"], d["category"], d["date"]) for d in transaction_dicts)
+        scan = timed(lambda: sum(t.sign * t.amount for t in tracker.transactions
+                                 if "2025-03-01" <= t.date < "2025-04-01"), 3)
+        tracker.get_range_total("2025-03-01", "2025-04-01")  # builds the index
+        indexed = timed(lambda: tracker.get_range_total("2025-03-01", "2025-04-01"), 3)
+        results = [("one month's total", scan, indexed)]
+
+        tasks = scheduler.Scheduler(os.path.join(tmp, "tasks.json"), autosave_every=None)
+        tasks.add_many(scheduler.Task.from_dict(d) for d in make_task_dicts(n))
+        scan = timed(lambda: [t for t in tasks.tasks
+                              if t.status == "Pending" and "2025-06-02" <= t.due_date < "2025-06-09"], 3)
+        tasks.tasks_due_between("2025-06-02", "2025-06-09")  # builds the index
+        indexed = timed(lambda: tasks.tasks_due_between("2025-06-02", "2025-06-09"), 3)
+        results.append(("one week's tasks", scan, indexed))
+    for label, scan, indexed in results:
+        print(f"{label + ':':<21} scan {scan * 1000:.1f} ms, date index {indexed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
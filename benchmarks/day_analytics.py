@@ -0,0 +1,95 @@
+"""
+Checks and times the budget's day-total analytics (Fenwick trees keyed by
+day) against scanning every transaction: balance as of a date, the total
+of a date range, and a year of 30-day rolling spending. Then adds back-dated
+transactions and removes some after the trees exist and checks again.
+
+Usage: python benchmarks/day_analytics.py [transactions]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import load_app, make_transaction_dicts, quiet
+
+
+def scan_totals(transactions, start, end):
+    """Income and expense cents of the transactions dated from start to end (exclusive), by scanning."""
+    income = expenses = 0
+    for t in transactions:
+        if start <= t.date < end:
+            if t.sign > 0:
+                income += round(t.amount * 100)
+            else:
+                expenses += round(t.amount * 100)
+    return income, expenses
+
+
+def check(app, budget, rng, rounds=20):
+    """Compares random day ranges and balances against scans; returns the number of mismatches."""
+    wrong = 0
+    for _ in range(rounds):
+        a, b = sorted(rng.sample(range(1, 366), 2))
+        start = app.day_text(app.day_ordinal("2025-01-01") + a - 1)
+        end = app.day_text(app.day_ordinal("2025-01-01") + b - 1)
+        income, expenses = scan_totals(budget.transactions, start, end)
+        totals = budget.get_day_range_totals(start, end)
+        wrong += (round(totals["income"] * 100), round(totals["expenses"] * 100)) != (income, expenses)
+        income, expenses = scan_totals(budget.transactions, "", app.day_text(app.day_ordinal(end) + 1))
+        wrong += round(budget.get_balance_as_of(end) * 100) != income - expenses
+    return wrong
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = load_app("budget")
+    rng = random.Random(0)
+    classes = {"income": app.Income, "expense": app.Expense}
+    tmp = tempfile.TemporaryDirectory()
+    with quiet():
+        budget = app.Budget(os.path.join(tmp.name, "budget.json"), autosave_every=None)
+        # make_transaction_dicts dates are random, so the budget is far from date order
+        budget.add_many(classes[d["type"]](d["amount"], d["category"], d["date"]) for d in make_transaction_dicts(n))
+
+    start = time.perf_counter()
+    scanned = scan_totals(budget.transactions, "2025-03-01", "2025-04-01")
+    scan_time = time.perf_counter() - start
+    start = time.perf_counter()
+    budget.get_day_range_totals("2025-03-01", "2025-04-01")
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        totals = budget.get_day_range_totals("2025-03-01", "2025-04-01")
+    query_time = (time.perf_counter() - start) / 1000
+    start = time.perf_counter()
+    series = budget.get_rolling_totals(30, "2025-01-01", "2026-01-01")
+    rolling_time = time.perf_counter() - start
+    print(f"{n} transactions: one month by scanning {scan_time * 1000:.1f} ms; day totals built in "
+          f"{build_time * 1000:.1f} ms, then {query_time * 1e6:.1f} us per range")
+    print(f"365-day series of 30-day spending: {rolling_time * 1000:.1f} ms")
+
+    wrong = (round(totals["income"] * 100), round(totals["expenses"] * 100)) != scanned
+    window = [t for t in budget.transactions if "2025-06-01" <= t.date < "2025-07-01"]
+    spent = sum(round(t.amount * 100) for t in window if t.sign < 0)
+    wrong += round(dict(series)["2025-06-30"] * 100) != spent
+    wrong += check(app, budget, rng)
+
+    with quiet():
+        # Back-dated, far-future and removed transactions after the trees exist
+        budget.add_many([app.Expense(rng.uniform(1, 100), "food", f"2024-{rng.randint(1, 12):02d}-15 12:00:00")
+                         for _ in range(1000)] + [app.Income(1000, "salary", "2031-01-01 00:00:00")])
+        for _ in range(100):
+            budget.remove_transaction(rng.randrange(len(budget.transactions)))
+    wrong += check(app, budget, rng)
+    wrong += round(budget.get_balance_as_of("2031-01-01") * 100) != round(budget.get_balance() * 100)
+    wrong += budget.get_balance_as_of("2023-12-31") != 0
+    tmp.cleanup()
+    print(f"mismatches: {wrong}")
+    print("OK" if not wrong else "FAILED")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Measures the scheduler's TimerWheel with a large number of pending timers
+(insert, cancel and advancing through all of them) and compares inserts with
+a heapq-based timer queue. Then runs a DueTaskEngine on real time with a few
+tasks due within the next seconds and checks that they fire in due order,
+highest priority first, and that completed tasks do not fire.
+
+Usage: python benchmarks/due_timers.py [timers]
+"""
+import heapq
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from common import load_app, quiet
+
+
+def timed(label, count, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f} s  {elapsed / count * 1e9:8.0f} ns/op")
+    return result
+
+
+def wheel_benchmark(app, n):
+    rng = random.Random(0)
+    now = time.time()
+    # Due times spread over the next year
+    whens = [now + rng.uniform(0, 365 * 86400) for _ in range(n)]
+    wheel = app.TimerWheel(tick=1.0, now=now)
+
+    def insert():
+        for key, when in enumerate(whens):
+            wheel.insert(key, when, key)
+
+    def heap_insert():
+        heap = []
+        for key, when in enumerate(whens):
+            heapq.heappush(heap, (when, key))
+
+    timed(f"wheel insert x{n}", n, insert)
+    timed(f"heapq push x{n}", n, heap_insert)
+    cancelled = n // 10
+    timed(f"wheel cancel x{cancelled}", cancelled, lambda: [wheel.cancel(k) for k in range(0, n, 10)])
+    expired = timed("wheel advance one year", n, lambda: wheel.advance(now + 366 * 86400))
+    in_order = all(whens[a] <= whens[b] for (a, _), (b, _) in zip(expired, expired[1:]))
+    print(f"expired {len(expired)} of {n - len(range(0, n, 10))} timers, in due order: {in_order}")
+    return len(expired) == n - len(range(0, n, 10)) and len(wheel) == 0
+
+
+def engine_check(app):
+    fired = []
+    lock = threading.Lock()
+
+    def record(task):
+        with lock:
+            fired.append(task.title)
+
+    soon = datetime.now().replace(microsecond=0) + timedelta(seconds=2)
+    later = soon + timedelta(seconds=1)
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        scheduler = app.Scheduler(os.path.join(tmp, "tasks.json"))
+        scheduler.add_task(app.Task("later", "", later.isoformat(" "), "critical"))
+        scheduler.add_task(app.Task("soon low", "", soon.isoformat(" "), "low"))
+        scheduler.add_task(app.Task("soon high", "", soon.isoformat(" "), "high"))
+        # The engine runs callbacks one at a time here so the firing order is visible
+        with app.DueTaskEngine(scheduler, record, workers=1):
+            scheduler.add_task(app.Task("completed", "", soon.isoformat(" "), "critical"))
+            scheduler.complete_task(4)
+            scheduler.add_task(app.Task("overdue", "", "2020-01-01", "medium"))
+            time.sleep((later - datetime.now()).total_seconds() + 1.5)
+        scheduler.close()
+    expected = ["overdue", "soon high", "soon low", "later"]
+    print(f"engine fired {fired}, expected {expected}")
+    return fired == expected
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    app = load_app("scheduler")
+    ok = wheel_benchmark(app, n) and engine_check(app)
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Compares opening a large recipe snapshot eagerly with RecipeManager(..., lazy=True):
+load time, memory held after loading, and lookups. Checks that the lazy book
+answers find, search and ingredient queries exactly like the eager one and
+that adding and saving through it keeps every recipe.
+
+Usage: python benchmarks/lazy_recipes.py [recipes]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import load_app, make_recipe_dicts, quiet
+
+
+def open_book(app, path, **options):
+    """Returns (manager, seconds to load, peak bytes allocated while loading a second copy)."""
+    start = time.perf_counter()
+    manager = app.RecipeManager(path, **options)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    app.RecipeManager(path, **options).close()
+    held = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return manager, elapsed, held
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = load_app("recipes")
+    recipes = make_recipe_dicts(n)
+    names = [recipes[i]["name"] for i in range(0, n, max(1, n // 1000))]
+    # Most sessions keep coming back to a few recipes
+    hot = names[:50] * 20
+    lines = []
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        path = os.path.join(tmp, "recipes.snap")
+        app.write_recipes(path, [app.Recipe.from_dict(d) for d in recipes])
+        eager, eager_time, eager_bytes = open_book(app, path)
+        lazy, lazy_time, lazy_bytes = open_book(app, path, lazy=True, cache_size=100)
+        lines.append(f"load {n} recipes: eager {eager_time:.2f} s, {eager_bytes / 1e6:.0f} MB; "
+                     f"lazy {lazy_time:.2f} s, {lazy_bytes / 1e6:.0f} MB")
+
+        for label, manager in (("eager", eager), ("lazy", lazy)):
+            start = time.perf_counter()
+            for name in names + hot:
+                manager.find_recipe(name)
+            lines.append(f"{label} find x{len(names) + len(hot)}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        same = all(lazy.find_recipe(name).to_dict() == eager.find_recipe(name).to_dict() for name in names)
+        same = same and [r.name for r in lazy.search_recipes("recipe 12")] == \
+            [r.name for r in eager.search_recipes("recipe 12")]
+        same = same and [r.name for r in lazy.find_by_ingredients(["flour", "eggs"])] == \
+            [r.name for r in eager.find_by_ingredients(["flour", "eggs"])]
+        stats = lazy.stats()["cache"]
+        lines.append(f"lazy cache: {stats}")
+        eager.close()
+
+        lazy.add_recipe(app.Recipe("Lazy pancakes", ["Mix", "Fry"], [app.Ingredient("flour", "200", "g")]))
+        lazy.close()
+        reopened = app.RecipeManager(path, lazy=True)
+        saved = len(reopened.recipes) == n + 1 and reopened.find_recipe("lazy pancakes") is not None \
+            and reopened.find_recipe(names[-1]).to_dict() == app.Recipe.from_dict(
+                next(d for d in recipes if d["name"] == names[-1])).to_dict()
+        reopened.close()
+    for line in lines:
+        print(line)
+    ok = same and stats["cached"] <= 100 and saved
+    print(f"same answers: {same}, saved: {saved}")
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
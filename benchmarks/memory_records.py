@@ -0,0 +1,76 @@
+"""
+Measures the memory cost per record of Task, Transaction and Ingredient.
+Each slotted class is compared with a plain dict-backed object holding the
+same attributes, which is how the classes were stored before.
+
+Usage: python benchmarks/memory_records.py [count]
+"""
+import sys
+import tracemalloc
+
+from common import load_app, make_recipe_dicts, make_task_dicts, make_transaction_dicts
+
+
+class DictRecord:
+    """A plain object whose attributes live in a per-instance __dict__."""
+
+
+def plain_copy(obj, extra=None):
+    """Builds a dict-backed copy of a slotted object (optionally with extra attributes)."""
+    record = DictRecord()
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            setattr(record, name, getattr(obj, name))
+    for name, value in (extra or {}).items():
+        setattr(record, name, value)
+    return record
+
+
+def measure(factory, count):
+    """Returns the bytes allocated per record by calling factory count times."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scheduler = load_app("scheduler")
+    budget = load_app("budget")
+    recipes = load_app("recipes")
+
+    tasks = make_task_dicts(count)
+    transactions = make_transaction_dicts(count)
+    ingredients = [i for r in make_recipe_dicts(count // 4 + 1) for i in r["ingredients"]][:count]
+
+    def make_transaction(d):
+        cls = budget.Income if d["type"] == "income" else budget.Expense
+        return cls(d["amount"], d["category"], d["date"])
+
+    cases = [
+        ("Task",
+         lambda i: scheduler.Task.from_dict(tasks[i]),
+         lambda i: plain_copy(scheduler.Task.from_dict(tasks[i]))),
+        ("Transaction",
+         lambda i: make_transaction(transactions[i]),
+         # The old classes also stored the type string on every instance
+         lambda i: plain_copy(make_transaction(transactions[i]), {"type": transactions[i]["type"]})),
+        ("Ingredient",
+         lambda i: recipes.Ingredient(**ingredients[i % len(ingredients)]),
+         lambda i: plain_copy(recipes.Ingredient(**ingredients[i % len(ingredients)]))),
+        ]
+
+    print(f"{'record':<12} {'dict-backed':>12} {'slotted':>10} {'saved':>8}")
+    for name, slotted, plain in cases:
+        plain_bytes = measure(plain, count)
+        slotted_bytes = measure(slotted, count)
+        saved = 100 * (plain_bytes - slotted_bytes) / plain_bytes
+        print(f"{name:<12} {plain_bytes:>10.0f} B {slotted_bytes:>8.0f} B {saved:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
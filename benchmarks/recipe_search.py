@@ -0,0 +1,54 @@
+"""
+Compares RecipeManager's indexed lookups with a linear scan over the recipe list.
+
+Usage: python benchmarks/recipe_search.py [count]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from common import load_app, make_recipe_dicts, quiet
+
+
+def timed(label, fn, repeat=1000):
+    """Runs fn repeat times and prints the mean time per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<40} {elapsed * 1e6:>12.1f} us")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    recipes = load_app("recipes")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "recipes.json")
+        with open(path, "w") as f:
+            json.dump(make_recipe_dicts(count), f)
+        start = time.perf_counter()
+        with quiet():
+            manager = recipes.RecipeManager(path, fuzzy=True)
+        print(f"{'load + index ' + str(count) + ' recipes':<40} {(time.perf_counter() - start) * 1e3:>12.1f} ms")
+
+    target = manager.recipes[-1].name
+
+    def linear_scan():
+        for recipe in manager.recipes:
+            if recipe.name.lower() == target.lower():
+                return recipe
+        return None
+
+    timed("linear scan (old find_recipe)", linear_scan, repeat=20)
+    timed("find_recipe (exact, indexed)", lambda: manager.find_recipe(target))
+    timed("search_recipes prefix 'recipe 9999'", lambda: manager.search_recipes("recipe 9999"), repeat=100)
+    timed("find_by_ingredients salt+egg+milk", lambda: manager.find_by_ingredients(["salt", "egg", "milk"]), repeat=20)
+    typo = target[:-2] + target[-1] + target[-2]
+    timed(f"fuzzy_find '{typo}'", lambda: manager.fuzzy_find(typo), repeat=5)
+
+
+if __name__ == "__main__":
+    main()
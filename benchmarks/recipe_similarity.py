@@ -0,0 +1,143 @@
+"""
+Checks and times the recipe manager's ingredient-vector queries against
+plain scans: "similar recipes" (cosine similarity of ingredient vectors) and
+"what can I cook" (recipes whose ingredients are all, or all but one, in a
+pantry). Also checks that adding a recipe updates the answers, and that the
+lazy snapshot and SQLite stores give the same results.
+
+Usage: python benchmarks/recipe_similarity.py [recipes]
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import load_app, quiet
+
+VOCABULARY = 2000
+QUERIES = 50
+
+
+def make_recipes(app, n, seed=0):
+    """Recipes of 2-12 ingredients drawn from a vocabulary where a few ingredients are very common."""
+    rng = random.Random(seed)
+    vocabulary = [f"ingredient {i}" for i in range(VOCABULARY)]
+    weights = [1 / (i + 1) for i in range(VOCABULARY)]
+    recipes = []
+    for i in range(n):
+        names = set(rng.choices(vocabulary, weights, k=rng.randint(2, 12)))
+        recipes.append(app.Recipe(f"Recipe {i}", ["Cook"],
+                                  [app.Ingredient(name.title() if i % 3 else name, "1", "pcs") for name in names]))
+    return recipes, vocabulary
+
+
+def scan_similar(app, recipes, position, limit):
+    keys = {app.normalize(i.name) for i in recipes[position].ingredients}
+    scored = []
+    for p, recipe in enumerate(recipes):
+        other = {app.normalize(i.name) for i in recipe.ingredients}
+        shared = len(keys & other)
+        if shared and p != position:
+            scored.append((-(shared / math.sqrt(len(keys) * len(other))), -shared, p))
+    scored.sort()
+    return [(p, -score) for score, _, p in scored[:limit]]
+
+
+def scan_pantry(app, recipes, pantry, missing):
+    pantry = {app.normalize(name) for name in pantry}
+    found = []
+    for p, recipe in enumerate(recipes):
+        lacking = len({app.normalize(i.name) for i in recipe.ingredients} - pantry)
+        if lacking <= missing:
+            found.append((lacking, p))
+    return [p for _, p in sorted(found)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = load_app("recipes")
+    rng = random.Random(1)
+    recipes, vocabulary = make_recipes(app, n)
+    pantries = [rng.sample(vocabulary[:60], 30) + rng.sample(vocabulary, 20) for _ in range(QUERIES)]
+    probes = [rng.randrange(n) for _ in range(QUERIES)]
+    wrong = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        with quiet():
+            manager = app.RecipeManager(os.path.join(tmp, "recipes.json"), autosave_every=None)
+            manager.add_many(recipes)
+
+        def positions(found):
+            return [int(r.name.split()[1]) for r in found]
+
+        _, build = timed(lambda: manager.similar_recipes(recipes[probes[0]].name, 10))
+        similar, cold = timed(lambda: [manager.similar_recipes(recipes[p].name, 10) for p in probes[1:]])
+        _, warm = timed(lambda: [manager.similar_recipes(recipes[p].name, 10) for p in probes[1:]])
+        expected, scan = timed(lambda: [scan_similar(app, recipes, p, 10) for p in probes[1:11]])
+        for found, reference in zip(similar, expected):
+            wrong += [(int(r.name.split()[1]), round(s, 9)) for r, s in found] != \
+                     [(p, round(s, 9)) for p, s in reference]
+        per = len(probes) - 1
+        print(f"{n} recipes over {VOCABULARY} ingredients; matrix built in {build * 1000:.0f} ms")
+        print(f"similar recipes: {cold / per * 1000:.2f} ms per query, {warm / per * 1e6:.1f} us cached, "
+              f"scan {scan / 10 * 1000:.0f} ms")
+
+        pantry_results, cold = timed(lambda: [manager.recipes_from_pantry(p, missing=1) for p in pantries])
+        _, warm = timed(lambda: [manager.recipes_from_pantry(p, missing=1) for p in pantries])
+        expected, scan = timed(lambda: [scan_pantry(app, recipes, p, 1) for p in pantries[:10]])
+        for found, reference in zip(pantry_results, expected):
+            wrong += positions(found) != reference
+        sizes = [len(found) for found in pantry_results]
+        print(f"what can I cook (50-item pantry, up to one missing): {cold / QUERIES * 1000:.2f} ms per query, "
+              f"{warm / QUERIES * 1e6:.1f} us cached, scan {scan / 10 * 1000:.0f} ms; "
+              f"{min(sizes)}-{max(sizes)} recipes each")
+
+        # Adding a recipe must show up in the cached answers. The twin copies the largest
+        # recipe of the small set below, whose ingredients no other recipe has in full
+        largest = max(range(3000), key=lambda p: len(recipes[p].ingredients))
+        with quiet():
+            manager.similar_recipes(recipes[largest].name, 1)
+            twin = app.Recipe("Twin", ["Cook"], [app.Ingredient(i.name, "2", "g")
+                                                  for i in recipes[largest].ingredients])
+            manager.add_recipe(twin)
+        wrong += manager.similar_recipes(recipes[largest].name, 1) != [(twin, 1.0)]
+        pantry = [i.name for i in twin.ingredients]
+        wrong += "Twin" not in [r.name for r in manager.recipes_from_pantry(pantry)]
+        wrong += manager.recipes_from_pantry([]) != []
+
+        # The lazy snapshot and SQLite stores answer the same way
+        small = recipes[:3000]
+        for name, lazy in (("small.snap", True), ("small.db", False)):
+            path = os.path.join(tmp, name)
+            app.write_recipes(path, small)
+            with quiet():
+                store = app.RecipeManager(path, autosave_every=None, lazy=lazy)
+                for p in probes[:5]:
+                    p %= len(small)
+                    found = store.similar_recipes(small[p].name, 8)
+                    wrong += [int(r.name.split()[1]) for r, _ in found] != \
+                             [q for q, _ in scan_similar(app, small, p, 8)]
+                for items in pantries[:5]:
+                    wrong += positions(store.recipes_from_pantry(items, missing=1)) != \
+                             scan_pantry(app, small, items, 1)
+                store.add_recipe(twin)
+                wrong += [(r.name, round(s, 9)) for r, s in store.similar_recipes(recipes[largest].name, 1)] != \
+                         [("Twin", 1.0)]
+                wrong += "Twin" not in [r.name for r in store.recipes_from_pantry(pantry)]
+                store.close()
+        with quiet():
+            manager.close()
+    print(f"mismatches: {wrong}")
+    print("OK" if not wrong else "FAILED")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
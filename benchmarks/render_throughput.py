@@ -0,0 +1,106 @@
+"""
+Measures listing a large budget and recipe book into a pipe: the old way
+(one print() per record and separator) against view_all_transactions /
+view_all_recipes, which write buffered chunks, both on a cold render cache
+and on a warm one (the second listing). Also checks that both produce the
+same text and that --offset/--limit pages add up to the full listing.
+
+Usage: python benchmarks/render_throughput.py [transactions]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from common import load_app, make_recipe_dicts, make_transaction_dicts, quiet
+
+
+@contextlib.contextmanager
+def pipe():
+    """Yields a text file whose output goes through an OS pipe to a thread that counts and discards it."""
+    read_fd, write_fd = os.pipe()
+    received = [0]
+
+    def drain():
+        with os.fdopen(read_fd, "rb") as reader:
+            for block in iter(lambda: reader.read(1 << 16), b""):
+                received[0] += len(block)
+
+    thread = threading.Thread(target=drain)
+    thread.start()
+    writer = os.fdopen(write_fd, "w")
+    try:
+        yield writer
+    finally:
+        writer.close()
+        thread.join()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def old_transactions(budget, out):
+    print("\n -- All Transactions ---", file=out)
+    for t in budget.transactions:
+        print(t, file=out)
+    print("-------------------", file=out)
+    print(f"Current Balance: ${budget.get_balance():.2f}", file=out)
+
+
+def old_recipes(manager, out):
+    print(f"\n-- Showing {len(manager.recipes)} Recipes ---", file=out)
+    for recipe in manager.recipes:
+        print(recipe, file=out)
+        print("-" * 20, file=out)
+
+
+def compare(label, n, old, new):
+    """Times the old and new listing into a pipe and returns whether they wrote the same text."""
+    with pipe() as out:
+        before = timed(lambda: old(out))
+    with pipe() as out:
+        cold = timed(lambda: new(out))
+    with pipe() as out:
+        warm = timed(lambda: new(out))
+    print(f"{label:<22} print per line {before:6.2f} s, buffered {cold:6.2f} s "
+          f"({n / cold:,.0f}/s), cached {warm:6.2f} s ({n / warm:,.0f}/s)")
+    expected, actual = io.StringIO(), io.StringIO()
+    old(expected)
+    new(actual)
+    return expected.getvalue() == actual.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    budget_app = load_app("budget")
+    recipe_app = load_app("recipes")
+    classes = {"income": budget_app.Income, "expense": budget_app.Expense}
+    with tempfile.TemporaryDirectory() as tmp, quiet():
+        budget = budget_app.Budget(os.path.join(tmp, "budget.json"), autosave_every=None)
+        budget.add_many(classes[d["type"]](d["amount"], d["category"], d["date"]) for d in make_transaction_dicts(n))
+        recipes = recipe_app.RecipeManager(os.path.join(tmp, "recipes.json"), autosave_every=None)
+        recipes.add_many(recipe_app.Recipe.from_dict(d) for d in make_recipe_dicts(n // 10))
+    ok = compare(f"{n} transactions", n, lambda out: old_transactions(budget, out),
+                 lambda out: budget.view_all_transactions(out=out))
+    ok = compare(f"{n // 10} recipes", n // 10, lambda out: old_recipes(recipes, out),
+                 lambda out: recipes.view_all_recipes(out=out)) and ok
+
+    pages = []
+    for offset in range(0, 2500, 1000):
+        out = io.StringIO()
+        budget.view_all_transactions(offset, 1000, out)
+        pages.extend(line for line in out.getvalue().splitlines() if line.startswith("["))
+    paged = pages == [str(t) for t in budget.transactions[:3000]]
+    print(f"same text: {ok}, pages add up: {paged}")
+    print("OK" if ok and paged else "FAILED")
+    return 0 if ok and paged else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
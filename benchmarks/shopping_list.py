@@ -0,0 +1,83 @@
+"""
+Builds shopping lists for meal plans over thousands of recipes and checks the
+merged totals against a straightforward per-ingredient sum. Also checks the
+quantity parser and unit table on a few hand-written cases and times
+Recipe.scale over every recipe.
+
+Usage: python benchmarks/shopping_list.py [recipes]
+"""
+import sys
+import time
+
+from common import load_app, make_recipe_dicts
+
+
+def check_parsing(app):
+    """Returns the hand-written parsing and conversion cases that came out wrong."""
+    cases = {"2": 2, "0.5": 0.5, "1,5": 1.5, "1/2": 0.5, "1 1/2": 1.5, "½": 0.5,
+             "1½": 1.5, "2-3": 3, "to taste": None, "": None, "1/0": None}
+    wrong = [(text, app.parse_quantity(text), want) for text, want in cases.items()
+             if app.parse_quantity(text) != want]
+    units = {"kg": ("g", 1000.0), "Cups": ("ml", 240.0), "tbsp.": ("ml", 15.0),
+             "cloves": ("clove", 1.0), "": ("pcs", 1.0)}
+    wrong += [(unit, app.unit_base(unit), want) for unit, want in units.items() if app.unit_base(unit) != want]
+    flour = app.Recipe("Bread", [], [app.Ingredient("Flour", "500", "g"), app.Ingredient("salt", "pinch", "")])
+    cake = app.Recipe("Cake", [], [app.Ingredient("flour", "1", "kg"), app.Ingredient("Salt", "1/2", "tsp")])
+    shopping = [str(i) for i in app.build_shopping_list([(flour, 2), cake])]
+    want = ["2 kg of Flour", "2.5 ml of Salt", "pinch  of salt"]
+    if shopping != want:
+        wrong.append(("shopping list", shopping, want))
+    return wrong
+
+
+def reference_totals(app, plan):
+    """Sums every measured ingredient per (name, base unit) the slow way, for comparison."""
+    totals = {}
+    for recipe, factor in plan:
+        for ingredient in recipe.ingredients:
+            amount, base = ingredient.base_amount()
+            if amount is not None:
+                key = (app.normalize(ingredient.name), base)
+                totals[key] = totals.get(key, 0.0) + amount * factor
+    return totals
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    app = load_app("recipes")
+    recipes = [app.Recipe.from_dict(d) for d in make_recipe_dicts(n)]
+    ingredients = sum(len(r.ingredients) for r in recipes)
+    plan = [(recipe, 1 + i % 4) for i, recipe in enumerate(recipes)]
+
+    wrong = check_parsing(app)
+    for case in wrong:
+        print("wrong:", case)
+
+    start = time.perf_counter()
+    shopping = app.build_shopping_list(plan)
+    elapsed = time.perf_counter() - start
+    print(f"shopping list for {n} recipes ({ingredients} ingredients): {elapsed * 1000:.1f} ms, "
+          f"{len(shopping)} items")
+
+    start = time.perf_counter()
+    scaled = [recipe.scale(2) for recipe in recipes]
+    print(f"scale {n} recipes x2: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    expected = reference_totals(app, plan)
+    merged = {}
+    for item in shopping:
+        amount, base = item.base_amount()
+        merged[(app.normalize(item.name), base)] = amount
+    totals_ok = expected.keys() == merged.keys() and all(
+        abs(merged[k] - v) <= 0.01 * max(1.0, v) for k, v in expected.items())
+    doubled = reference_totals(app, [(recipe, 1) for recipe in scaled])
+    single = reference_totals(app, [(recipe, 1) for recipe in recipes])
+    scale_ok = all(abs(doubled[k] - 2 * v) < 1e-6 for k, v in single.items())
+    print(f"totals match: {totals_ok}, scaling matches: {scale_ok}")
+    ok = not wrong and totals_ok and scale_ok
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
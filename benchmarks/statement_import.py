@@ -0,0 +1,91 @@
+"""
+Imports a generated bank statement into a Budget with import_statement, on
+one process and on a process pool, and checks the result: every valid row
+added once, invalid rows reported, and a second import of the same file
+skipped entirely as duplicates. Also imports the same rows as OFX.
+
+Usage: python benchmarks/statement_import.py [rows]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+
+from common import CATEGORIES, load_app, quiet
+
+
+def write_csv(path, n, seed=0):
+    """Writes n rows, every 1000th of them invalid, and returns the number of valid ones."""
+    rng = random.Random(seed)
+    valid = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Date", "Description", "Amount"])
+        for i in range(n):
+            day = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {i % 24:02d}:{i % 60:02d}:{i // 60 % 60:02d}"
+            amount = f"{rng.choice([-1, 1]) * rng.uniform(1, 2000):,.2f}"
+            if i % 1000 == 999:
+                amount = "n/a"
+            else:
+                valid += 1
+            # Quoted descriptions with commas and line breaks, as some banks export them
+            description = rng.choice(CATEGORIES) if i % 7 else f"{rng.choice(CATEGORIES)}, ref\n{i}"
+            writer.writerow([day, description, amount])
+    return valid
+
+
+def write_ofx(path, n, seed=1):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n")
+        for i in range(n):
+            f.write(f"<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>2025{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+                    f"{i % 24:02d}{i % 60:02d}00[-5:EST]\n<TRNAMT>{rng.choice([-1, 1]) * rng.uniform(1, 500):.2f}\n"
+                    f"<FITID>{i}\n<NAME>{rng.choice(CATEGORIES)}\n</STMTTRN>\n")
+        f.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+def run_import(app, budget_path, statement, workers):
+    with quiet():
+        budget = app.Budget(budget_path, autosave_every=None)
+        summary = budget.import_statement(statement, workers=workers)
+        balance = budget.get_balance()
+        budget.close()
+    return summary, balance
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    app = load_app("budget")
+    # At least two, so the process pool is used even on a single CPU
+    workers = max(2, os.cpu_count() or 1)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        statement = os.path.join(tmp, "statement.csv")
+        valid = write_csv(statement, n)
+        balances = []
+        for label, count in (("1 process", 1), (f"{workers} processes", workers)):
+            budget_path = os.path.join(tmp, f"budget-{label.split()[0]}.snap")
+            summary, balance = run_import(app, budget_path, statement, count)
+            balances.append(balance)
+            print(f"{label:<12} {summary['rows']:,} rows in {summary['seconds']:.2f} s "
+                  f"({summary['rows'] / summary['seconds']:,.0f} rows/s), {summary['added']:,} added, "
+                  f"{len(summary['errors'])} invalid")
+            ok = ok and summary["added"] == valid and len(summary["errors"]) == n - valid
+        again, balance = run_import(app, budget_path, statement, workers)
+        print(f"re-import: {again['added']} added, {again['duplicates']:,} duplicates, balance unchanged: "
+              f"{balance == balances[-1]}")
+        ok = ok and again["added"] == 0 and again["duplicates"] == valid and balances[0] == balances[1] == balance
+
+        ofx = os.path.join(tmp, "statement.ofx")
+        write_ofx(ofx, n // 10)
+        summary, _ = run_import(app, os.path.join(tmp, "ofx.snap"), ofx, workers)
+        print(f"ofx:         {summary['rows']:,} rows in {summary['seconds']:.2f} s, {summary['added']:,} added")
+        ok = ok and summary["added"] == n // 10 and not summary["errors"]
+    print("OK" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
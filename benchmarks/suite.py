@@ -0,0 +1,276 @@
+"""
+Benchmark and profiling suite for the load, save, add, query and render paths
+of all three apps. Every scenario runs on synthetic data at each scale and
+reports the best wall time of up to --repeat runs, the peak memory allocated while it
+ran (tracemalloc) and the number of memory blocks it left allocated.
+
+The results are JSON (on stdout, or in --output) together with the commit
+they were measured on, so runs from two commits can be compared: pass the
+older file as --compare to print the change per scenario and exit with 1 if
+anything got slower than --threshold allows. --profile DIR also writes a
+cProfile dump per scenario, readable with `python -m pstats`.
+
+Usage: python benchmarks/suite.py [--scales 1k,100k,1m] [--apps scheduler,budget,recipes]
+                                  [--repeat N] [--output FILE] [--compare FILE]
+                                  [--threshold 1.1] [--profile DIR]
+"""
+import argparse
+import contextlib
+import cProfile
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from common import REPO_ROOT, load_app, make_recipe_dicts, make_task_dicts, make_transaction_dicts
+
+# Calls made by the scenarios that time one small operation. Adds save after every call,
+# which rewrites the whole file for the budget and recipes, so they are kept few.
+ADDS = 10
+LOOKUPS = 1000
+# Slowdowns smaller than this many seconds are noise, whatever the ratio
+NOISE = 0.001
+# Timed runs stop early once a scenario has used this many seconds
+TIME_BUDGET = 2.0
+
+
+def parse_scale(text):
+    """Turns '1k', '100k' or '1m' into a record count."""
+    text = text.strip().lower()
+    for suffix, factor in (("k", 1_000), ("m", 1_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+@contextlib.contextmanager
+def silenced():
+    """Sends the apps' print() output to /dev/null, so rendering still formats every line."""
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+class Context:
+    """Data shared by the scenarios of one app at one scale: the data file and a loaded manager."""
+
+    def __init__(self, app, n, tmp):
+        self.app = app
+        self.n = n
+        self.tmp = tmp
+        self.path = None
+        self._manager = None
+        self.open = None
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            with silenced():
+                self._manager = self.open()
+        return self._manager
+
+    def close(self):
+        if self._manager is not None:
+            with silenced():
+                self._manager.close()
+
+
+def scheduler_scenarios(ctx):
+    app = ctx.app
+    ctx.path = os.path.join(ctx.tmp, "tasks.json")
+    app.write_tasks(ctx.path, [app.Task.from_dict(d) for d in make_task_dicts(ctx.n)])
+    ctx.open = lambda: app.Scheduler(ctx.path)
+
+    def add():
+        for i in range(ADDS):
+            ctx.manager.add_task(app.Task(f"Added {i}", "", "2025-06-01", "high"))
+        return ADDS
+
+    return {
+            "load": lambda: (app.Scheduler(ctx.path), ctx.n)[1],
+            "save": lambda: (ctx.manager.save_tasks(), ctx.n)[1],
+            "add": add,
+            "view_task_by_priority": lambda: len(ctx.manager.view_task_by_priority()),
+            "render": lambda: len([str(task) for task in ctx.manager.tasks]),
+            }
+
+
+def budget_scenarios(ctx):
+    app = ctx.app
+    ctx.path = os.path.join(ctx.tmp, "budget.json")
+    classes = {"income": app.Income, "expense": app.Expense}
+    app.write_transactions(ctx.path, [classes[d["type"]](d["amount"], d["category"], d["date"])
+                                      for d in make_transaction_dicts(ctx.n)])
+    ctx.open = lambda: app.Budget(ctx.path)
+
+    def add():
+        for i in range(ADDS):
+            ctx.manager.add_transaction(app.Expense(i + 1, "food", "2025-06-01 12:00:00"))
+        return ADDS
+
+    def balance():
+        for _ in range(LOOKUPS):
+            ctx.manager.get_balance()
+        return LOOKUPS
+
+    return {
+            "load": lambda: (app.Budget(ctx.path), ctx.n)[1],
+            "save": lambda: (ctx.manager.save_transactions(), ctx.n)[1],
+            "add": add,
+            "get_balance": balance,
+            "render": lambda: len([str(t) for t in ctx.manager.transactions]),
+            }
+
+
+def recipe_scenarios(ctx):
+    app = ctx.app
+    ctx.path = os.path.join(ctx.tmp, "recipes.json")
+    recipes = make_recipe_dicts(ctx.n)
+    app.write_recipes(ctx.path, [app.Recipe.from_dict(d) for d in recipes])
+    ctx.open = lambda: app.RecipeManager(ctx.path)
+    # Half of the lookups hit a recipe, half miss
+    names = [recipes[i * len(recipes) // LOOKUPS]["name"] if i % 2 else f"missing recipe {i}"
+             for i in range(LOOKUPS)]
+
+    def add():
+        for i in range(ADDS):
+            ctx.manager.add_recipe(app.Recipe(f"Added {i}", ["Mix", "Serve"],
+                                              [app.Ingredient("salt", "1", "tsp")]))
+        return ADDS
+
+    def find():
+        for name in names:
+            ctx.manager.find_recipe(name)
+        return LOOKUPS
+
+    return {
+            "load": lambda: (app.RecipeManager(ctx.path), ctx.n)[1],
+            "save": lambda: (ctx.manager.save_recipes(), ctx.n)[1],
+            "add": add,
+            "find_recipe": find,
+            "render": lambda: len([str(recipe) for recipe in ctx.manager.recipes]),
+            }
+
+
+APPS = {
+        "scheduler": scheduler_scenarios,
+        "budget": budget_scenarios,
+        "recipes": recipe_scenarios,
+        }
+
+
+def measure(run, repeat, profile_path=None):
+    """
+    Runs a scenario: timed up to `repeat` times (fewer once it has taken TIME_BUDGET
+    seconds), then once under tracemalloc, and once under cProfile if asked.
+    """
+    best = None
+    ops = 0
+    spent = 0.0
+    with silenced():
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            ops = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            spent += elapsed
+            if spent > TIME_BUDGET:
+                break
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        blocks = sys.getallocatedblocks() - blocks
+        if profile_path:
+            profiler = cProfile.Profile()
+            profiler.runcall(run)
+            profiler.dump_stats(profile_path)
+    return {"seconds": best, "ops": ops, "seconds_per_op": best / ops if ops else None,
+            "peak_bytes": peak, "allocated_blocks": blocks}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Prints each scenario's time against the baseline file and returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {(r["app"], r["scenario"], r["scale"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n{'scenario':<40} {'before':>10} {'after':>10} {'change':>8}", file=sys.stderr)
+    for r in results:
+        old = baseline.get((r["app"], r["scenario"], r["scale"]))
+        if old is None:
+            continue
+        ratio = r["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        slower = ratio > threshold and r["seconds"] - old["seconds"] > NOISE
+        regressions += slower
+        print(f"{r['app'] + '.' + r['scenario'] + ' @' + str(r['scale']):<40} "
+              f"{old['seconds']:>9.4f}s {r['seconds']:>9.4f}s {ratio:>7.2f}x{'  SLOWER' if slower else ''}",
+              file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="1k,100k", help="comma-separated record counts, e.g. 1k,100k,1m")
+    parser.add_argument("--apps", default=",".join(APPS), help="comma-separated apps to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario (the best is kept)")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.1, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--profile", help="directory for one cProfile dump per scenario")
+    args = parser.parse_args()
+
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+    results = []
+    for scale in map(parse_scale, args.scales.split(",")):
+        for name in args.apps.split(","):
+            with tempfile.TemporaryDirectory() as tmp:
+                ctx = Context(load_app(name), scale, tmp)
+                scenarios = APPS[name](ctx)
+                for scenario, run in scenarios.items():
+                    profile_path = None
+                    if args.profile:
+                        profile_path = os.path.join(args.profile, f"{name}-{scenario}-{scale}.prof")
+                    result = {"app": name, "scenario": scenario, "scale": scale,
+                              **measure(run, args.repeat, profile_path)}
+                    results.append(result)
+                    print(f"{name + '.' + scenario + ' @' + str(scale):<40} {result['seconds']:>9.4f}s "
+                          f"peak {result['peak_bytes'] / 1e6:>8.2f} MB  blocks {result['allocated_blocks']:>+9}",
+                          file=sys.stderr)
+                ctx.close()
+
+    report = {
+            "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+            }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    regressions = compare(results, args.compare, args.threshold) if args.compare else 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
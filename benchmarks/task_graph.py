@@ -0,0 +1,185 @@
+"""
+Checks and times the scheduler's task dependency graph on a project of
+interlinked tasks: loading it, the critical path (checked against a plain
+recomputation), which tasks are ready, releasing dependents as tasks are
+completed, cycle detection, the snapshot and SQLite formats, and running the
+graph on a thread pool and a process pool with TaskGraphRunner.
+
+Usage: python benchmarks/task_graph.py [tasks]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from common import load_app, quiet
+
+PRIORITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+
+def make_graph_dicts(n, seed=0):
+    """Tasks 1..n, each depending on up to three earlier tasks, mostly recent ones."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(1, n + 1):
+        candidates = {i - rng.randint(1, 50) for _ in range(rng.randint(0, 3))}
+        if i > 1000 and rng.random() < 0.1:
+            candidates.add(rng.randrange(1, i))
+        tasks.append({"id": i, "title": f"Task {i}", "description": "", "status": "Pending",
+                      "due_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                      "priority": rng.choice(PRIORITIES),
+                      "depends_on": sorted(c for c in candidates if c >= 1)})
+    return tasks
+
+
+def reference_finish(dicts, duration):
+    """Earliest finish of every chain, computed in id order (every task depends only on earlier ones)."""
+    finish = {}
+    for d in dicts:
+        finish[d["id"]] = duration(d) + max((finish[p] for p in d["depends_on"]), default=0)
+    return max(finish.values())
+
+
+def ready_ids(scheduler):
+    done = {t.task_id for t in scheduler.tasks if t.status != "Pending"}
+    return {t.task_id for t in scheduler.tasks
+            if t.status == "Pending" and all(p in done for p in t.depends_on)}
+
+
+class Recorder:
+    """A callback that fails if a task starts before all its prerequisites finished."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.finished = set()
+        self.early = 0
+
+    def __call__(self, task):
+        with self.lock:
+            self.early += not all(p in self.finished for p in task.depends_on)
+        time.sleep(0)
+        with self.lock:
+            self.finished.add(task.task_id)
+
+
+def work(task):
+    """A picklable callback for the process pool; task 13 always fails."""
+    if task.task_id == 13:
+        raise RuntimeError("unlucky")
+    return task.task_id
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    app = load_app("scheduler")
+    dicts = make_graph_dicts(n)
+    edges = sum(len(d["depends_on"]) for d in dicts)
+    wrong = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.json")
+        app.write_tasks(path, map(app.Task.from_dict, dicts))
+        with quiet():
+            start = time.perf_counter()
+            scheduler = app.Scheduler(path, autosave_every=None)
+            load_time = time.perf_counter() - start
+
+        duration = lambda task: task.priority.value
+        start = time.perf_counter()
+        finish, chain = scheduler.critical_path(duration)
+        path_time = time.perf_counter() - start
+        print(f"{n} tasks, {edges} dependencies: loaded in {load_time:.2f} s, "
+              f"critical path in {path_time * 1000:.0f} ms")
+        print(f"earliest finish {finish} over a chain of {len(chain)} tasks")
+        wrong += finish != reference_finish(dicts, lambda d: app.Priority[d["priority"]].value)
+        wrong += sum(map(duration, chain)) != finish
+        wrong += any(a.task_id not in b.depends_on for a, b in zip(chain, chain[1:]))
+        wrong += {t.task_id for t in scheduler.top_tasks()} != ready_ids(scheduler)
+        wrong += len(scheduler.blocked_tasks()) != n - len(ready_ids(scheduler))
+
+        # An edit that would close a cycle is refused, and so is an unknown prerequisite
+        for bad in ((chain[0].task_id, [chain[-1].task_id]), (1, [1]), (1, [n + 10])):
+            try:
+                with quiet():
+                    scheduler.edit_task(bad[0], depends_on=bad[1])
+                wrong += 1
+            except ValueError:
+                pass
+
+        # Work through the whole project in priority order, one ready task at a time
+        completed = set()
+        start = time.perf_counter()
+        with quiet(), scheduler.batch():
+            while (task := scheduler.next_task()) is not None:
+                wrong += not all(p in completed for p in task.depends_on)
+                completed.add(task.task_id)
+                scheduler.complete_task(task.task_id)
+        release_time = time.perf_counter() - start
+        print(f"completed all {len(completed)} tasks in dependency order in {release_time:.2f} s "
+              f"({release_time / n * 1e6:.1f} us per task)")
+        wrong += len(completed) != n or scheduler.blocked_tasks() != []
+        with quiet():
+            scheduler.close()
+
+        # Dependencies survive the journal, the snapshot format and SQLite
+        small = make_graph_dicts(2000, seed=1)
+        for name in ("tasks.snap", "tasks.db", "journal.json"):
+            target = os.path.join(tmp, name)
+            with quiet():
+                if name == "journal.json":
+                    tasks = app.Scheduler(target, compact_threshold=10 ** 9)
+                    tasks.add_many(app.Task.from_dict(d) for d in small)
+                    tasks.close()
+                else:
+                    app.write_tasks(target, map(app.Task.from_dict, small))
+                tasks = app.Scheduler(target)
+                for task_id in range(1, 2001, 7):
+                    tasks.complete_task(task_id)
+                wrong += [t.depends_on for t in tasks.tasks] != [tuple(d["depends_on"]) for d in small]
+                wrong += {t.task_id for t in tasks.top_tasks()} != ready_ids(tasks)
+                wrong += tasks.critical_path()[0] != app.Scheduler(target).critical_path()[0]
+                tasks.close()
+
+        # A cycle written into the file by hand
+        cyclic = make_graph_dicts(100, seed=2)
+        cyclic[9]["depends_on"] = [60]
+        cyclic[59]["depends_on"] = [30]
+        cyclic[29]["depends_on"] = [10]
+        app.write_tasks(os.path.join(tmp, "cycle.json"), map(app.Task.from_dict, cyclic))
+        with quiet():
+            tasks = app.Scheduler(os.path.join(tmp, "cycle.json"))
+        wrong += sorted(tasks.dependency_cycle()) != [10, 30, 60]
+        try:
+            tasks.critical_path()
+            wrong += 1
+        except ValueError:
+            pass
+
+        # Running the graph on pools
+        for processes, size in ((False, 5000), (True, 300)):
+            target = os.path.join(tmp, f"pool-{processes}.json")
+            app.write_tasks(target, map(app.Task.from_dict, make_graph_dicts(size, seed=3)))
+            with quiet():
+                tasks = app.Scheduler(target, autosave_every=None)
+            callback = work if processes else Recorder()
+            start = time.perf_counter()
+            with quiet():
+                summary = app.TaskGraphRunner(tasks, callback, workers=4, processes=processes).run()
+            elapsed = time.perf_counter() - start
+            print(f"{'process' if processes else 'thread'} pool ran {size} tasks in {elapsed:.2f} s: {summary}")
+            if processes:
+                # Task 13 failed, so it and everything behind it stays pending
+                pending = {t.task_id for t in tasks.tasks if t.status == "Pending"}
+                wrong += summary["failed"] != 1 or 13 not in pending
+                wrong += summary["completed"] + len(pending) != size
+                wrong += summary["blocked"] != len(pending) - 1
+            else:
+                wrong += summary != {"completed": size, "failed": 0, "blocked": 0} or callback.early
+    print(f"mismatches: {wrong}")
+    print("OK" if not wrong else "FAILED")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
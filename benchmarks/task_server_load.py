@@ -0,0 +1,145 @@
+"""
+Load generator for the scheduler's asyncio server mode. Starts
+`simple-task.py serve` on a temporary task file, then opens several client
+connections that each keep a number of requests in flight (pipelining) and
+mix add, next, list and complete requests. Reports throughput, p50/p99
+latency and how many journal writes the server needed for all the mutations.
+
+Usage: python benchmarks/task_server_load.py [clients] [requests per client] [pipeline depth]
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import APP_PATHS
+
+
+def free_port():
+    """Returns a TCP port that is free right now."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def connect(port, timeout=10.0):
+    """Connects to the server, retrying while it starts up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            # A full task list can be one very long line
+            return await asyncio.open_connection("127.0.0.1", port, limit=1 << 26)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+def make_request(rng, client_id, i, added):
+    """Picks the next request: mostly adds, some reads and completions of earlier adds."""
+    roll = rng.random()
+    if roll < 0.15 and added:
+        return {"op": "complete", "id": added.pop(rng.randrange(len(added)))}
+    if roll < 0.35:
+        return {"op": "next"}
+    if roll < 0.45:
+        return {"op": "list", "limit": 10}
+    return {"op": "add", "title": f"client {client_id} task {i}", "description": "load test",
+            "due_date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "priority": rng.choice(["LOW", "MEDIUM", "HIGH", "CRITICAL"])}
+
+
+async def client(port, client_id, count, depth, latencies):
+    """Sends count requests keeping up to depth of them in flight, recording each latency."""
+    reader, writer = await connect(port)
+    rng = random.Random(client_id)
+    added = []
+    in_flight = asyncio.Semaphore(depth)
+    sent = {}
+    errors = 0
+
+    async def send():
+        for i in range(count):
+            await in_flight.acquire()
+            request = make_request(rng, client_id, i, added)
+            request["seq"] = i
+            sent[i] = (time.perf_counter(), request["op"])
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for _ in range(count):
+        reply = json.loads(await reader.readline())
+        started, op = sent.pop(reply["seq"])
+        latencies.append(time.perf_counter() - started)
+        in_flight.release()
+        if not reply["ok"]:
+            errors += 1
+        elif op == "add":
+            added.append(reply["task"]["id"])
+    await sender
+    writer.close()
+    await writer.wait_closed()
+    return errors
+
+
+async def request(port, message):
+    """Sends a single request on a fresh connection and returns the reply."""
+    reader, writer = await connect(port)
+    writer.write((json.dumps(message) + "\n").encode())
+    reply = json.loads(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    return reply
+
+
+def percentile(values, p):
+    """Returns the p-th percentile of sorted values."""
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+async def run(port, clients, count, depth):
+    """Runs all clients at once and collects the results and the server's counters."""
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(client(port, c, count, depth, latencies) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+    stats = await request(port, {"op": "stats"})
+    pending = await request(port, {"op": "list"})
+    return latencies, elapsed, sum(errors), stats, len(pending["tasks"])
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    depth = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    port = free_port()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen([sys.executable, APP_PATHS["scheduler"], "-f", os.path.join(tmp, "tasks.json"),
+                                   "serve", f"127.0.0.1:{port}"],
+                                  stdout=subprocess.DEVNULL)
+        try:
+            latencies, elapsed, errors, stats, pending = asyncio.run(run(port, clients, count, depth))
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    total = clients * count
+    print(f"{clients} clients x {count} requests, pipeline depth {depth}")
+    print(f"throughput: {total / elapsed:,.0f} requests/s ({elapsed:.2f} s)")
+    print(f"latency:    p50 {percentile(latencies, 50) * 1000:.2f} ms, p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"errors:     {errors}")
+    print(f"persisted:  {stats['batches']} micro-batches, {stats['writer']['writes']} journal writes, "
+          f"{pending} tasks pending")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""Fixtures for the tests: the three apps, loaded once per session (see helpers.py)."""
+import pytest
+
+from helpers import load_app
+
+
+@pytest.fixture(scope="session")
+def scheduler_app():
+    return load_app("scheduler")
+
+
+@pytest.fixture(scope="session")
+def budget_app():
+    return load_app("budget")
+
+
+@pytest.fixture(scope="session")
+def recipe_app():
+    return load_app("recipes")
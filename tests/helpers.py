@@ -0,0 +1,30 @@
+"""
+Loads the three apps for the tests and the benchmarks. They are scripts in
+folders with dashes in their names, so they are loaded by file path instead
+of being imported; appcommon.py, the module they share, is imported from the
+repository root.
+"""
+import importlib.util
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+APP_PATHS = {
+        "scheduler": os.path.join(REPO_ROOT, "Simple-Task-Scheduler", "simple-task.py"),
+        "budget": os.path.join(REPO_ROOT, "Personal_Budget_Tracker", "personal_tracker.py"),
+        "recipes": os.path.join(REPO_ROOT, "Recipe-Manager", "recipe.py"),
+        }
+
+
+def load_app(name):
+    """Loads one of the app scripts as a module, once per process."""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, APP_PATHS[name])
+        module = importlib.util.module_from_spec(spec)
+        # Registered so that process pools can pickle the module's functions by name
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
@@ -0,0 +1,47 @@
+"""Tests for the helpers the apps share (appcommon.py)."""
+import json
+
+import pytest
+
+import appcommon
+from appcommon import iter_json_array
+
+CHUNK_SIZES = [1, 2, 3, 5, 1 << 16]
+
+
+def read(tmp_path, text, chunk_size):
+    path = tmp_path / "data.json"
+    path.write_text(text)
+    return list(iter_json_array(str(path), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", [
+        "[87038.75585555162]",
+        "[-0.5e-3, 12, true, null, false]",
+        ' [ 1 , "a" , {"b": [1, 2.5]} , [] ] \n',
+        "[]",
+        ])
+def test_iter_json_array_matches_json_loads(tmp_path, text, chunk_size):
+    assert read(tmp_path, text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text", ["[1]trailing", "[]trailing", "[1]]", "[1x]", "[1 2]", "[1,]", "[,1]", "[1", "{}"])
+def test_iter_json_array_rejects_malformed_arrays(tmp_path, text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        read(tmp_path, text, chunk_size)
+
+
+def test_atomic_open_gives_new_files_the_umask_permissions(tmp_path, monkeypatch):
+    monkeypatch.setattr(appcommon, "UMASK", 0o002)
+    path = tmp_path / "data.json"
+    with appcommon.atomic_open(str(path)) as f:
+        f.write("[]")
+    assert path.stat().st_mode & 0o777 == 0o664
+
+    # A rewrite keeps the permissions the file has
+    path.chmod(0o640)
+    with appcommon.atomic_open(str(path)) as f:
+        f.write("[1]")
+    assert path.stat().st_mode & 0o777 == 0o640
@@ -0,0 +1,255 @@
+"""Tests for the budget tracker (Personal_Budget_Tracker/personal_tracker.py)."""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+
+def rows_of(transactions):
+    """Transactions as (type, date, amount, category), in order."""
+    return [(t.type, t.date, t.amount, t.category) for t in transactions]
+
+
+def rows(budget):
+    """The budget's transactions as (type, date, amount, category), in order."""
+    return rows_of(budget.transactions)
+
+
+def import_text(budget_app, tmp_path, name, text, **options):
+    """Imports a statement with the given text into a new budget; returns (budget, summary)."""
+    statement = tmp_path / name
+    statement.write_text(text, encoding="utf-8")
+    budget = budget_app.Budget(str(tmp_path / "budget.json"), autosave_every=None)
+    return budget, budget.import_statement(str(statement), **options)
+
+
+# The second transaction's payee has a quoted comma and line break, so small chunks end inside it
+QUOTED_CSV = ('Date,Amount,Payee\n'
+              '2025-01-02,-12.50,Grocer\n'
+              '2025-01-03,"1,200.00","Employer, Inc.\nJanuary salary"\n'
+              '2025-01-04,-3.20,"Cafe ""Bean"""\n'
+              '2025-01-05,-40.00,Fuel\n')
+QUOTED_ROWS = [("expense", "2025-01-02 00:00:00", 12.5, "Grocer"),
+               ("income", "2025-01-03 00:00:00", 1200.0, "Employer, Inc.\nJanuary salary"),
+               ("expense", "2025-01-04 00:00:00", 3.2, 'Cafe "Bean"'),
+               ("expense", "2025-01-05 00:00:00", 40.0, "Fuel")]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 30, 1 << 20])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_csv_with_quotes_across_chunks(budget_app, tmp_path, chunk_size, workers):
+    budget, summary = import_text(budget_app, tmp_path, "statement.csv", QUOTED_CSV,
+                                  workers=workers, chunk_size=chunk_size)
+    assert rows(budget) == QUOTED_ROWS
+    assert (summary["added"], summary["duplicates"], summary["errors"]) == (4, 0, [])
+
+
+def test_import_csv_debit_and_credit_columns(budget_app, tmp_path):
+    text = ('Posted Date;Money Out;Money In;Description\n'
+            '03/01/2025;12,50;;Grocer\n'
+            '04/01/2025;;1.234,50;Salary\n'
+            '05/01/2025;(7,25);;Refund fee\n')
+    budget, summary = import_text(budget_app, tmp_path, "statement.csv", text, workers=1, date_format="%d/%m/%Y")
+    assert rows(budget) == [("expense", "2025-01-03 00:00:00", 12.5, "Grocer"),
+                            ("income", "2025-01-04 00:00:00", 1234.5, "Salary"),
+                            ("expense", "2025-01-05 00:00:00", 7.25, "Refund fee")]
+    assert summary["errors"] == []
+
+
+@pytest.mark.parametrize("amount, signed", [
+        ("-12.50", -12.5), ("$1,234.00", 1234.0), ("(12.50)", -12.5), ("12.50-", -12.5),
+        ("1.234,50", 1234.5), ("12,50", 12.5), ("€ 3", 3.0),
+        ])
+def test_parse_amount(budget_app, amount, signed):
+    assert budget_app.parse_amount(amount) == signed
+
+
+@pytest.mark.parametrize("amount", ["", "abc", "inf", "12.50.3x"])
+def test_parse_amount_rejects_bad_amounts(budget_app, amount):
+    with pytest.raises(ValueError):
+        budget_app.parse_amount(amount)
+
+
+def test_import_ofx(budget_app, tmp_path):
+    text = ("OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250102120000[-5:EST]<TRNAMT>-12.50<NAME>Grocer</STMTTRN>\n"
+            "<stmttrn><trntype>CREDIT<dtposted>20250103<trnamt>1200.00<memo>Salary</stmttrn>\n"
+            "<STMTTRN><TRNTYPE>FEE<DTPOSTED>20250104<TRNAMT>-1.00</STMTTRN>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>garbage<TRNAMT>-5.00</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+    for chunk_size in (16, 1 << 20):
+        (tmp_path / "budget.json").unlink(missing_ok=True)
+        budget, summary = import_text(budget_app, tmp_path, "statement.ofx", text, workers=1, chunk_size=chunk_size)
+        assert rows(budget) == [("expense", "2025-01-02 12:00:00", 12.5, "Grocer"),
+                                ("income", "2025-01-03 00:00:00", 1200.0, "Salary"),
+                                ("expense", "2025-01-04 00:00:00", 1.0, "fee")]
+        assert len(summary["errors"]) == 1 and summary["errors"][0].startswith("transaction 4:")
+
+
+def test_import_twice_adds_nothing_but_keeps_duplicates_within_a_file(budget_app, tmp_path):
+    text = ('Date,Amount,Category\n'
+            '2025-01-02,-5.00,Coffee\n'
+            '2025-01-02,-5.00,Coffee\n'
+            '2025-01-03,-7.00,Lunch\n')
+    budget, summary = import_text(budget_app, tmp_path, "statement.csv", text, workers=1)
+    # Two coffees on the same day are two real transactions
+    assert (summary["added"], summary["duplicates"]) == (3, 0)
+    again = budget.import_statement(str(tmp_path / "statement.csv"), workers=1)
+    assert (again["added"], again["duplicates"]) == (0, 3)
+    assert len(budget.transactions) == 3
+
+    # A statement with one more coffee adds just that one
+    (tmp_path / "more.csv").write_text(text + '2025-01-02,-5.00,Coffee\n')
+    more = budget.import_statement(str(tmp_path / "more.csv"), workers=1)
+    assert (more["added"], more["duplicates"]) == (1, 3)
+    assert budget.get_balance() == -22.0
+
+
+@pytest.mark.parametrize("chunk_size", [5, 1 << 20])
+def test_import_reports_invalid_rows_by_line(budget_app, tmp_path, chunk_size):
+    text = ('Date,Amount,Payee\n'
+            '2025-01-02,-1.00,"Two\nlines"\n'
+            'not a date,-2.00,A\n'
+            '2025-01-04,0,B\n'
+            '\n'
+            '2025-01-06,lots,C\n'
+            '2025-01-07\n'
+            '2025-01-08,-3.00,D\n')
+    budget, summary = import_text(budget_app, tmp_path, "statement.csv", text, workers=1, chunk_size=chunk_size)
+    assert [t.category for t in budget.transactions] == ["Two\nlines", "D"]
+    assert [message.split(":")[0] for message in summary["errors"]] == ["line 4", "line 5", "line 7", "line 8"]
+
+
+def brute_total(budget_app, budget, start, end, kind="net"):
+    """Income, expenses or net of the transactions from start (inclusive) to end (exclusive), scanning them all."""
+    start, end = budget_app.parse_timestamp(start), budget_app.parse_timestamp(end)
+    signs = {"income": (1,), "expenses": (-1,), "net": (1, -1)}[kind]
+    cents = sum(round(t.amount * 100) * (t.sign if kind == "net" else 1)
+                for t in budget.transactions if start <= t.when < end and t.sign in signs)
+    return cents / 100
+
+
+def next_day(day):
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def test_day_totals_grow_for_back_dated_and_far_future_transactions(budget_app, tmp_path):
+    budget = budget_app.Budget(str(tmp_path / "budget.json"), autosave_every=None)
+    budget.add_transaction(budget_app.Income(100, "Salary", "2025-03-01"))
+    budget.add_transaction(budget_app.Expense(20, "Food", "2025-03-02 12:00:00"))
+    # The first query builds the day totals; each add after it lands outside their span
+    assert budget.get_balance_as_of("2025-03-02") == 80.0
+    budget.add_transaction(budget_app.Expense(5.55, "Food", "2019-06-30 23:59:59"))
+    budget.add_transaction(budget_app.Income(1000, "Bonus", "2090-12-31"))
+    budget.add_transaction(budget_app.Expense(0.45, "Fee", "2025-02-28"))
+    budget.add_transaction(budget_app.Expense(3, "Food", "1990-01-01"))
+
+    for day in ["1989-12-31", "1990-01-01", "2019-06-30", "2025-02-28", "2025-03-01",
+                "2025-03-02", "2050-01-01", "2090-12-31", "2100-01-01"]:
+        assert budget.get_balance_as_of(day) == brute_total(budget_app, budget, "0001-01-01", next_day(day))
+    assert budget.get_balance_as_of("2100-01-01") == budget.get_balance()
+    assert budget.get_day_range_totals("2019-01-01", "2025-03-02") == {"income": 100.0, "expenses": 6.0, "net": 94.0}
+
+    # Removing a transaction takes it out of the day totals too
+    budget.remove_transaction(3)  # the bonus
+    assert budget.get_balance_as_of("2100-01-01") == budget.get_balance() == 71.0
+
+
+def test_balance_as_of_counts_the_whole_day(budget_app, tmp_path):
+    budget = budget_app.Budget(str(tmp_path / "budget.json"), autosave_every=None)
+    budget.add_many([budget_app.Income(50, "Salary", "2025-01-10 09:00:00"),
+                     budget_app.Expense(10, "Food", "2025-01-10 23:59:59"),
+                     budget_app.Expense(5, "Food", "2025-01-11 00:00:00")])
+    assert budget.get_balance_as_of("2025-01-09") == 0.0
+    assert budget.get_balance_as_of("2025-01-10") == 40.0
+    assert budget.get_balance_as_of("2025-01-11") == 35.0
+
+
+@pytest.mark.parametrize("kind", ["income", "expenses", "net"])
+def test_rolling_totals(budget_app, tmp_path, kind):
+    budget = budget_app.Budget(str(tmp_path / "budget.json"), autosave_every=None)
+    budget.add_many([budget_app.Income(1000, "Salary", "2025-01-01"),
+                     budget_app.Expense(12.34, "Food", "2025-01-03 18:30:00"),
+                     budget_app.Expense(7.66, "Food", "2025-01-05"),
+                     budget_app.Income(0.1, "Interest", "2025-01-06"),
+                     budget_app.Expense(100, "Rent", "2025-01-09")])
+    series = budget.get_rolling_totals(3, "2024-12-30", "2025-01-12", kind)
+    assert [day for day, _ in series] == [(date(2024, 12, 30) + timedelta(days=n)).isoformat() for n in range(13)]
+    for day, total in series:
+        window_start = (date.fromisoformat(day) - timedelta(days=2)).isoformat()
+        assert total == brute_total(budget_app, budget, window_start, next_day(day), kind)
+
+
+def test_rolling_totals_reject_an_unknown_kind(budget_app, tmp_path):
+    budget = budget_app.Budget(str(tmp_path / "budget.json"), autosave_every=None)
+    with pytest.raises(ValueError):
+        budget.get_rolling_totals(7, "2025-01-01", "2025-02-01", "balance")
+
+
+def test_range_total_sums_cents_for_ranges_within_a_day(budget_app, tmp_path):
+    budget = budget_app.Budget(str(tmp_path / "budget.json"), autosave_every=None)
+    budget.add_many([budget_app.Income(0.1, "Interest", f"2025-01-01 10:00:{second:02d}") for second in range(10)])
+    # Whole days come from the day totals, other ranges from the transactions; both are exact
+    assert budget.get_range_total("2025-01-01", "2025-01-02") == 1.0
+    assert budget.get_range_total("2025-01-01 09:00:00", "2025-01-01 11:00:00") == 1.0
+    assert budget.get_range_total("2025-01-01 10:00:05", "2025-01-02") == 0.5
+
+
+@pytest.fixture
+def budgets(budget_app, tmp_path):
+    """The same transactions in a columnar budget and a list budget: (columnar, plain)."""
+    pytest.importorskip("numpy")
+    rng = random.Random(4)
+    categories = ["Food", "Rent", "Salary", "Fuel", "Gifts"]
+    transactions = []
+    for _ in range(400):
+        kind = budget_app.Income if rng.random() < 0.3 else budget_app.Expense
+        when = datetime(2024, 11, 1) + timedelta(seconds=rng.randrange(150 * 86400))
+        transactions.append((kind, round(rng.uniform(0.01, 500), 2), rng.choice(categories), str(when)))
+    pair = []
+    for columnar in (True, False):
+        budget = budget_app.Budget(str(tmp_path / f"{columnar}.json"), columnar=columnar, autosave_every=None)
+        budget.add_many(kind(amount, category, when) for kind, amount, category, when in transactions)
+        for i in (0, 17, 17, -1):
+            budget.remove_transaction(i)
+        pair.append(budget)
+    return pair
+
+
+def test_columnar_store_matches_the_list_store(budgets):
+    columnar, plain = budgets
+    assert isinstance(plain.transactions, list) and not isinstance(columnar.transactions, list)
+    assert rows(columnar) == rows(plain)
+    assert columnar.get_balance() == plain.get_balance()
+    assert columnar.get_summary() == plain.get_summary()
+    assert columnar.get_category_totals() == plain.get_category_totals()
+    assert columnar.get_monthly_totals() == plain.get_monthly_totals()
+    # verify() recomputes the totals with the store's own vectorized aggregates
+    assert columnar.verify() and plain.verify()
+
+
+def test_columnar_store_aggregates(budgets):
+    columnar, plain = budgets
+    store = columnar.transactions
+    assert store.balance() == plain.get_balance()
+    assert {name: total for name, total in store.category_totals().items() if total} == plain.get_category_totals()
+    assert {month: total for month, total in store.monthly_totals().items() if total} == plain.get_monthly_totals()
+
+
+@pytest.mark.parametrize("start, end", [
+        ("2024-11-01", "2025-04-01"), ("2024-12-01", "2025-01-01"), ("2025-02-10", "2025-02-11"),
+        ("2025-01-05 12:00:00", "2025-01-20 08:30:00"), ("2025-03-01 00:00:01", "2025-03-01 23:59:59"),
+        ("2023-01-01", "2024-01-01"), ("2025-02-01", "2025-01-01"),
+        ])
+def test_columnar_range_totals_match_the_list_store(budgets, start, end):
+    columnar, plain = budgets
+    assert columnar.get_range_total(start, end) == plain.get_range_total(start, end)
+    assert rows_of(columnar.get_transactions_between(start, end)) == rows_of(plain.get_transactions_between(start, end))
+
+
+def test_columnar_budget_saves_the_same_file(budgets, budget_app):
+    columnar, plain = budgets
+    columnar.save_transactions()
+    reloaded = budget_app.Budget(columnar.file_path, autosave_every=None)
+    assert rows(reloaded) == rows(plain)
+    assert reloaded.get_summary() == plain.get_summary()
@@ -0,0 +1,64 @@
+"""
+Bulk adds write the file once, so the bytes written grow linearly with the
+number of records; adding the same records one by one rewrites the whole file
+each time, which grows quadratically. Counted with the apps' own metrics.
+"""
+import pytest
+
+N = 50
+
+
+def make_budget(app, path):
+    manager = app.Budget(path, metrics=True)
+    return manager, manager.add_many, manager.add_transaction, "_write_file", (
+        lambda i: app.Expense(i + 0.5, f"food {i}", "2025-01-01"))
+
+
+def make_recipes(app, path):
+    manager = app.RecipeManager(path, metrics=True)
+    return manager, manager.add_many, manager.add_recipe, "_write_file", (
+        lambda i: app.Recipe(f"Recipe {i}", ["Mix", "Bake"], [app.Ingredient("flour", "200", "g")]))
+
+
+def make_scheduler(app, path):
+    manager = app.Scheduler(path, metrics=True)
+    return manager, manager.add_many, manager.add_task, "_write_queued", (
+        lambda i: app.Task(f"Task {i}", "", "2025-01-01", "LOW"))
+
+
+MANAGERS = {"budget": ("budget_app", make_budget), "recipes": ("recipe_app", make_recipes),
+            "scheduler": ("scheduler_app", make_scheduler)}
+
+
+def import_records(request, tmp_path, name, n, one_by_one=False, extension=".json"):
+    """Adds n records to a new file; returns (number of writes, bytes written)."""
+    fixture, make = MANAGERS[name]
+    path = str(tmp_path / f"{name}-{n}-{one_by_one}{extension}")
+    manager, add_many, add_one, write, record = make(request.getfixturevalue(fixture), path)
+    if one_by_one:
+        for i in range(n):
+            add_one(record(i))
+    else:
+        add_many(record(i) for i in range(n))
+    stats = manager.stats()
+    manager.close()
+    return stats["operations"][write]["count"], stats["bytes_written"]
+
+
+@pytest.mark.parametrize("extension", [".json", ".snap"])
+@pytest.mark.parametrize("name", MANAGERS)
+def test_add_many_writes_once_and_grows_linearly(request, tmp_path, name, extension):
+    writes, small = import_records(request, tmp_path, name, N, extension=extension)
+    assert writes == 1
+    writes, large = import_records(request, tmp_path, name, 4 * N, extension=extension)
+    assert writes == 1
+    assert 3.5 * small < large < 4.5 * small
+
+
+@pytest.mark.parametrize("name", ["budget", "recipes"])
+def test_one_by_one_rewrites_every_time(request, tmp_path, name):
+    writes, small = import_records(request, tmp_path, name, N, one_by_one=True)
+    assert writes == N
+    writes, large = import_records(request, tmp_path, name, 4 * N, one_by_one=True)
+    assert writes == 4 * N
+    assert large > 12 * small
@@ -0,0 +1,46 @@
+"""
+Several processes adding to the same task and budget files at once: with
+shared=True every add must survive, in every storage format.
+"""
+import multiprocessing
+import os
+
+import pytest
+
+from helpers import load_app
+
+PROCESSES = 6
+ADDS = 40
+
+
+def worker(args):
+    """Adds ADDS tasks and transactions from one process."""
+    tmp, extension, worker_id = args
+    scheduler_app, budget_app = load_app("scheduler"), load_app("budget")
+    # A small compaction threshold makes processes also rewrite the snapshot under each other
+    scheduler = scheduler_app.Scheduler(os.path.join(tmp, "tasks" + extension), compact_threshold=25, shared=True)
+    budget = budget_app.Budget(os.path.join(tmp, "budget" + extension), shared=True)
+    for i in range(ADDS):
+        scheduler.add_task(scheduler_app.Task(f"w{worker_id} task {i}", "", "2025-01-01", "MEDIUM"))
+        budget.add_transaction(budget_app.Income(1, f"w{worker_id} income {i}", "2025-01-01"))
+    scheduler.close()
+    budget.close()
+
+
+@pytest.mark.parametrize("extension", [".json", ".snap", ".db"])
+def test_concurrent_writers_lose_nothing(scheduler_app, budget_app, tmp_path, extension):
+    with multiprocessing.get_context("fork").Pool(PROCESSES) as pool:
+        pool.map(worker, [(str(tmp_path), extension, w) for w in range(PROCESSES)])
+
+    expected = {f"w{w} task {i}" for w in range(PROCESSES) for i in range(ADDS)}
+    scheduler = scheduler_app.Scheduler(str(tmp_path / ("tasks" + extension)), autosave_every=None)
+    ids = [t.task_id for t in scheduler.tasks]
+    assert len(ids) == len(set(ids)) == len(expected)
+    assert {t.title for t in scheduler.tasks} == expected
+    scheduler.close()
+
+    budget = budget_app.Budget(str(tmp_path / ("budget" + extension)), autosave_every=None)
+    categories = [t.category for t in budget.transactions]
+    assert sorted(categories) == sorted(f"w{w} income {i}" for w in range(PROCESSES) for i in range(ADDS))
+    assert budget.get_balance() == len(expected)
+    budget.close()
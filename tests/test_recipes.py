@@ -0,0 +1,74 @@
+"""Tests for the recipe manager (Recipe-Manager/recipe.py)."""
+import pytest
+
+
+def test_lazy_manager_on_new_snapshot(recipe_app, tmp_path):
+    path = str(tmp_path / "recipes.snap")
+    manager = recipe_app.RecipeManager(path, fuzzy=True, autosave_every=None, lazy=True)
+    assert not manager.lazy
+    manager.add_recipe(recipe_app.Recipe("Pancakes", ["Mix", "Fry"],
+                                         [recipe_app.Ingredient("flour", "200", "g")]))
+    assert [r.name for r in manager.fuzzy_find("pancake")] == ["Pancakes"]
+    assert "cache" not in manager.stats()
+    manager.close()
+
+    # Once the snapshot exists it is opened lazily
+    reopened = recipe_app.RecipeManager(path, autosave_every=None, lazy=True)
+    assert isinstance(reopened.recipes, recipe_app.LazyRecipes)
+    assert reopened.find_recipe("pancakes").steps == ["Mix", "Fry"]
+    reopened.close()
+
+
+def test_cli_add_to_new_snapshot(recipe_app, tmp_path):
+    path = str(tmp_path / "recipes.snap")
+    assert recipe_app.cli(["-f", path, "add", "Toast", "-i", "bread:2:slices", "-s", "Toast it"]) == 0
+    assert recipe_app.cli(["-f", path, "show", "Toast"]) == 0
+
+
+@pytest.mark.parametrize("text, amount", [
+        ("2", 2), ("0.5", 0.5), ("1,5", 1.5), ("1/2", 0.5), ("1 1/2", 1.5), ("½", 0.5),
+        ("1½", 1.5), ("2-3", 3), ("2 – 3", 3), ("to taste", None), ("", None), ("1/0", None),
+        ("a-3", None), ("1-2-3", None),
+        ])
+def test_parse_quantity(recipe_app, text, amount):
+    assert recipe_app.parse_quantity(text) == amount
+
+
+@pytest.mark.parametrize("text", ["-1", "+2", "2--3", "2-+3", "1 +1", "inf", "nan", "2-inf", "1e400"])
+def test_parse_quantity_rejects_signed_and_non_finite(recipe_app, text):
+    with pytest.raises(ValueError):
+        recipe_app.parse_quantity(text)
+
+
+@pytest.mark.parametrize("unit, base", [
+        ("kg", ("g", 1000.0)), ("Cups", ("ml", 240.0)), ("tbsp.", ("ml", 15.0)), ("lbs", ("g", 453.59237)),
+        ("cloves", ("clove", 1.0)), ("", ("pcs", 1.0)),
+        ])
+def test_unit_base(recipe_app, unit, base):
+    assert recipe_app.unit_base(unit) == base
+
+
+def test_scale_keeps_unmeasured_quantities(recipe_app):
+    recipe = recipe_app.Recipe("Bread", ["Knead"], [recipe_app.Ingredient("flour", "1 1/2", "kg"),
+                                                     recipe_app.Ingredient("salt", "a pinch", "")])
+    doubled = recipe.scale(2)
+    assert [str(i) for i in doubled.ingredients] == ["3 kg of flour", "a pinch  of salt"]
+    assert doubled.steps == ["Knead"] and doubled.steps is not recipe.steps
+    assert recipe.ingredients[0].quantity == "1 1/2"
+
+
+def test_build_shopping_list_merges_units_and_names(recipe_app):
+    Ingredient = recipe_app.Ingredient
+    bread = recipe_app.Recipe("Bread", [], [Ingredient("Flour", "500", "g"), Ingredient("salt", "pinch", ""),
+                                            Ingredient("milk", "1", "cup")])
+    cake = recipe_app.Recipe("Cake", [], [Ingredient("flour", "1", "kg"), Ingredient("Salt", "1/2", "tsp"),
+                                          Ingredient("Milk", "260", "ml"), Ingredient("eggs", "2-3", "")])
+    shopping = [str(i) for i in recipe_app.build_shopping_list([(bread, 2), cake])]
+    assert shopping == ["3 pcs of eggs", "2 kg of Flour", "740 ml of milk", "2.5 ml of Salt", "pinch  of salt"]
+
+
+def test_cli_rejects_signed_quantities(recipe_app, tmp_path, capsys):
+    path = str(tmp_path / "recipes.json")
+    with pytest.raises(SystemExit):
+        recipe_app.cli(["-f", path, "add", "Toast", "-i", "bread:-2:slices"])
+    assert "signed" in capsys.readouterr().err
@@ -0,0 +1,211 @@
+"""Tests for the task scheduler (Simple-Task-Scheduler/simple-task.py)."""
+import asyncio
+import io
+import json
+import time
+
+import pytest
+
+# Timer wheel tick for the engine tests, short so that overdue tasks fire at once
+TICK = 0.01
+
+
+def pending_ids(scheduler):
+    return [task.task_id for task in scheduler.top_tasks()]
+
+
+@pytest.mark.parametrize("first, second", [
+        ({"priority": "LOW"}, {"priority": "HIGH"}),
+        ({"due_date": "2025-12-01"}, {"due_date": "2025-01-01"}),
+        ({"depends_on": [2]}, {"depends_on": []}),
+        ])
+def test_edit_round_trip_keeps_one_heap_entry(scheduler_app, tmp_path, first, second):
+    path = str(tmp_path / "tasks.json")
+    scheduler = scheduler_app.Scheduler(path, autosave_every=None)
+    scheduler.add_task(scheduler_app.Task("One", "", "2025-01-01", "HIGH"))
+    scheduler.add_task(scheduler_app.Task("Two", "", "2025-02-01", "MEDIUM"))
+    # Edit task 1 away from its key and back again
+    scheduler.edit_task(1, **first)
+    scheduler.edit_task(1, **second)
+    assert pending_ids(scheduler) == [1, 2]
+    assert scheduler._pending_count == 2
+    scheduler.close()
+
+    # Replaying the journal must not bring the duplicate back either
+    reloaded = scheduler_app.Scheduler(path, autosave_every=None)
+    assert pending_ids(reloaded) == [1, 2]
+    assert reloaded.next_task().task_id == 1
+    reloaded.complete_task(1)
+    assert pending_ids(reloaded) == [2]
+    assert reloaded.next_task().task_id == 2
+    reloaded.close()
+
+
+@pytest.mark.parametrize("extension", [".json", ".db"])
+@pytest.mark.parametrize("fields", [
+        {"depends_on": [], "priority": "URGENT"},
+        {"depends_on": [], "title": "Renamed", "due_date": "2025-13-45"},
+        {"title": "Renamed", "status": "Complete"},
+        {"due": 0},
+        {"priority": 3},
+        ])
+def test_bad_edit_leaves_the_task_unchanged(scheduler_app, tmp_path, extension, fields):
+    path = str(tmp_path / ("tasks" + extension))
+    scheduler = scheduler_app.Scheduler(path, autosave_every=None)
+    scheduler.add_task(scheduler_app.Task("One", "", "2025-01-01", "HIGH"))
+    scheduler.add_task(scheduler_app.Task("Two", "", "2025-02-01", "MEDIUM", depends_on=[1]))
+    with pytest.raises(ValueError):
+        scheduler.edit_task(2, **fields)
+    task = scheduler._get_task(2)
+    assert (task.title, task.due_date, task.priority.name, task.status, task.depends_on) == (
+            "Two", "2025-02-01", "MEDIUM", "Pending", (1,))
+    # Task 2 still waits for task 1, and is released when it completes
+    assert pending_ids(scheduler) == [1]
+    scheduler.complete_task(1)
+    assert pending_ids(scheduler) == [2]
+    scheduler.close()
+
+    reloaded = scheduler_app.Scheduler(path, autosave_every=None)
+    assert reloaded._get_task(2).title == "Two"
+    reloaded.close()
+
+
+def wait_for(condition, timeout=5.0):
+    """Polls condition() until it is true or the timeout passes; returns its last value."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.parametrize("name", ["tasks.json", "tasks.db"])
+def test_engine_fires_dependents_once_released(scheduler_app, tmp_path, name):
+    scheduler = scheduler_app.Scheduler(str(tmp_path / name), autosave_every=None)
+    Task = scheduler_app.Task
+    # Both are overdue, so they fire as soon as they are ready
+    scheduler.add_task(Task("First", "", "2020-01-01", "LOW"))
+    scheduler.add_task(Task("Second", "", "2020-01-01", "HIGH", depends_on=[1]))
+    fired = []
+    with scheduler_app.DueTaskEngine(scheduler, lambda task: fired.append(task.task_id), tick=TICK):
+        assert wait_for(lambda: fired == [1])
+        time.sleep(20 * TICK)
+        assert fired == [1]
+        scheduler.complete_task(1)
+        assert wait_for(lambda: fired == [1, 2])
+    scheduler.close()
+
+
+@pytest.mark.parametrize("name", ["tasks.json", "tasks.db"])
+def test_engine_holds_blocked_task_added_while_running(scheduler_app, tmp_path, name):
+    scheduler = scheduler_app.Scheduler(str(tmp_path / name), autosave_every=None)
+    Task = scheduler_app.Task
+    scheduler.add_task(Task("Later", "", "2099-01-01", "LOW"))
+    fired = []
+    with scheduler_app.DueTaskEngine(scheduler, lambda task: fired.append(task.task_id), tick=TICK):
+        scheduler.add_task(Task("Waits", "", "2020-01-01", "HIGH", depends_on=[1]))
+        time.sleep(20 * TICK)
+        assert fired == []
+        scheduler.complete_task(1)
+        assert wait_for(lambda: fired == [2])
+    scheduler.close()
+
+
+def test_server_answers_every_pipelined_request(scheduler_app, tmp_path):
+    """Requests with fields of the wrong type get an error reply, and the ones after them still run."""
+    requests = [
+            {"seq": 1, "op": "add", "title": "Bad", "due_date": "2025-01-01", "priority": 3},
+            {"seq": 2, "op": "add", "title": 5, "due_date": "2025-01-01"},
+            {"seq": 3, "op": "add", "title": "Good", "due_date": "2025-01-01", "priority": "high"},
+            {"seq": 4, "op": "complete", "id": "1"},
+            {"seq": 5, "op": "list", "limit": "all"},
+            {"seq": 6, "op": "next"},
+            ]
+
+    async def exchange():
+        scheduler = scheduler_app.Scheduler(str(tmp_path / "tasks.json"), autosave_every=None, background=True)
+        server = scheduler_app.TaskServer(scheduler)
+        address = str(tmp_path / "server.sock")
+        await server.start(address)
+        reader, writer = await asyncio.open_unix_connection(address)
+        writer.write("".join(json.dumps(r) + "\n" for r in requests).encode())
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in requests]
+        writer.close()
+        await writer.wait_closed()
+        server.close()
+        return replies
+
+    replies = asyncio.run(asyncio.wait_for(exchange(), 10))
+    assert [reply["seq"] for reply in replies] == [1, 2, 3, 4, 5, 6]
+    assert [reply["ok"] for reply in replies] == [False, False, True, False, False, True]
+    assert "priority" in replies[0]["error"] and "title" in replies[1]["error"]
+    assert replies[5]["task"]["title"] == "Good"
+
+
+def test_cli_takes_the_task_file_from_option_only(scheduler_app, tmp_path):
+    parser = scheduler_app.build_parser()
+    path = str(tmp_path / "tasks.db")
+    args = parser.parse_args(["-f", path, "run", "8"])
+    assert (args.file, args.workers) == (path, 8)
+    args = parser.parse_args(["-f", path, "serve", "/tmp/tasks.sock"])
+    assert (args.file, args.address) == (path, "/tmp/tasks.sock")
+    with pytest.raises(SystemExit):
+        parser.parse_args(["list", path])
+
+
+def test_view_task_by_priority_pages_by_offset_then_limit(scheduler_app, tmp_path):
+    scheduler = scheduler_app.Scheduler(str(tmp_path / "tasks.json"), autosave_every=None)
+    for day in range(1, 6):
+        scheduler.add_task(scheduler_app.Task(f"Task {day}", "", f"2025-01-0{day}", "MEDIUM"))
+    out = io.StringIO()
+    shown = scheduler.view_task_by_priority(1, 3, out)
+    assert [task.title for task in shown] == ["Task 2", "Task 3", "Task 4"]
+    assert "\n2. " in out.getvalue() and "\n4. " in out.getvalue() and "\n5. " not in out.getvalue()
+    assert scheduler.view_task_by_priority(4, out=out)[0].title == "Task 5"
+    scheduler.close()
+
+
+def test_menu_exit_appends_to_the_journal(scheduler_app, tmp_path, monkeypatch):
+    path = tmp_path / "tasks.json"
+    scheduler = scheduler_app.Scheduler(str(path))
+    scheduler.add_task(scheduler_app.Task("One", "", "2025-01-01", "HIGH"))
+    scheduler.compact()
+    scheduler.close()
+    snapshot = path.read_bytes()
+
+    answers = iter(["1", "Two", "", "2025-02-01", "LOW", "4"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    scheduler_app.main(str(path))
+    # Exiting flushes the add to the journal instead of rewriting the whole task file
+    assert path.read_bytes() == snapshot
+    assert b"Two" in (tmp_path / "tasks.json.journal").read_bytes()
+    reloaded = scheduler_app.Scheduler(str(path))
+    assert [task.title for task in reloaded.top_tasks()] == ["One", "Two"]
+    reloaded.close()
+
+
+def test_server_replies_when_a_write_fails(scheduler_app, tmp_path):
+    """A failed flush answers the waiting mutations with an error instead of leaving them hanging."""
+    def broken():
+        raise RuntimeError("disk on fire")
+
+    async def exchange():
+        scheduler = scheduler_app.Scheduler(str(tmp_path / "tasks.json"), autosave_every=None, background=True)
+        server = scheduler_app.TaskServer(scheduler)
+        scheduler.wait_for_writes = broken
+        address = str(tmp_path / "server.sock")
+        await server.start(address)
+        reader, writer = await asyncio.open_unix_connection(address)
+        requests = [{"seq": 1, "op": "add", "title": "One", "due_date": "2025-01-01"}, {"seq": 2, "op": "next"}]
+        writer.write("".join(json.dumps(r) + "\n" for r in requests).encode())
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in requests]
+        writer.close()
+        await writer.wait_closed()
+        del scheduler.wait_for_writes
+        server.close()
+        return replies
+
+    replies = asyncio.run(asyncio.wait_for(exchange(), 10))
+    assert replies[0]["seq"] == 1 and not replies[0]["ok"] and "disk on fire" in replies[0]["error"]
+    assert replies[1]["seq"] == 2 and replies[1]["ok"]